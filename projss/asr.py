@@ -0,0 +1,315 @@
+# asr.py
+import json
+import os
+import re
+import time
+from typing import Callable, Iterable, List, Optional
+
+import speech_recognition as sr
+
+# Pluggable speech recognition: Google (online, whole phrase) or Vosk (offline,
+# CPU-only, streaming with partial hypotheses while the user is still talking).
+
+VOSK_MODEL_DIR = os.path.join("models", "vosk-model-small-en-in-0.4")
+DEFAULT_BACKEND = "google"  # "google" or "vosk"
+
+
+class Hypothesis:
+    """A recognition result; partial ones may still change as more audio arrives."""
+
+    def __init__(self, text: str, is_final: bool, confidence: Optional[float] = None):
+        self.text = text
+        self.is_final = is_final
+        self.confidence = confidence
+
+    def __repr__(self):
+        kind = "final" if self.is_final else "partial"
+        return f"Hypothesis({kind}, {self.text!r})"
+
+
+class RecognizedAudio(sr.AudioData):
+    """Captured audio that already carries its transcript (produced by StreamingSession)."""
+
+    def __init__(self, frame_data: bytes, sample_rate: int, sample_width: int, text: str, early: bool = False):
+        super().__init__(frame_data, sample_rate, sample_width)
+        self.text = text
+        self.early = early  # True when dispatched from a partial hypothesis
+
+
+class RecognizerStream:
+    """Incremental recognizer for one audio stream."""
+
+    def accept(self, chunk: bytes) -> Optional[Hypothesis]:
+        raise NotImplementedError
+
+    def finish(self) -> Hypothesis:
+        raise NotImplementedError
+
+
+class RecognizerBackend:
+    name = "base"
+    supports_streaming = False
+
+    def recognize(self, audio: sr.AudioData) -> Optional[str]:
+        """Transcribe a finished phrase; None if nothing was understood."""
+        raise NotImplementedError
+
+    def open_stream(self, sample_rate: int) -> RecognizerStream:
+        raise NotImplementedError(f"{self.name} does not support streaming")
+
+
+class GoogleRecognizer(RecognizerBackend):
+    """The original recognize_google path (network round trip after the phrase ends)."""
+
+    name = "google"
+
+    def __init__(self, language: str = "en-in"):
+        self.language = language
+        self._recognizer = sr.Recognizer()
+
+    def recognize(self, audio: sr.AudioData) -> Optional[str]:
+        try:
+            return self._recognizer.recognize_google(audio, language=self.language)
+        except sr.UnknownValueError:
+            return None
+
+
+class _VoskStream(RecognizerStream):
+    def __init__(self, model, sample_rate: int):
+        from vosk import KaldiRecognizer
+
+        self._rec = KaldiRecognizer(model, sample_rate)
+        self._rec.SetWords(True)
+
+    @staticmethod
+    def _final(result: str) -> Hypothesis:
+        data = json.loads(result)
+        words = data.get("result", [])
+        confidence = sum(w.get("conf", 0.0) for w in words) / len(words) if words else None
+        return Hypothesis(data.get("text", ""), True, confidence)
+
+    def accept(self, chunk: bytes) -> Optional[Hypothesis]:
+        if self._rec.AcceptWaveform(chunk):
+            return self._final(self._rec.Result())
+        partial = json.loads(self._rec.PartialResult()).get("partial", "")
+        return Hypothesis(partial, False) if partial else None
+
+    def finish(self) -> Hypothesis:
+        return self._final(self._rec.FinalResult())
+
+
+class VoskRecognizer(RecognizerBackend):
+    """Offline Kaldi recognizer. Model is loaded once, on first use."""
+
+    name = "vosk"
+    supports_streaming = True
+
+    def __init__(self, model_dir: str = VOSK_MODEL_DIR):
+        self.model_dir = model_dir
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from vosk import Model, SetLogLevel
+
+            SetLogLevel(-1)
+            start = time.perf_counter()
+            if os.path.isdir(self.model_dir):
+                self._model = Model(self.model_dir)
+            else:
+                self._model = Model(lang="en-in")
+            print(f"[asr.py] Loaded Vosk model in {time.perf_counter() - start:.2f}s")
+        return self._model
+
+    def open_stream(self, sample_rate: int) -> RecognizerStream:
+        return _VoskStream(self.model, sample_rate)
+
+    def recognize(self, audio: sr.AudioData) -> Optional[str]:
+        stream = self.open_stream(16000)
+        raw = audio.get_raw_data(convert_rate=16000, convert_width=2)
+        texts = []
+        step = 8000
+        for start in range(0, len(raw), step):
+            hypothesis = stream.accept(raw[start:start + step])
+            if hypothesis is not None and hypothesis.is_final and hypothesis.text:
+                texts.append(hypothesis.text)
+        final = stream.finish()
+        if final.text:
+            texts.append(final.text)
+        return " ".join(texts) or None
+
+
+BACKENDS = {"google": GoogleRecognizer, "vosk": VoskRecognizer}
+
+_backend: Optional[RecognizerBackend] = None
+
+
+def get_backend() -> RecognizerBackend:
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[DEFAULT_BACKEND]()
+    return _backend
+
+
+# ----------- EARLY COMMAND MATCHING -------------------
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9']+", text.lower()))
+
+
+class EarlyCommandMatcher:
+    """
+    Decides when a partial hypothesis is safe to act on.
+
+    A partial matches when it ends with a known command phrase that is not the start
+    of a longer known phrase, and the same match has held for `stable_partials`
+    consecutive partial updates.
+    """
+
+    def __init__(self, phrases: Iterable[str], stable_partials: int = 2):
+        self.phrases = sorted({_normalize(p) for p in phrases if p.strip()}, key=len, reverse=True)
+        prefixes = set()
+        for phrase in self.phrases:
+            words = phrase.split()
+            for i in range(1, len(words)):
+                prefixes.add(" ".join(words[:i]))
+        self._ambiguous = prefixes
+        self.stable_partials = stable_partials
+        self.reset()
+
+    def reset(self) -> None:
+        self._last: Optional[str] = None
+        self._count = 0
+
+    def feed(self, partial: str) -> Optional[str]:
+        """Return the partial text once it confidently ends in a command, else None."""
+        text = _normalize(partial)
+        match = None
+        for phrase in self.phrases:  # longest first
+            if text == phrase or text.endswith(" " + phrase):
+                match = phrase
+                break
+        if match is None or match in self._ambiguous:
+            self.reset()
+            return None
+        if match == self._last:
+            self._count += 1
+        else:
+            self._last, self._count = match, 1
+        return text if self._count >= self.stable_partials else None
+
+
+# ----------- STREAMING SESSION -------------------
+
+class StreamingSession:
+    """
+    Reads audio chunks straight from an open source and feeds a streaming backend.
+
+    next_utterance() returns as soon as the backend finalizes a phrase, or earlier
+    when `matcher` accepts a partial hypothesis. In that case the rest of the
+    utterance is skipped.
+    """
+
+    def __init__(
+        self,
+        backend: RecognizerBackend,
+        source_factory: Callable[[], sr.AudioSource] = sr.Microphone,
+        matcher: Optional[EarlyCommandMatcher] = None,
+        on_partial: Optional[Callable[[Hypothesis], None]] = None,
+    ):
+        if not backend.supports_streaming:
+            raise ValueError(f"{backend.name} backend does not support streaming")
+        self.backend = backend
+        self.source_factory = source_factory
+        self.matcher = matcher
+        self.on_partial = on_partial
+        self.source: Optional[sr.AudioSource] = None
+        self._stream: Optional[RecognizerStream] = None
+        self._skip_to_endpoint = False
+        self.exhausted = False
+
+    def _open(self) -> None:
+        if self.source is None:
+            self.source = self.source_factory()
+            self.source.__enter__()
+        if self._stream is None:
+            self._stream = self.backend.open_stream(self.source.SAMPLE_RATE)
+
+    def _audio(self, frames: List[bytes], text: str, early: bool) -> RecognizedAudio:
+        return RecognizedAudio(b"".join(frames), self.source.SAMPLE_RATE, self.source.SAMPLE_WIDTH, text, early)
+
+    def next_utterance(self) -> Optional[RecognizedAudio]:
+        """Block until the next phrase is recognized; None once the source is exhausted."""
+        self._open()
+        frames: List[bytes] = []
+        if self.matcher is not None:
+            self.matcher.reset()
+        while True:
+            chunk = self.source.stream.read(self.source.CHUNK)
+            if not chunk:
+                self.exhausted = True
+                final = self._stream.finish()
+                self._stream = None
+                if final.text and not self._skip_to_endpoint:
+                    return self._audio(frames, final.text, early=False)
+                return None
+            hypothesis = self._stream.accept(chunk)
+            if self._skip_to_endpoint:
+                # Still inside an utterance that was already dispatched early
+                if hypothesis is not None and hypothesis.is_final:
+                    self._skip_to_endpoint = False
+                continue
+            frames.append(chunk)
+            if hypothesis is None:
+                continue
+            if hypothesis.is_final:
+                if hypothesis.text:
+                    return self._audio(frames, hypothesis.text, early=False)
+                frames = []  # endpoint on silence
+                continue
+            if self.on_partial is not None:
+                self.on_partial(hypothesis)
+            if self.matcher is not None:
+                hit = self.matcher.feed(hypothesis.text)
+                if hit:
+                    self._skip_to_endpoint = True
+                    return self._audio(frames, hit, early=True)
+
+    def close(self) -> None:
+        if self.source is not None:
+            self.source.__exit__(None, None, None)
+            self.source = None
+        self._stream = None
+
+
+# Optional direct module testing against a WAV fixture:
+#   python asr.py temp_test.wav [--backend vosk] [--commands "open notepad" "volume up"]
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("wav", nargs="?", default="temp_test.wav")
+    parser.add_argument("--backend", default="vosk", choices=sorted(BACKENDS))
+    parser.add_argument("--commands", nargs="*", default=["volume up", "volume down", "open notepad"])
+    args = parser.parse_args()
+
+    backend = BACKENDS[args.backend]()
+    start = time.perf_counter()
+    if backend.supports_streaming:
+        session = StreamingSession(
+            backend,
+            source_factory=lambda: sr.AudioFile(args.wav),
+            matcher=EarlyCommandMatcher(args.commands),
+            on_partial=lambda h: print(f"  partial @{time.perf_counter() - start:.2f}s: {h.text}"),
+        )
+        while not session.exhausted:
+            utterance = session.next_utterance()
+            if utterance is not None:
+                kind = "early" if utterance.early else "final"
+                print(f"{kind} @{time.perf_counter() - start:.2f}s: {utterance.text}")
+        session.close()
+    else:
+        with sr.AudioFile(args.wav) as source:
+            audio = sr.Recognizer().record(source)
+        print(f"final @{time.perf_counter() - start:.2f}s: {backend.recognize(audio)}")
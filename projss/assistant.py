@@ -1,24 +1,25 @@
-
 import datetime
 import os
 import sys
 import time
 import webbrowser
 import pyautogui
-import speech_recognition as sr
 import random
 import re
-from nltk.stem import WordNetLemmatizer
-from nltk.tokenize import word_tokenize
-import nltk
-from gtts import gTTS
-import pygame  # Using pygame instead of playsound for audio playback
-from langdetect import detect
+from concurrent.futures import ThreadPoolExecutor
 from ollama import chat  # Ollama Llama 3 integration
 
-# Transformers and torch for BERT sentiment analysis
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
+# Heavy resources (BERT, Resemblyzer encoder, NLTK corpora, pygame mixer) load on first use
+import asr
+import capture
+import langid
+import longterm
+import models
+import procman
+import sentiment
+import tracing
+import tts
+import wakeword
 
 # Import memory and context module functions
 from memory import (
@@ -29,6 +30,8 @@ from memory import (
     load_mood_log,
     log_mood,
     get_last_mood,
+    mood_stats,
+    maintain_mood_log,
     load_chat_history,
     update_chat_history,
     get_recent_chat_context,
@@ -36,149 +39,328 @@ from memory import (
 
 from context import (
     add_exchange,
-    get_formatted_context,
+    load_context,
 )
 
-from auth import VoiceAuthenticator
-
-authenticator = VoiceAuthenticator(reference_audio_path="my_voice_sample.wav", threshold=0.75)
-
-# When you capture an audio file during wake phrase detection:
-if authenticator.is_my_voice("temp_wake_audio.wav"):
-    print("Voice authenticated!")
-else:
-    print("Voice not recognized!")
-
-# Download required nltk packages once (if not present)
-nltk.download("punkt")
-nltk.download("wordnet")
+from audio import audio_data_to_array, get_player
+from auth import VoiceAuthenticator, enrollments_from_dir, load_threshold
+from commands import APP_CLOSE_MAP, APP_OPEN_MAP, build_router, chrome_path
+from moodstats import period_days
+from prompt import SYSTEM_PROMPT, PromptBuilder
+from replycache import ReplyCache
+from streaming import CriticalPath, format_timings, stream_reply
+from verifier import verify_async
+
+# Extra enrollment samples, one folder per speaker: voices/<name>/*.wav
+VOICES_DIR = "voices"
+
+authenticator = VoiceAuthenticator(
+    reference_audio_path="my_voice_sample.wav",
+    threshold=load_threshold(),  # 0.75 unless calibrated with auth_eval.py
+    encoder_loader=models.resource("speaker_encoder").get,
+    enrollments=enrollments_from_dir(VOICES_DIR),
+)
 
-# Initialize pygame mixer (do this once globally)
-pygame.mixer.init()
+# Resources to preload in the background once the greeting has been spoken
+WARMUP_RESOURCES = ["mixer", "sentiment", "speaker_encoder", "embedder", "nltk"]
+
+def start_verification(audio_data):
+    # Speaker check runs on a worker thread while recognition transcribes the same audio
+    samples = audio_data_to_array(audio_data, sample_rate=16000)
+    audio_data.verification = verify_async(authenticator, samples, sample_rate=16000)
+
+def check_wake_audio(audio_data):
+    # Verify the captured wake phrase in memory, without writing a WAV file
+    future = getattr(audio_data, "verification", None)
+    with tracing.span("auth") as span:
+        if future is not None:
+            match = future.result()
+            span.set(audio_seconds=match.audio_seconds, early=match.early)
+            print(f"[timing] speaker decision after {match.audio_seconds:.1f}s of audio, "
+                  f"{match.compute_seconds * 1000:.0f}ms compute")
+        else:
+            samples = audio_data_to_array(audio_data, sample_rate=16000)
+            match = authenticator.identify(samples, sample_rate=16000)
+    if match.accepted:
+        print(f"Voice authenticated! ({match.speaker})")
+    else:
+        print("Voice not recognized!")
+    return match
 
 # ----------- BERT SENTIMENT ANALYSIS -------------------
 
-# Load pre-trained BERT sentiment model and tokenizer
-# Using nlptown multilingual sentiment model that outputs 1-5 star ratings
-tokenizer = AutoTokenizer.from_pretrained("nlptown/bert-base-multilingual-uncased-sentiment")
-model = AutoModelForSequenceClassification.from_pretrained("nlptown/bert-base-multilingual-uncased-sentiment")
+# nlptown multilingual sentiment model (1-5 star ratings), served by a batched,
+# cached engine. The model itself is loaded lazily via models.get("sentiment").
 
 def analyze_mood_with_bert(text):
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    with torch.no_grad():
-        outputs = model(**inputs)
-    scores = outputs.logits.softmax(dim=1)
-    rating = torch.argmax(scores) + 1  # Rating 1-5
-
-    # Map rating to moods:
-    if rating >= 4:     # 4 or 5 = Happy
-        return "Happy"
-    elif rating == 3:   # Neutral
-        return "Neutral"
-    elif rating == 2:   # Angry (somewhat negative)
-        return "Angry"
-    else:               # 1 = Sad
-        return "Sad"
+    with tracing.span("sentiment"):
+        return sentiment.get_engine().analyze(text)
 
 # ----------- LANGUAGE DETECTION & SPEAKING ------------------
+# Compiled Thanglish lexicon + cached, seeded detection (see langid.py)
 def detect_thanglish(text):
-    tamil_keywords = [
-        "vanakkam", "eppadi", "iruka", "sollu", "pesu", "enna",
-        "pudhu", "thunai", "mudivu", "vazhkai", "nala", "unnai",
-        "kaatchi", "sirikka", "sandhosham"
-    ]
-    for word in tamil_keywords:
-        if re.search(r"\b" + re.escape(word) + r"\b", text.lower()):
-            return True
-    return False
+    return langid.get_identifier().is_thanglish(text)
 
-def speak(text):
-    try:
-        lang = detect(text)
-    except:
-        lang = "en"
-    if detect_thanglish(text):
-        lang = "ta"
-    try:
-        tts = gTTS(text=text, lang=lang)
-        tts.save("temp_voice.mp3")
+def detect_speech_lang(text):
+    return langid.detect_language(text)
 
-        pygame.mixer.music.load("temp_voice.mp3")
-        pygame.mixer.music.play()
+# When the threaded runtime is running, speak() hands text to its playback queue
+speech_output = None
+# Set by the runtime: returns a speak function bound to the turn handled on this thread
+turn_speaker = None
 
-        while pygame.mixer.music.get_busy():
-            time.sleep(0.1)
+def speak(text, on_start=None):
+    if speech_output is not None:
+        speech_output(text, on_start)
+        return
+    play_speech(text, on_start=on_start)
 
-        # Unload the music to release file lock (pygame 2.0+)
-        try:
-            pygame.mixer.music.unload()
-        except AttributeError:
-            # unload not supported in pygame versions < 2.0, do nothing
-            pass
+def speaker_for_turn():
+    # Streamed sentences are spoken from worker threads, which do not know the current turn
+    return turn_speaker() if turn_speaker is not None else speak
 
-        # Small delay to ensure OS releases file lock
-        time.sleep(0.1)
-
-        os.remove("temp_voice.mp3")
+def play_speech(text, on_start=None):
+    """Synthesize and play text, blocking until playback finishes or is stopped."""
+    lang = detect_speech_lang(text)
+    try:
+        # Synthesized audio comes from the TTS cache when this phrase was rendered before
+        with tracing.span("tts", lang=lang):
+            audio, _ = tts.get_service().render(text, lang)
+        # Played straight from memory; returns when the completion event fires
+        with tracing.span("playback"):
+            get_player().play_bytes(audio, on_start=on_start)
     except Exception as e:
         print(f"Speech error: {e}")
 
 # ----------- VOICE COMMAND LISTENING ------------------
-def command():
-    r = sr.Recognizer()
-    with sr.Microphone() as source:
-        r.adjust_for_ambient_noise(source, duration=0.5)
-        print("Listening...", end="", flush=True)
-        audio = r.listen(source, phrase_time_limit=10)
+last_audio = None  # AudioData of the most recent utterance, kept for voice authentication
+
+# Commands that are safe to run from a partial hypothesis (streaming ASR only)
+SIMPLE_COMMANDS = [
+    "volume up", "volume down", "mute", "screenshot",
+    "scroll up", "scroll down", "click mouse", "double click",
+]
+
+_streaming_session = None
+
+# Enrolled "hey nova" templates for the on-device wake-word detector (see wakeword.py).
+# When present, only speech that follows the wake word is sent to recognition.
+WAKE_TEMPLATES_FILE = os.path.join("memory", "wake_templates.npz")
+wake_detector = None
+on_wake_word = None  # Set by the runtime to barge in on the current reply
+
+def load_wake_detector():
+    global wake_detector
+    if wake_detector is None and os.path.exists(WAKE_TEMPLATES_FILE):
+        try:
+            wake_detector = wakeword.WakeWordDetector(wakeword.load_templates(WAKE_TEMPLATES_FILE))
+        except Exception as e:
+            print(f"Wake-word detector unavailable: {e}")
+    return wake_detector
+
+def _wake_heard():
+    if on_wake_word is not None:
+        on_wake_word()
+
+def wake_gated():
+    return wake_detector is not None and not asr.get_backend().supports_streaming
+
+def early_commands():
+    return (SIMPLE_COMMANDS
+            + [f"open {app}" for app in APP_OPEN_MAP]
+            + [f"close {app}" for app in APP_CLOSE_MAP])
+
+def listen():
+    global _streaming_session
+    print("Listening...", end="", flush=True)
+    backend = asr.get_backend()
+    if backend.supports_streaming:
+        # Local engine: recognizes while the user talks and may return early on a known command
+        if _streaming_session is None:
+            _streaming_session = asr.StreamingSession(backend, matcher=asr.EarlyCommandMatcher(early_commands()))
+        with tracing.span("capture"):
+            return _streaming_session.next_utterance()
+    # The microphone stays open and is calibrated once; phrases arrive through a queue
+    session = capture.get_session(wake_detector=load_wake_detector(), on_wake=_wake_heard)
+    with tracing.span("capture"):
+        return session.listen()
+
+def recognize(audio):
+    # Only wake phrases are checked against the owner's voice (see dispatch_turn). Behind the
+    # wake-word gate every phrase is one, so its check runs alongside recognition
+    gated = wake_gated()
+    if audio is not None and gated:
+        start_verification(audio)
     try:
         print("\rRecognize...           ", end="", flush=True)
-        query = r.recognize_google(audio, language="en-in")
+        if isinstance(audio, asr.RecognizedAudio):
+            query = audio.text  # already transcribed by the streaming engine
+        else:
+            with tracing.span("asr"):
+                query = asr.get_backend().recognize(audio)
+        if not query:
+            raise ValueError("nothing recognized")
         print(f"User said : {query}\n")
     except Exception:
         print("Say that again please")
         return None
+    if audio is not None and not gated and any(wake in query.lower() for wake in WAKE_WORDS):
+        start_verification(audio)
     return query
 
+def command():
+    global last_audio
+    last_audio = listen()
+    return recognize(last_audio)
+
 # ----------- EMOTION-AWARE AI CHAT USING BERT & OLLAMA LLAMA3 -----------
+# Role-separated history within a token budget, trimmed so Ollama can reuse its cached prefix
+prompt_builder = PromptBuilder(SYSTEM_PROMPT)
+
+# Every exchange and preference, embedded into an on-disk vector index (see longterm.py)
+long_term_memory = longterm.get_memory()
+
+# Replies to repeated open-ended questions; semantic matching starts once the embedder is warm
+reply_cache = ReplyCache(embedder_loader=models.resource("embedder").get,
+                         embedder_ready=lambda: models.is_loaded("embedder"))
+tracing.add_collector(reply_cache.prometheus_lines)
+
+# Set by the runtime: returns True once the user barges in on the current reply
+reply_cancelled = None
+
+MOOD_PREFIXES = {
+    "Sad": "Oh Moorthy, you seem a little down. I'm here for you. ",
+    "Happy": "That's great, Moorthy! 😊 ",
+    "Angry": "Sounds frustrating! Tell me more. ",
+    "Neutral": "I'm here to help, Moorthy. ",
+}
+
+# Sentiment, mood logging and prompt building run here while the LLM request is made
+reply_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="reply")
+
+def record_mood(mood):
+    # Log mood persistently
+    with tracing.span("memory", op="log_mood"):
+        log_mood(mood)
+
+def start_mood_prefix(user_message, path=None):
+    """Score the mood on the reply pool; the Future resolves to the spoken prefix, the mood is logged after."""
+    def run():
+        mood = analyze_mood_with_bert(user_message)
+        log = record_mood if path is None else path.task("mood log", record_mood)
+        reply_pool.submit(tracing.wrap(log), mood)
+        return MOOD_PREFIXES.get(mood, "")
+
+    task = run if path is None else path.task("sentiment", run)
+    return reply_pool.submit(tracing.wrap(task))
+
+def mood_prefix(future):
+    # The reply is already complete; a failed sentiment task only loses its prefix
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"[assistant.py] No mood prefix: {e!r}")
+        return ""
+
+def start_chat_messages(user_message, path=None):
+    task = build_chat_messages if path is None else path.task("prompt", build_chat_messages)
+    return reply_pool.submit(tracing.wrap(task), user_message)
+
+def recall_memories(user_message, history):
+    # Older exchanges and preferences related to this message (skipped until the embedder has warmed up)
+    if not models.is_loaded("embedder"):
+        return []
+    with tracing.span("recall") as span:
+        memories = long_term_memory.recall(user_message, exclude=[longterm.exchange_text(t) for t in history])
+        span.set(found=len(memories))
+    return [memory.text for memory in memories]
+
+def build_chat_messages(user_message):
+    # System prompt, then earlier turns as user/assistant messages, then this message
+    history = load_context()
+    return prompt_builder.messages(history, user_message, recall_memories(user_message, history))
+
+def remember_exchange(user_message, ai_response):
+    with tracing.span("memory", op="add_exchange"):
+        add_exchange(user_message, ai_response)
+    # Embedded into long-term memory on a background thread
+    long_term_memory.remember_exchange(user_message, ai_response)
+
+def cached_reply(user_message):
+    with tracing.span("reply_cache") as span:
+        hit = reply_cache.get(user_message)
+        span.set(hit=hit.kind if hit else None)
+    return hit
+
+def speak_cached_reply(user_message, hit):
+    """Answer from the reply cache: sentiment still sets the prefix, llama3 is not called."""
+    prefix = mood_prefix(start_mood_prefix(user_message))
+    if prefix.strip():
+        speak(prefix.strip())
+    speak(hit.response)
+    print(f"[timing] reply cache {hit.kind} hit ({hit.score:.2f}), "
+          f"~{hit.saved_seconds * 1000:.0f}ms of generation saved")
+    remember_exchange(user_message, hit.response)
+    return prefix + hit.response
+
 def ai_friendly_reply(user_message):
     try:
-        main_mood = analyze_mood_with_bert(user_message)
-
-        # Log mood persistently
-        log_mood(main_mood)
-
-        prefix_map = {
-            "Sad": "Oh Moorthy, you seem a little down. I'm here for you. ",
-            "Happy": "That's great, Moorthy! 😊 ",
-            "Angry": "Sounds frustrating! Tell me more. ",
-            "Neutral": "I'm here to help, Moorthy. ",
-        }
-        prefix = prefix_map.get(main_mood, "")
-
-        # Get recent chat context
-        context_str = get_formatted_context()
-
-        # Compose full prompt string for Llama 3
-        full_prompt = context_str + f"\nUser: {user_message}\nNova:"
-
-        response = chat(
-            model="llama3",
-            messages=[
-                {"role": "system", "content": "You are a friendly, helpful AI assistant named Nova."},
-                {"role": "user", "content": full_prompt},
-            ],
-        )
+        hit = cached_reply(user_message)
+        if hit is not None:
+            prefix = mood_prefix(start_mood_prefix(user_message))
+            remember_exchange(user_message, hit.response)
+            return prefix + hit.response
+
+        # Sentiment runs alongside the LLM call; the prefix is only needed at the end
+        prefix = start_mood_prefix(user_message)
+        messages = start_chat_messages(user_message).result()
+
+        llm_start = time.perf_counter()
+        with tracing.span("llm"):
+            response = chat(model="llama3", messages=messages, **prompt_builder.chat_options())
         ai_response = response["message"]["content"]
+        reply_cache.put(user_message, ai_response, time.perf_counter() - llm_start)
 
-        # Update chat context history
-        add_exchange(user_message, ai_response)
+        # Update chat context history and long-term memory
+        remember_exchange(user_message, ai_response)
 
-        return prefix + ai_response
+        return mood_prefix(prefix) + ai_response
     except Exception as e:
         return f"Sorry, I had trouble responding: {e}"
 
+def ai_friendly_reply_streaming(user_message):
+    """Like ai_friendly_reply, but speaks the reply sentence by sentence while llama3 generates it."""
+    try:
+        hit = cached_reply(user_message)
+        if hit is not None:
+            return speak_cached_reply(user_message, hit)
+
+        # The mood prefix is spoken as soon as sentiment is known, while llama3 is still generating
+        path = CriticalPath()
+        prefix = start_mood_prefix(user_message, path)
+        messages = start_chat_messages(user_message, path).result()
+        llm_start = time.perf_counter()
+        with tracing.span("llm", streaming=True):
+            ai_response, timings = stream_reply(
+                messages, speaker_for_turn(), chat_fn=chat, model="llama3", lead_in=prefix,
+                cancelled=reply_cancelled, **prompt_builder.chat_options(),
+            )
+        print(f"[timing] {format_timings(timings)}")
+        print(f"[timing] {path.format(llm_start, timings['first_token'])}")
+        # A reply cut short by barge-in is neither cached nor remembered, so later prompts
+        # do not reuse a half sentence as Nova's answer
+        if not (reply_cancelled is not None and reply_cancelled()):
+            reply_cache.put(user_message, ai_response, timings["generation"] or 0.0)
+            # Update chat context history and long-term memory
+            remember_exchange(user_message, ai_response)
+
+        return mood_prefix(prefix) + ai_response
+    except Exception as e:
+        apology = f"Sorry, I had trouble responding: {e}"
+        speak(apology)
+        return apology
+
 # ----------- SYSTEM AND SOCIAL APP CONTROL --------------
-chrome_path = r"C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe"
 webbrowser.register("chrome", None, webbrowser.BackgroundBrowser(chrome_path))
 
 def social_media(command):
@@ -201,74 +383,49 @@ def social_media(command):
     else:
         speak("No result found")
 
-# For better maintainability, use dictionaries for app open/close commands
-
-APP_OPEN_MAP = {
-    "chrome": (f'"{chrome_path}"', "Opening Google Chrome"),
-    "youtube": (r"C:\Users\Moorthy\OneDrive\Desktop\YouTube.lnk", "Opening YouTube Shortcut"),
-    "calculator": ("start calc", "Opening Calculator"),
-    "notepad": ("start notepad", "Opening Notepad"),
-    "paint": ("start mspaint", "Opening Paint"),
-    "camera": ("start microsoft.windows.camera:", "Opening Camera"),
-    "explorer": ("start explorer", "Opening File Explorer"),
-    "settings": ("start ms-settings:", "Opening Settings"),
-    "vlc": (r'"C:\\Program Files\\VideoLAN\\VLC\\vlc.exe"', "Opening VLC Media Player"),
-    "spotify": ("start spotify", "Opening Spotify"),
-    "vs code": ("code", "Opening Visual Studio Code"),
-    "visual studio code": ("code", "Opening Visual Studio Code"),
-    "word": ("start winword", "Opening Microsoft Word"),
-    "excel": ("start excel", "Opening Microsoft Excel"),
-    "powerpoint": ("start powerpnt", "Opening Microsoft PowerPoint"),
-    "task manager": ("start taskmgr", "Opening Task Manager"),
-    "control panel": ("start control", "Opening Control Panel"),
-}
-
-def open_any_app(command):
-    cmd_lower = command.lower()
-    for key, (cmd, msg) in APP_OPEN_MAP.items():
-        if key in cmd_lower:
-            speak(msg)
-            os.system(cmd)
+# App open/close commands live in commands.APP_OPEN_MAP / APP_CLOSE_MAP;
+# the intent router resolves which app was asked for and procman.py runs it
+process_manager = procman.get_manager()
+
+def _report_app_failure(action, app):
+    def done(future):
+        if future.exception() is not None:
+            print(f"Failed to {action} {app}: {future.exception()}")
+    return done
+
+def open_any_app(app):
+    if app not in APP_OPEN_MAP or not process_manager.supports(app):
+        speak("Application not recognized")
+        return
+    speak(APP_OPEN_MAP[app])
+    # Returns as soon as the launch is queued; the app starts while Luma keeps listening
+    process_manager.open(app).add_done_callback(_report_app_failure("open", app))
+
+def close_any_app(app):
+    if app not in APP_CLOSE_MAP or not process_manager.supports(app):
+        speak("App not recognized or not running.")
+        return
+    # Explorer is restarted rather than closed, so it need not be running
+    if process_manager.restarts(app):
+        speak(APP_CLOSE_MAP[app])
+        process_manager.close(app).add_done_callback(_report_app_failure("close", app))
+        return
+    # The is-it-running check scans the process table on the worker; the reply follows from there
+    speak_turn = speaker_for_turn()
+
+    def checked(future):
+        if future.exception() is not None or not future.result():
+            speak_turn("App not recognized or not running.")
             return
-    speak("Application not recognized")
-
-APP_CLOSE_MAP = {
-    "calculator": ("taskkill /f /im CalculatorApp.exe", "Closing Calculator"),
-    "notepad": ("taskkill /f /im notepad.exe", "Closing Notepad"),
-    "paint": ("taskkill /f /im mspaint.exe", "Closing Paint"),
-    "camera": ("taskkill /f /im WindowsCamera.exe", "Closing Camera"),
-    "chrome": ("taskkill /f /im chrome.exe", "Closing Chrome"),
-    "youtube": ("taskkill /f /im chrome.exe", "Closing YouTube"),
-    "vlc": ("taskkill /f /im vlc.exe", "Closing VLC"),
-    "spotify": ("taskkill /f /im spotify.exe", "Closing Spotify"),
-    "vs code": ("taskkill /f /im Code.exe", "Closing Visual Studio Code"),
-    "visual studio code": ("taskkill /f /im Code.exe", "Closing Visual Studio Code"),
-    "word": ("taskkill /f /im winword.exe", "Closing Word"),
-    "excel": ("taskkill /f /im excel.exe", "Closing Excel"),
-    "powerpoint": ("taskkill /f /im powerpnt.exe", "Closing PowerPoint"),
-    "task manager": ("taskkill /f /im taskmgr.exe", "Closing Task Manager"),
-    # For explorer, restart explorer.exe instead of closing completely
-    "explorer": (None, "Restarting Explorer"),
-    "file explorer": (None, "Restarting Explorer"),
-    "settings": ("taskkill /f /im SystemSettings.exe", "Closing Settings"),
-    "control panel": ("taskkill /f /im control.exe", "Closing Control Panel"),
-}
+        speak_turn(APP_CLOSE_MAP[app])
+        process_manager.close(app).add_done_callback(_report_app_failure("close", app))
 
-def close_any_app(command):
-    cmd_lower = command.lower()
-    for key, (cmd, msg) in APP_CLOSE_MAP.items():
-        if key in cmd_lower:
-            speak(msg)
-            try:
-                if key in ["explorer", "file explorer"]:
-                    os.system("taskkill /f /im explorer.exe")
-                    os.system("start explorer.exe")
-                elif cmd is not None:
-                    os.system(cmd)
-            except Exception as e:
-                speak(f"Failed to close {key}: {e}")
-            return
-    speak("App not recognized or not running.")
+    process_manager.lookup(app).add_done_callback(checked)
+
+# -------------- MOOD SUMMARY ----------------
+def mood_summary(query):
+    # "how was my mood today" / "... this month"; a week by default
+    speak(mood_stats().summary(period_days(query)))
 
 # -------------- SCHEDULE ----------------
 def week_day():
@@ -317,75 +474,169 @@ def wish():
     print(msg)
     speak(msg)
 
+# --------- PHRASE PRE-RENDERING -----------
+WAKE_GREETINGS = [
+    "Hey Moorthy, your friend Nova here! What’s up?",
+    "Yes Moorthy, what’s on your mind?",
+    "I’m all ears, friend! How can I help?",
+]
+
+FAREWELLS = [
+    "Goodbye Moorthy! I’ll always be here for you.",
+    "Catch you later, Moorthy. Stay awesome!",
+    "See you soon, friend!",
+]
+
+# Fixed replies of the system-control commands
+COMMAND_PHRASES = [
+    "Volume increased, Moorthy!",
+    "Volume decreased.",
+    "Volume muted.",
+    "Screenshot taken!",
+    "Scrolling down ⬇️",
+    "Scrolling up ⬆️",
+    "Mouse clicked 🖱️",
+    "Double clicked!",
+    "Application not recognized",
+    "App not recognized or not running.",
+    "Opening Facebook",
+    "Opening Instagram",
+    "Opening WhatsApp",
+    "Opening Discord",
+    "Opening ChatGPT",
+    "No result found",
+]
+
+def common_phrases():
+    """Every fixed phrase the assistant speaks, for TTS pre-rendering."""
+    phrases = list(APP_OPEN_MAP.values()) + list(APP_CLOSE_MAP.values())
+    phrases += WAKE_GREETINGS + FAREWELLS + COMMAND_PHRASES
+    return list(dict.fromkeys(phrases))
+
+def prerender_phrases(background=True):
+    return tts.get_service().prerender(
+        ((phrase, detect_speech_lang(phrase)) for phrase in common_phrases()), background=background
+    )
+
+# -------------- COMMAND DISPATCH ----------------
+WAKE_WORDS = ["hey nova", "ok nova", "nova"]
+
+def press_key(key, message):
+    pyautogui.press(key)
+    speak(message)
+
+def take_screenshot():
+    pyautogui.screenshot("screenshot.png")
+    speak("Screenshot taken!")
+
+def scroll(amount, message):
+    pyautogui.scroll(amount)
+    speak(message)
+
+def click_mouse(double=False):
+    if double:
+        pyautogui.doubleClick()
+        speak("Double clicked!")
+    else:
+        pyautogui.click()
+        speak("Mouse clicked 🖱️")
+
+def say_goodbye():
+    speak(random.choice(FAREWELLS))
+    return False
+
+# Intent name -> handler(query, match); a handler returns False to end the session
+INTENT_HANDLERS = {
+    "social_media": lambda query, match: social_media(query),
+    "schedule": lambda query, match: schedule(),
+    "volume_up": lambda query, match: press_key("volumeup", "Volume increased, Moorthy!"),
+    "volume_down": lambda query, match: press_key("volumedown", "Volume decreased."),
+    "mute": lambda query, match: press_key("volumemute", "Volume muted."),
+    "screenshot": lambda query, match: take_screenshot(),
+    "scroll_down": lambda query, match: scroll(-500, "Scrolling down ⬇️"),
+    "scroll_up": lambda query, match: scroll(500, "Scrolling up ⬆️"),
+    "click": lambda query, match: click_mouse(),
+    "double_click": lambda query, match: click_mouse(double=True),
+    "open_app": lambda query, match: open_any_app(match.slots.get("app")),
+    "close_app": lambda query, match: close_any_app(match.slots.get("running_app")),
+    "mood_summary": lambda query, match: mood_summary(query),
+    "exit": lambda query, match: say_goodbye(),
+}
+
+# Every command phrase compiled into one automaton (see intents.py); the NLTK
+# lemmatizer is only loaded when a query needs the lemmatized fallback
+router = build_router(lemmatizer_loader=models.resource("nltk").get)
+for _name, _handler in INTENT_HANDLERS.items():
+    router.intents[_name].handler = _handler
+
+def chat_reply(query):
+    # Open-ended AI chat with multi-turn context, spoken while it streams
+    response = ai_friendly_reply_streaming(query)
+    print(f"Luma: {response}")
+
+def handle_query(query):
+    """Route one recognized command. Returns False when the user says goodbye."""
+    query = query.lower()
+    with tracing.span("intent") as span:
+        match = router.route(query)
+        span.set(intent=match.name if match else None)
+    if match is None or match.intent.handler is None:
+        chat_reply(query)
+        return True
+    with tracing.span(f"command.{match.name}"):
+        return match.intent.handler(query, match) is not False
+
+def strip_wake_words(query):
+    for wake in WAKE_WORDS:  # longest first
+        query = re.sub(r"\b" + re.escape(wake) + r"\b", " ", query, flags=re.IGNORECASE)
+    return " ".join(query.split())
+
+def dispatch_turn(query, audio=None):
+    """Runtime entry point: a wake phrase gets a greeting, anything else is a command."""
+    if wake_gated():
+        # The detector already heard the wake word; this phrase is the command after it
+        if audio is not None:
+            check_wake_audio(audio)
+        query = strip_wake_words(query)
+        if not query:
+            speak(random.choice(WAKE_GREETINGS))
+            return True
+        return handle_query(query)
+    if any(wake in query.lower() for wake in WAKE_WORDS):
+        if audio is not None:
+            check_wake_audio(audio)
+        speak(random.choice(WAKE_GREETINGS))
+        return True
+    return handle_query(query)
+
 # -------------- MAIN LOOP ----------------
 if __name__ == "__main__":
+    from runtime import AssistantRuntime
+
+    # LUMA_TRACE=1 records stage timings; LUMA_METRICS_PORT / LUMA_METRICS_FILE export them
+    tracing.configure()
+    prerender_phrases()
     wish()
-    while True:
-        query = command()
-        if query is None:
-            continue
-        query = query.lower()
-
-        # Wake word detection
-        if any(wake in query for wake in ["hey nova", "ok nova", "nova"]):
-            greet = random.choice(
-                [
-                    "Hey Moorthy, your friend Nova here! What’s up?",
-                    "Yes Moorthy, what’s on your mind?",
-                    "I’m all ears, friend! How can I help?",
-                ]
-            )
-            speak(greet)
-            query = command()
-            if query is None:
-                continue
-            query = query.lower()
-
-        # System controls and social media commands handling
-        if any(x in query for x in ["facebook", "discord", "whatsapp", "instagram", "chatgpt", "youtube"]):
-            social_media(query)
-        elif "university time table" in query or "schedule" in query:
-            schedule()
-        elif "volume up" in query:
-            pyautogui.press("volumeup")
-            speak("Volume increased, Moorthy!")
-        elif "volume down" in query:
-            pyautogui.press("volumedown")
-            speak("Volume decreased.")
-        elif "mute" in query:
-            pyautogui.press("volumemute")
-            speak("Volume muted.")
-        elif "screenshot" in query:
-            pyautogui.screenshot("screenshot.png")
-            speak("Screenshot taken!")
-        elif "scroll down" in query:
-            pyautogui.scroll(-500)
-            speak("Scrolling down ⬇️")
-        elif "scroll up" in query:
-            pyautogui.scroll(500)
-            speak("Scrolling up ⬆️")
-        elif "click mouse" in query:
-            pyautogui.click()
-            speak("Mouse clicked 🖱️")
-        elif "double click" in query:
-            pyautogui.doubleClick()
-            speak("Double clicked!")
-        elif "open" in query:
-            open_any_app(query)
-        elif "close" in query:
-            close_any_app(query)
-        elif "exit" in query or "bye" in query or "goodbye" in query:
-            farewell = random.choice(
-                [
-                    "Goodbye Moorthy! I’ll always be here for you.",
-                    "Catch you later, Moorthy. Stay awesome!",
-                    "See you soon, friend!",
-                ]
-            )
-            speak(farewell)
-            sys.exit()
-        else:
-            # Open-ended AI chat with multi-turn context
-            response = ai_friendly_reply(query)
-            print(f"Luma: {response}")
-            speak(response)
+    models.warm_up(WARMUP_RESOURCES)
+    process_manager.warm_up()
+    # Trim an oversized mood log and index moods logged since the last run, so a mood summary does not wait
+    maintain_mood_log(background=True)
+    # Preferences and recent turns missing from long-term memory are embedded in the background
+    long_term_memory.sync(load_user_prefs(), load_context())
+
+    runtime = AssistantRuntime(
+        capture=listen,
+        recognize=recognize,
+        dispatch=dispatch_turn,
+        play=play_speech,
+        stop_audio=get_player().stop,
+        wake_words=WAKE_WORDS,
+    )
+    speech_output = runtime.say
+    turn_speaker = runtime.turn_speaker
+    reply_cancelled = runtime.turn_cancelled
+    on_wake_word = runtime.interrupt
+    # LUMA_PROFILE=<dir> dumps a cProfile of the whole session on exit
+    with tracing.profile("session"):
+        runtime.run()
+    sys.exit()
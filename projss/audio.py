@@ -0,0 +1,126 @@
+# audio.py
+import io
+import threading
+import wave
+from typing import Callable, Optional
+
+import numpy as np
+
+import models
+
+# In-memory audio playback: synthesized audio goes straight from bytes / NumPy
+# buffers to the mixer, and completion is signalled by an event instead of polling.
+
+
+def array_to_wav_bytes(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Encode mono float (-1..1) or int16 samples as 16-bit PCM WAV bytes."""
+    samples = np.asarray(samples)
+    if samples.dtype != np.int16:
+        samples = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.reshape(-1).tobytes())
+    return buffer.getvalue()
+
+
+def audio_data_to_array(audio_data, sample_rate: int = 16000) -> np.ndarray:
+    """Convert a speech_recognition AudioData to mono float32 samples at sample_rate."""
+    raw = audio_data.get_raw_data(convert_rate=sample_rate, convert_width=2)
+    return np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+class Playback:
+    """Handle for one playing sound; `done` is set when it finishes or is stopped."""
+
+    def __init__(self, channel, length: float, on_complete: Optional[Callable[[], None]] = None):
+        self.channel = channel
+        self.length = length
+        self.done = threading.Event()
+        self.stopped = False
+        self._on_complete = on_complete
+        self._timer = threading.Timer(length, self._finish)
+        self._timer.daemon = True
+
+    def _start(self) -> None:
+        self._timer.start()
+
+    def _finish(self) -> None:
+        if self.done.is_set():
+            return
+        self.done.set()
+        if self._on_complete is not None:
+            try:
+                self._on_complete()
+            except Exception as e:
+                print(f"[audio.py] Completion callback failed: {e}")
+
+    def stop(self) -> None:
+        """Stop playback now (used for barge-in)."""
+        self.stopped = True
+        self._timer.cancel()
+        if self.channel is not None:
+            self.channel.stop()
+        self._finish()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+
+class AudioPlayer:
+    """Plays encoded audio bytes or NumPy buffers through the pygame mixer without temp files."""
+
+    def __init__(self, mixer_loader: Optional[Callable[[], object]] = None):
+        self._mixer_loader = mixer_loader or models.resource("mixer").get
+        self._lock = threading.Lock()
+        self.current: Optional[Playback] = None
+
+    def play_bytes(self, data: bytes, on_start: Optional[Callable[[], None]] = None,
+                   on_complete: Optional[Callable[[], None]] = None,
+                   block: bool = True) -> Playback:
+        """
+        Decode and play audio held in memory (MP3 or WAV; the mixer detects which).
+
+        :param block: Wait for playback to finish before returning.
+        """
+        mixer = self._mixer_loader()
+        sound = mixer.Sound(file=io.BytesIO(data))
+        with self._lock:
+            if self.current is not None:
+                self.current.stop()
+            channel = sound.play()
+            playback = Playback(channel, sound.get_length(), on_complete)
+            self.current = playback
+            playback._start()
+        if on_start is not None:
+            on_start()
+        if block:
+            playback.wait()
+        return playback
+
+    def play_array(self, samples: np.ndarray, sample_rate: int, **kwargs) -> Playback:
+        """Play mono NumPy samples (float -1..1 or int16)."""
+        return self.play_bytes(array_to_wav_bytes(samples, sample_rate), **kwargs)
+
+    def stop(self) -> None:
+        with self._lock:
+            if self.current is not None:
+                self.current.stop()
+                self.current = None
+
+    def is_playing(self) -> bool:
+        playback = self.current
+        return playback is not None and not playback.done.is_set()
+
+
+_player: Optional[AudioPlayer] = None
+
+
+def get_player() -> AudioPlayer:
+    """Return the shared audio player."""
+    global _player
+    if _player is None:
+        _player = AudioPlayer()
+    return _player
@@ -1,52 +1,282 @@
+import glob
+import hashlib
+import json
 import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
 import numpy as np
-from resemblyzer import VoiceEncoder, preprocess_wav
+
+from storage import atomic_write_json
+
+DEFAULT_SPEAKER = "owner"
+DEFAULT_THRESHOLD = 0.75
+THRESHOLD_FILE = os.path.join("memory", "voice_threshold.json")  # Written by auth_eval.py --save-threshold
+EMBEDDING_CACHE_NAME = "voice_embeddings"  # <name>.npy matrix + <name>.json row metadata
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_threshold(path: str = THRESHOLD_FILE, default: float = DEFAULT_THRESHOLD) -> float:
+    """Calibrated acceptance threshold, or default when none was saved."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return float(json.load(f)["threshold"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return default
+
+
+def save_threshold(threshold: float, path: str = THRESHOLD_FILE) -> None:
+    atomic_write_json({"threshold": threshold}, path)
+    print(f"[auth.py] Saved threshold {threshold:.4f} to {path}")
+
+
+def enrollments_from_dir(root: str) -> Dict[str, List[str]]:
+    """Enrollment samples laid out as <root>/<speaker>/*.wav."""
+    enrollments = {}
+    if os.path.isdir(root):
+        for speaker in sorted(os.listdir(root)):
+            paths = sorted(glob.glob(os.path.join(root, speaker, "*.wav")))
+            if paths:
+                enrollments[speaker] = paths
+    return enrollments
+
+
+class SpeakerMatch:
+    """Best-matching enrolled speaker for a clip."""
+
+    def __init__(self, speaker: Optional[str], score: float, accepted: bool, scores: Dict[str, float]):
+        self.speaker = speaker
+        self.score = score
+        self.accepted = accepted
+        self.scores = scores  # best cosine similarity per enrolled speaker
+
+    def __bool__(self):
+        return self.accepted
+
+    def __repr__(self):
+        return f"SpeakerMatch({self.speaker!r}, {self.score:.4f}, accepted={self.accepted})"
+
+
+class EmbeddingIndex:
+    """
+    Enrollment embeddings as one pre-normalized (n, d) float32 matrix, rows grouped by speaker.
+
+    The matrix is cached as a memory-mapped .npy file with a JSON sidecar listing
+    each row's speaker, audio path and audio hash; a row is only re-embedded when
+    its audio file changed.
+    """
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path  # without extension
+        self.speakers: List[str] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._starts = np.zeros(0, dtype=np.intp)  # first row of each speaker, for reduceat
+        self.embedded = 0  # rows computed (rather than loaded) on the last build
+
+    @property
+    def npy_path(self) -> str:
+        return self.cache_path + ".npy"
+
+    @property
+    def meta_path(self) -> str:
+        return self.cache_path + ".json"
+
+    def _load_cache(self) -> Tuple[List[Dict[str, str]], Dict[Tuple[str, str], np.ndarray]]:
+        """Cached row metadata, and (path, hash) -> row for every row of a readable cache."""
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                rows = json.load(f)["rows"]
+            matrix = np.load(self.npy_path, mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            return [], {}
+        if len(rows) != len(matrix):
+            return [], {}
+        return rows, {(row["path"], row["sha256"]): matrix[i] for i, row in enumerate(rows)}
+
+    def _save_cache(self, rows: List[Dict[str, str]], matrix: np.ndarray) -> None:
+        directory = os.path.dirname(os.path.abspath(self.npy_path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".npy", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, matrix)
+            os.replace(tmp_path, self.npy_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        atomic_write_json({"rows": rows}, self.meta_path)
+
+    def build(self, enrollments: Dict[str, List[str]], embed: Callable[[str], np.ndarray]) -> None:
+        """Load cached rows for unchanged audio and embed the rest; rewrites the cache if anything changed."""
+        cached_rows, cached = self._load_cache()
+        rows, vectors = [], []
+        self.embedded = 0
+        for speaker, paths in enrollments.items():
+            for path in paths:
+                digest = file_hash(path)
+                vector = cached.get((os.path.abspath(path), digest))
+                if vector is None:
+                    vector = embed(path)
+                    self.embedded += 1
+                vector = np.asarray(vector, dtype=np.float32)
+                vectors.append(vector / (np.linalg.norm(vector) + 1e-12))
+                rows.append({"speaker": speaker, "path": os.path.abspath(path), "sha256": digest})
+        matrix = np.stack(vectors).astype(np.float32) if vectors else np.zeros((0, 0), dtype=np.float32)
+        if rows != cached_rows:
+            self._save_cache(rows, matrix)
+        elif rows:
+            # Cache is current: score straight from the memory-mapped file
+            matrix = np.load(self.npy_path, mmap_mode="r")
+        self.matrix = matrix
+        self.speakers = list(dict.fromkeys(row["speaker"] for row in rows))
+        labels = [row["speaker"] for row in rows]
+        self._starts = np.array([labels.index(s) for s in self.speakers], dtype=np.intp)
+
+    def scores(self, embedding: np.ndarray) -> Dict[str, float]:
+        """Best cosine similarity per speaker: one matrix-vector product over all rows."""
+        if not self.speakers:
+            return {}
+        embedding = np.asarray(embedding, dtype=np.float32)
+        embedding = embedding / (np.linalg.norm(embedding) + 1e-12)
+        similarities = self.matrix @ embedding
+        best = np.maximum.reduceat(similarities, self._starts)
+        return {speaker: float(score) for speaker, score in zip(self.speakers, best)}
+
 
 class VoiceAuthenticator:
-    def __init__(self, reference_audio_path: str, threshold: float = 0.75):
+    def __init__(self, reference_audio_path: Optional[str] = None, threshold: float = DEFAULT_THRESHOLD,
+                 encoder_loader: Optional[Callable[[], Any]] = None,
+                 enrollments: Optional[Dict[str, List[str]]] = None,
+                 cache_path: Optional[str] = None):
         """
-        Initialize with a voice sample and similarity threshold.
+        Initialize with enrolled voice samples and a similarity threshold.
+        The encoder is only loaded when something needs embedding; enrollment
+        embeddings come from the on-disk cache while their audio is unchanged.
 
-        :param reference_audio_path: Path to WAV file of your enrolled voice.
+        :param reference_audio_path: Path to WAV file of your enrolled voice (speaker DEFAULT_SPEAKER).
         :param threshold: Cosine similarity threshold (default 0.75) to accept a voice as yours.
+        :param encoder_loader: Optional callable returning a shared VoiceEncoder.
+        :param enrollments: More samples, as {speaker: [wav paths]}.
+        :param cache_path: Embedding cache path without extension (default: next to the reference audio).
         """
-        if not os.path.exists(reference_audio_path):
-            raise FileNotFoundError(f"Reference audio file not found: {reference_audio_path}")
-        
+        self.enrollments: Dict[str, List[str]] = {}
+        if reference_audio_path is not None:
+            self.enrollments[DEFAULT_SPEAKER] = [reference_audio_path]
+        for speaker, paths in (enrollments or {}).items():
+            known = self.enrollments.setdefault(speaker, [])
+            for path in paths:
+                if path not in known:
+                    known.append(path)
+        if not self.enrollments:
+            raise ValueError("VoiceAuthenticator needs a reference audio file or enrollments")
+        for paths in self.enrollments.values():
+            for path in paths:
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"Reference audio file not found: {path}")
+
         self.threshold = threshold
-        self.encoder = VoiceEncoder()
-        self.ref_embedding = self._embed_audio(reference_audio_path)
+        self.reference_audio_path = reference_audio_path or next(iter(self.enrollments.values()))[0]
+        if cache_path is None:
+            cache_path = os.path.join(os.path.dirname(os.path.abspath(self.reference_audio_path)),
+                                      EMBEDDING_CACHE_NAME)
+        self.index = EmbeddingIndex(cache_path)
+        self._index_ready = False
+        self._index_lock = threading.Lock()
+        self._encoder_loader = encoder_loader
+        self._encoder = None
 
-    def _embed_audio(self, audio_path: str) -> np.ndarray:
+    @property
+    def encoder(self):
+        if self._encoder is None:
+            if self._encoder_loader is not None:
+                self._encoder = self._encoder_loader()
+            else:
+                from resemblyzer import VoiceEncoder
+                self._encoder = VoiceEncoder()
+        return self._encoder
+
+    def load_index(self) -> EmbeddingIndex:
+        if not self._index_ready:
+            with self._index_lock:
+                if not self._index_ready:
+                    self.index.build(self.enrollments, self._embed_audio)
+                    if self.index.embedded:
+                        print(f"[VoiceAuthenticator] Embedded {self.index.embedded} enrollment sample(s)")
+                    self._index_ready = True
+        return self.index
+
+    def enroll(self, speaker: str, audio_path: str) -> None:
+        """Add a sample for speaker (new or existing); only the new file is embedded."""
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Reference audio file not found: {audio_path}")
+        with self._index_lock:
+            self.enrollments.setdefault(speaker, []).append(audio_path)
+            self._index_ready = False
+        self.load_index()
+
+    @property
+    def ref_embedding(self) -> np.ndarray:
+        """Normalized embedding of the first enrolled sample."""
+        return np.asarray(self.load_index().matrix[0])
+
+    def _embed_audio(self, audio: Union[str, np.ndarray], sample_rate: Optional[int] = None) -> np.ndarray:
         """
-        Process WAV audio and extract embedding vector.
+        Process audio and extract embedding vector.
 
-        :param audio_path: Path to WAV file.
+        :param audio: Path to WAV file, or mono float samples already in memory.
+        :param sample_rate: Sample rate of `audio` when it is an array (default 16000).
         :return: Normalized embedding vector of shape (d,)
         """
-        wav = preprocess_wav(audio_path)
+        from resemblyzer import preprocess_wav
+        if isinstance(audio, np.ndarray):
+            wav = preprocess_wav(audio, source_sr=sample_rate or 16000)
+        else:
+            wav = preprocess_wav(audio)
         return self.encoder.embed_utterance(wav)
 
-    def is_my_voice(self, test_audio_path: str) -> bool:
+    def identify(self, test_audio: Union[str, np.ndarray], sample_rate: Optional[int] = None) -> SpeakerMatch:
         """
-        Check if the test audio matches the enrolled voice.
+        Score test audio against every enrolled sample.
 
-        :param test_audio_path: Path to test WAV file to check.
-        :return: True if similarity >= threshold; False otherwise.
+        :param test_audio: Path to test WAV file, or a NumPy array of mono samples.
+        :param sample_rate: Sample rate of `test_audio` when it is an array.
+        :return: SpeakerMatch with the best speaker and score; accepted if score >= threshold.
         """
-        if not os.path.exists(test_audio_path):
-            print(f"Test audio file not found: {test_audio_path}")
-            return False
+        if isinstance(test_audio, str) and not os.path.exists(test_audio):
+            print(f"Test audio file not found: {test_audio}")
+            return SpeakerMatch(None, 0.0, False, {})
 
         try:
-            test_embedding = self._embed_audio(test_audio_path)
-            # Compute cosine similarity
-            similarity = float(
-                np.dot(self.ref_embedding, test_embedding) /
-                (np.linalg.norm(self.ref_embedding) * np.linalg.norm(test_embedding))
-            )
-            print(f"[VoiceAuthenticator] Cosine similarity: {similarity:.4f} (Threshold: {self.threshold})")
-            return similarity >= self.threshold
+            index = self.load_index()
+            scores = index.scores(self._embed_audio(test_audio, sample_rate))
         except Exception as e:
             print(f"[VoiceAuthenticator] Error during voice verification: {e}")
-            return False
+            return SpeakerMatch(None, 0.0, False, {})
+        speaker = max(scores, key=scores.get)
+        score = scores[speaker]
+        print(f"[VoiceAuthenticator] Best match {speaker}: {score:.4f} (Threshold: {self.threshold})")
+        return SpeakerMatch(speaker, score, score >= self.threshold, scores)
+
+    def is_my_voice(self, test_audio: Union[str, np.ndarray], sample_rate: Optional[int] = None) -> bool:
+        """
+        Check if the test audio is the owner's voice (speaker DEFAULT_SPEAKER).
+
+        Other enrolled speakers (guests under voices/) are not accepted here; use
+        identify() to learn who is speaking.
+
+        :param test_audio: Path to test WAV file, or a NumPy array of mono samples.
+        :param sample_rate: Sample rate of `test_audio` when it is an array.
+        :return: True if the best match is the owner with similarity >= threshold; False otherwise.
+        """
+        match = self.identify(test_audio, sample_rate)
+        return match.accepted and match.speaker == DEFAULT_SPEAKER
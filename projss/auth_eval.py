@@ -0,0 +1,186 @@
+# auth_eval.py
+"""
+Batch evaluation and threshold calibration for voice authentication.
+
+Embeds every WAV under a directory with a process pool, scores all pairs with one
+similarity-matrix product, and reports ROC/DET points, the equal error rate and a
+recommended threshold. Speakers are taken from sub-folders (<dir>/<speaker>/*.wav)
+or, for a flat directory, from the file-name prefix before the first "_" or "-".
+
+Usage: python auth_eval.py DIR [--workers N] [--target-far 0.01] [--output eval.json]
+                              [--save-threshold]
+"""
+import argparse
+import glob
+import os
+import re
+import time
+from statistics import NormalDist
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from auth import THRESHOLD_FILE, save_threshold
+
+_encoder = None
+
+
+# ----------- EMBEDDING -------------------
+
+def _init_worker() -> None:
+    global _encoder
+    from resemblyzer import VoiceEncoder
+
+    _encoder = VoiceEncoder(verbose=False)
+
+
+def _embed_path(path: str) -> np.ndarray:
+    from resemblyzer import preprocess_wav
+
+    if _encoder is None:
+        _init_worker()
+    return _encoder.embed_utterance(preprocess_wav(path)).astype(np.float32)
+
+
+def embed_paths(paths: Sequence[str], workers: Optional[int] = None) -> np.ndarray:
+    """(n, d) normalized embeddings; workers=0 embeds in this process."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 0 or len(paths) < 2:
+        vectors = [_embed_path(p) for p in paths]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            vectors = list(pool.map(_embed_path, paths, chunksize=chunksize))
+    matrix = np.stack(vectors).astype(np.float32)
+    return matrix / (np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12)
+
+
+def labelled_wavs(root: str) -> Tuple[List[str], List[str]]:
+    """WAV paths under root and the speaker label of each."""
+    paths, labels = [], []
+    for path in sorted(glob.glob(os.path.join(root, "**", "*.wav"), recursive=True)):
+        parent = os.path.relpath(os.path.dirname(path), root)
+        if parent != ".":
+            label = parent.split(os.sep)[0]
+        else:
+            label = re.split(r"[_-]", os.path.splitext(os.path.basename(path))[0])[0]
+        paths.append(path)
+        labels.append(label)
+    return paths, labels
+
+
+# ----------- SCORING -------------------
+
+def similarity_matrix(embeddings: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every pair of (normalized) embeddings."""
+    return embeddings @ embeddings.T
+
+
+def pair_scores(similarity: np.ndarray, labels: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """(genuine, impostor) scores over all distinct pairs (upper triangle)."""
+    labels = np.asarray(labels)
+    rows, cols = np.triu_indices(len(labels), k=1)
+    same = labels[rows] == labels[cols]
+    scores = similarity[rows, cols]
+    return scores[same], scores[~same]
+
+
+def roc_points(genuine: np.ndarray, impostor: np.ndarray) -> Dict[str, np.ndarray]:
+    """False accept and false reject rates at every distinct score used as the threshold."""
+    thresholds = np.unique(np.concatenate((genuine, impostor)))
+    genuine, impostor = np.sort(genuine), np.sort(impostor)
+    frr = np.searchsorted(genuine, thresholds, side="left") / max(len(genuine), 1)
+    far = 1.0 - np.searchsorted(impostor, thresholds, side="left") / max(len(impostor), 1)
+    return {"threshold": thresholds, "far": far, "frr": frr}
+
+
+def det_points(roc: Dict[str, np.ndarray], eps: float = 1e-4) -> Dict[str, List[float]]:
+    """ROC rates on the normal-deviate scale used by DET plots."""
+    probit = NormalDist().inv_cdf
+    return {
+        "far": [probit(min(max(v, eps), 1 - eps)) for v in roc["far"]],
+        "frr": [probit(min(max(v, eps), 1 - eps)) for v in roc["frr"]],
+    }
+
+
+def equal_error_rate(roc: Dict[str, np.ndarray]) -> Tuple[float, float]:
+    """(EER, threshold) where false accepts and false rejects are closest."""
+    i = int(np.argmin(np.abs(roc["far"] - roc["frr"])))
+    return float((roc["far"][i] + roc["frr"][i]) / 2), float(roc["threshold"][i])
+
+
+def threshold_for_far(roc: Dict[str, np.ndarray], target_far: float) -> Tuple[float, float, float]:
+    """Lowest threshold whose false-accept rate is at most target_far: (threshold, far, frr)."""
+    ok = np.nonzero(roc["far"] <= target_far)[0]
+    i = int(ok[0]) if len(ok) else len(roc["threshold"]) - 1
+    return float(roc["threshold"][i]), float(roc["far"][i]), float(roc["frr"][i])
+
+
+def evaluate(embeddings: np.ndarray, labels: Sequence[str], target_far: Optional[float] = None) -> Dict:
+    similarity = similarity_matrix(embeddings)
+    genuine, impostor = pair_scores(similarity, labels)
+    if not len(genuine) or not len(impostor):
+        raise ValueError("need at least two clips of one speaker and clips from two speakers")
+    roc = roc_points(genuine, impostor)
+    eer, eer_threshold = equal_error_rate(roc)
+    result = {
+        "clips": len(labels),
+        "speakers": len(set(labels)),
+        "genuine_pairs": int(len(genuine)),
+        "impostor_pairs": int(len(impostor)),
+        "eer": eer,
+        "eer_threshold": eer_threshold,
+        "recommended_threshold": eer_threshold,
+        "roc": {key: values.tolist() for key, values in roc.items()},
+        "det": det_points(roc),
+    }
+    if target_far is not None:
+        threshold, far, frr = threshold_for_far(roc, target_far)
+        result.update({"recommended_threshold": threshold, "target_far": target_far,
+                       "far_at_recommended": far, "frr_at_recommended": frr})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, default=None, help="embedding processes (0: in-process)")
+    parser.add_argument("--target-far", type=float, default=None,
+                        help="recommend the threshold for this false-accept rate instead of the EER point")
+    parser.add_argument("--output", help="write the full results (ROC/DET points) as JSON")
+    parser.add_argument("--save-threshold", action="store_true",
+                        help=f"store the recommended threshold in {THRESHOLD_FILE} for the assistant")
+    args = parser.parse_args()
+
+    paths, labels = labelled_wavs(args.directory)
+    print(f"{len(paths)} clips from {len(set(labels))} speakers")
+    start = time.perf_counter()
+    embeddings = embed_paths(paths, args.workers)
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    result = evaluate(embeddings, labels, args.target_far)
+    result["embed_seconds"] = elapsed
+    result["clips_per_second"] = len(paths) / elapsed if elapsed else 0.0
+    result["scoring_seconds"] = time.perf_counter() - start
+
+    print(f"Embedding: {elapsed:.2f}s ({result['clips_per_second']:.1f} clips/s)")
+    print(f"Scoring {result['genuine_pairs']} genuine / {result['impostor_pairs']} impostor pairs: "
+          f"{result['scoring_seconds'] * 1000:.1f}ms")
+    print(f"EER: {result['eer'] * 100:.2f}% at threshold {result['eer_threshold']:.4f}")
+    if args.target_far is not None:
+        print(f"At FAR <= {args.target_far:.2%}: threshold {result['recommended_threshold']:.4f} "
+              f"(FAR {result['far_at_recommended']:.2%}, FRR {result['frr_at_recommended']:.2%})")
+    print(f"Recommended threshold: {result['recommended_threshold']:.4f}")
+
+    if args.output:
+        from benchutil import write_results
+        write_results(args.output, result)
+    if args.save_threshold:
+        save_threshold(result["recommended_threshold"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# bench_capture.py
+"""
+Capture latency with WAV fixtures played through a simulated microphone.
+
+Compares the old per-turn capture (new Recognizer, adjust_for_ambient_noise(0.5s),
+listen) with the persistent CaptureSession. For each spoken phrase it reports:
+  dead_ms        audio time between "ready for the next phrase" and the mic actually listening
+  eos_to_asr_ms  end of speech -> audio handed to recognition (audio time + queue handoff)
+  clipped        phrases whose start fell inside a calibration window
+Times are measured on the fixture's own clock, so the run is fast and repeatable.
+Opening a new sr.Microphone per turn costs extra on real hardware and is not included,
+so the legacy numbers are a lower bound.
+
+Usage: python bench_capture.py [--gap 1.2] [--repeat 3] [fixture.wav ...]
+"""
+import argparse
+import audioop
+import random
+import time
+import wave
+from array import array
+
+import speech_recognition as sr
+
+from benchutil import print_table, summarize
+from capture import CaptureSession
+
+DEFAULT_FIXTURES = ["temp_test.wav", "temp_auth.wav", "my_voice_sample.wav"]
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+
+def noise(seconds, rms, rng):
+    n = int(seconds * SAMPLE_RATE)
+    return array("h", (int(rng.gauss(0, rms)) for _ in range(n))).tobytes()
+
+
+def speech_bounds(frames, threshold):
+    """(start, end) in seconds of the part of frames louder than threshold."""
+    chunk = SAMPLE_RATE // 50 * SAMPLE_WIDTH  # 20 ms
+    loud = [i for i in range(0, len(frames), chunk) if audioop.rms(frames[i:i + chunk], SAMPLE_WIDTH) > threshold]
+    if not loud:
+        return None
+    return loud[0] / (SAMPLE_RATE * SAMPLE_WIDTH), (loud[-1] + chunk) / (SAMPLE_RATE * SAMPLE_WIDTH)
+
+
+class FixtureSource(sr.AudioSource):
+    """Plays WAV fixtures separated by noise gaps as a 16 kHz mono microphone."""
+
+    def __init__(self, paths, gap_seconds=1.2, noise_rms=15, repeat=1, seed=0):
+        rng = random.Random(seed)
+        self.SAMPLE_RATE = SAMPLE_RATE
+        self.SAMPLE_WIDTH = SAMPLE_WIDTH
+        self.CHUNK = 1024
+        self.stream = None
+        self.segments = []  # (speech_start, speech_end) in seconds
+        parts = [noise(1.5, noise_rms, rng)]
+        offset = 1.5
+        for _ in range(repeat):
+            for path in paths:
+                with wave.open(path, "rb") as w:
+                    assert w.getframerate() == SAMPLE_RATE and w.getsampwidth() == SAMPLE_WIDTH
+                    frames = w.readframes(w.getnframes())
+                    if w.getnchannels() == 2:
+                        frames = audioop.tomono(frames, SAMPLE_WIDTH, 0.5, 0.5)
+                bounds = speech_bounds(frames, threshold=4 * noise_rms)
+                if bounds is not None:
+                    self.segments.append((offset + bounds[0], offset + bounds[1]))
+                parts.append(frames)
+                offset += len(frames) / (SAMPLE_RATE * SAMPLE_WIDTH)
+                parts.append(noise(gap_seconds, noise_rms, rng))
+                offset += gap_seconds
+        self.data = b"".join(parts)
+        self.offset = 0
+
+    @property
+    def position(self):
+        return self.offset / (SAMPLE_RATE * SAMPLE_WIDTH)
+
+    @property
+    def exhausted(self):
+        return self.offset >= len(self.data)
+
+    def __enter__(self):
+        self.stream = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+    def read(self, frames):
+        size = frames * SAMPLE_WIDTH
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += len(chunk)
+        return chunk
+
+    def segment_before(self, position):
+        """The last speech segment that ended before `position`."""
+        done = [seg for seg in self.segments if seg[1] <= position]
+        return done[-1] if done else None
+
+
+def run_legacy(source):
+    dead, eos, clipped = [], [], 0
+    seen = set()
+    with source:
+        while not source.exhausted:
+            ready = source.position
+            r = sr.Recognizer()
+            r.adjust_for_ambient_noise(source, duration=0.5)
+            listening = source.position
+            audio = r.listen(source, phrase_time_limit=10)
+            if source.exhausted and len(audio.frame_data) == 0:
+                break
+            segment = source.segment_before(source.position)
+            if segment is None or segment in seen:
+                continue
+            seen.add(segment)
+            dead.append(listening - ready)
+            eos.append(source.position - segment[1])
+            if ready <= segment[0] < listening:
+                clipped += 1
+    return dead, eos, clipped
+
+
+def run_session(source):
+    # The fixture is read faster than real time, so let the queue hold every phrase
+    session = CaptureSession(source_factory=lambda: source, calibration_seconds=0.5, max_queued=1000)
+    session.start()
+    eos, handoff = [], []
+    seen = set()
+    while True:
+        phrase = session.get(timeout=2.0)
+        if phrase is None:
+            break
+        got = time.perf_counter()
+        segment = source.segment_before(phrase.stream_position)
+        if segment is None or segment in seen:
+            continue
+        seen.add(segment)
+        handoff.append(got - phrase.captured_at)
+        eos.append(phrase.stream_position - segment[1] + (got - phrase.captured_at))
+    session.stop()
+    return [0.0] * len(eos), eos, 0, handoff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixtures", nargs="*", default=DEFAULT_FIXTURES)
+    parser.add_argument("--gap", type=float, default=1.2, help="seconds of background noise between phrases")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = []
+    dead, eos, clipped = run_legacy(FixtureSource(args.fixtures, args.gap, repeat=args.repeat))
+    rows.append({"capture": "per-turn (before)", "phrases": len(eos), "clipped": clipped,
+                 "dead_p50_ms": summarize(dead)["p50_ms"],
+                 "eos_to_asr_p50_ms": summarize(eos)["p50_ms"], "eos_to_asr_p99_ms": summarize(eos)["p99_ms"]})
+
+    dead, eos, clipped, handoff = run_session(FixtureSource(args.fixtures, args.gap, repeat=args.repeat))
+    rows.append({"capture": "persistent (after)", "phrases": len(eos), "clipped": clipped,
+                 "dead_p50_ms": summarize(dead)["p50_ms"],
+                 "eos_to_asr_p50_ms": summarize(eos)["p50_ms"], "eos_to_asr_p99_ms": summarize(eos)["p99_ms"]})
+    print_table(rows, ["capture", "phrases", "clipped", "dead_p50_ms", "eos_to_asr_p50_ms", "eos_to_asr_p99_ms"])
+    print(f"Queue handoff p99: {summarize(handoff)['p99_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+# bench_e2e.py
+"""
+End-to-end benchmark of assistant.py with local stand-ins for the microphone, Google
+ASR, Ollama, gTTS and the pygame mixer (see benchfakes.py), each with an injected
+latency. Runs in a temporary working directory, so the real memory/ files are untouched.
+
+Every turn goes through the real dispatch code: text turns start at dispatch_turn(),
+WAV turns are played through the fake microphone and go capture -> recognize ->
+speaker check -> dispatch. Stage timings come from tracing spans.
+
+Reports turns per second, turn / first-audio / per-stage latency percentiles and
+peak memory, and writes them to a JSON file. --compare prints the change against
+an earlier results file. --storage-sizes also times memory.py / context.py I/O
+with large mood logs and chat histories.
+
+Script file: JSON lines, {"text": "open notepad"} or {"wav": "clip.wav", "text": "hey nova"}
+(the text of a WAV turn is what the fake recognizer returns for it).
+
+Usage: python bench_e2e.py [--script turns.jsonl] [--repeat 5] [--history 10000]
+                           [--asr-ms 50] [--llm-first-token-ms 50] [--tts-ms 20]
+                           [--storage-sizes 1000 100000] [--out bench_e2e.json] [--compare old.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+
+import benchfakes
+import tracing
+from benchutil import print_table, summarize, write_results
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Files assistant.py reads from the working directory at import time
+DATA_FILES = ["thanglish_lexicon.txt", "my_voice_sample.wav"]
+
+DEFAULT_TURNS = [
+    {"wav": "my_voice_sample.wav", "text": "hey nova"},
+    {"text": "volume up"},
+    {"text": "open notepad"},
+    {"text": "what is my schedule today"},
+    {"text": "I feel a bit tired today, any advice?"},
+    {"text": "take a screenshot"},
+    {"text": "open instagram"},
+    {"text": "tell me something interesting about space"},
+    {"text": "close notepad"},
+    {"text": "scroll down"},
+]
+
+
+def load_script(path):
+    with open(path, "r", encoding="utf-8") as f:
+        turns = [json.loads(line) for line in f if line.strip()]
+    base = os.path.dirname(os.path.abspath(path))
+    for turn in turns:
+        if "wav" in turn:
+            turn["wav"] = os.path.join(base, turn["wav"])
+    return turns
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+# ----------- HISTORY -------------------
+
+def mood_records(n):
+    now = datetime.now().isoformat()
+    moods = ["Happy", "Sad", "Neutral", "Angry"]
+    return [{"timestamp": now, "mood": moods[i % 4]} for i in range(n)]
+
+
+def chat_records(n):
+    return [{"user": f"question number {i} about my day", "nova": f"answer number {i}, happy to help"}
+            for i in range(n)]
+
+
+def prefill_history(n):
+    """Write n mood entries and n chat turns into the working directory's memory/ logs."""
+    from storage import AppendLog
+
+    os.makedirs("memory", exist_ok=True)
+    AppendLog(os.path.join("memory", "mood_log.jsonl")).rewrite(mood_records(n))
+    AppendLog(os.path.join("memory", "chat_history.jsonl")).rewrite(chat_records(n))
+
+
+# ----------- TURNS -------------------
+
+class StageTimes:
+    """Raw span durations per stage (tracing only keeps histograms and a short ring)."""
+
+    def __init__(self):
+        self.durations = defaultdict(list)
+
+    def __call__(self, record):
+        op = record.attrs.get("op")
+        self.durations[f"{record.stage}.{op}" if op else record.stage].append(record.duration)
+
+
+def run_turns(assistant, stand_ins, turns, repeat, quiet=True):
+    turn_latencies, first_audio = [], []
+    wav_frames = {}
+    start = time.perf_counter()
+    for i in range(repeat):
+        for n, turn in enumerate(turns):
+            tracing.set_trace(i * len(turns) + n + 1)
+            stand_ins.mixer.first_play = None
+            out = io.StringIO() if quiet else sys.stdout
+            with contextlib.redirect_stdout(out):
+                turn_start = time.perf_counter()
+                if "wav" in turn:
+                    if turn["wav"] not in wav_frames:
+                        wav_frames[turn["wav"]] = benchfakes.load_wav_frames(turn["wav"])
+                    stand_ins.speech.say(wav_frames[turn["wav"]], turn["text"])
+                    audio = assistant.listen()
+                    query = assistant.recognize(audio)
+                    if query:
+                        assistant.dispatch_turn(query, audio)
+                else:
+                    assistant.dispatch_turn(turn["text"])
+                turn_latencies.append(time.perf_counter() - turn_start)
+            if stand_ins.mixer.first_play is not None:
+                first_audio.append(stand_ins.mixer.first_play - turn_start)
+    elapsed = time.perf_counter() - start
+    return turn_latencies, first_audio, elapsed
+
+
+# ----------- STORAGE -------------------
+
+def timed(fn, count):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_storage(sizes, ops):
+    """Time the memory.py / context.py calls the assistant makes, at each history size."""
+    import context
+    import memory
+
+    rows = []
+    for size in sizes:
+        memory.mood_log_store().rewrite(mood_records(size))
+        log = context.context_store()
+        results = {
+            "log_mood": timed(lambda: memory.log_mood("Happy"), ops),
+            "get_last_mood": timed(memory.get_last_mood, ops),
+            "load_mood_log": timed(memory.load_mood_log, min(ops, 5)),
+        }
+        # Cold start against a chat log that grew to `size` lines, then turns written through
+        log.rewrite(chat_records(size))
+        results["context cold load"] = timed(lambda: context.ContextStore(log).formatted(), min(ops, 5))
+        log.rewrite(chat_records(size))
+        store = context.ContextStore(log)
+
+        def add_and_flush():
+            store.add("how are you?", "I'm fine, thanks!")
+            store.flush()
+
+        results["add_exchange+flush"] = timed(add_and_flush, ops)
+        results["get_formatted_context"] = timed(store.formatted, ops)
+        for op, latencies in results.items():
+            row = {"op": op, "entries": size}
+            row.update(summarize(latencies))
+            rows.append(row)
+    return rows
+
+
+# ----------- REPORT -------------------
+
+def compare(old, new):
+    """Rows of p50/p99 change for every stage present in both result files."""
+    rows = []
+    for section in ("turn", "first_audio"):
+        if old.get(section) and new.get(section):
+            old_stats, new_stats = {"": old[section]}, {"": new[section]}
+            rows += _delta_rows(section, old_stats, new_stats)
+    rows += _delta_rows("stage", old.get("stages", {}), new.get("stages", {}))
+    return rows
+
+
+def _delta_rows(kind, old_stats, new_stats):
+    rows = []
+    for name in sorted(set(old_stats) & set(new_stats)):
+        row = {"metric": f"{kind} {name}".strip()}
+        for key in ("p50_ms", "p99_ms"):
+            before, after = old_stats[name].get(key, 0.0), new_stats[name].get(key, 0.0)
+            row[f"{key}_before"] = before
+            row[f"{key}_after"] = after
+            row[f"{key[:3]}_change_%"] = 100.0 * (after - before) / before if before else 0.0
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--script", help="JSON-lines turn script (default: a built-in mix of commands and chat)")
+    parser.add_argument("--repeat", type=int, default=5, help="times to run the script")
+    parser.add_argument("--history", type=int, default=0,
+                        help="prefill the mood log and chat history with this many entries")
+    parser.add_argument("--asr-ms", type=float, default=50.0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=50.0)
+    parser.add_argument("--llm-token-ms", type=float, default=5.0)
+    parser.add_argument("--tts-ms", type=float, default=20.0)
+    parser.add_argument("--playback-ms-per-char", type=float, default=0.0,
+                        help="seconds of simulated audio per character (about 60 ms/char is real speech)")
+    parser.add_argument("--sentiment-ms", type=float, default=10.0)
+    parser.add_argument("--embed-ms", type=float, default=5.0, help="speaker encoder time per window")
+    parser.add_argument("--mic-speed", type=float, default=0.0,
+                        help="1.0 plays WAV turns in real time; 0 reads them as fast as possible")
+    parser.add_argument("--real-sentiment", action="store_true", help="use the BERT model instead of a stand-in")
+    parser.add_argument("--prerender", action="store_true", help="pre-render the fixed phrases before timing")
+    parser.add_argument("--trace-malloc", action="store_true",
+                        help="also report the Python heap peak (tracemalloc slows allocation-heavy code)")
+    parser.add_argument("--storage-sizes", type=int, nargs="*", default=[])
+    parser.add_argument("--storage-ops", type=int, default=200)
+    parser.add_argument("--out", default="bench_e2e.json")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    parser.add_argument("--verbose", action="store_true", help="show the assistant's own output")
+    args = parser.parse_args()
+
+    turns = load_script(args.script) if args.script else [
+        dict(t, wav=os.path.join(HERE, t["wav"])) if "wav" in t else t for t in DEFAULT_TURNS
+    ]
+    out_path = os.path.abspath(args.out)
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    latencies = benchfakes.Latencies(
+        asr=args.asr_ms / 1000.0, llm_first_token=args.llm_first_token_ms / 1000.0,
+        llm_token=args.llm_token_ms / 1000.0, tts=args.tts_ms / 1000.0,
+        playback_per_char=args.playback_ms_per_char / 1000.0, sentiment=args.sentiment_ms / 1000.0,
+        embed=args.embed_ms / 1000.0, mic_speed=args.mic_speed,
+    )
+
+    workdir = tempfile.mkdtemp(prefix="luma-bench-")
+    cwd = os.getcwd()
+    try:
+        for name in DATA_FILES:
+            shutil.copy(os.path.join(HERE, name), workdir)
+        os.chdir(workdir)
+        if args.history:
+            prefill_history(args.history)
+
+        if args.trace_malloc:
+            tracemalloc.start()
+        stand_ins = benchfakes.install(latencies)
+        tracing.configure(enabled=True)
+        stage_times = StageTimes()
+        tracing.add_listener(stage_times)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+            import assistant
+            import sentiment
+        import_seconds = time.perf_counter() - start
+
+        assistant.authenticator = benchfakes.stand_in_authenticator("my_voice_sample.wav", latencies)
+        if not args.real_sentiment:
+            sentiment._engine = benchfakes.stand_in_sentiment(latencies)
+        if args.prerender:
+            assistant.prerender_phrases(background=False)
+        if any("wav" in t for t in turns) and not assistant.asr.get_backend().supports_streaming:
+            # Open and calibrate the (fake) microphone once, as the assistant does before its first turn
+            with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+                assistant.capture.get_session(wake_detector=assistant.load_wake_detector(),
+                                              on_wake=assistant._wake_heard)
+        stage_times.durations.clear()
+
+        turn_latencies, first_audio, elapsed = run_turns(assistant, stand_ins, turns, args.repeat,
+                                                         quiet=not args.verbose)
+        storage_rows = run_storage(args.storage_sizes, args.storage_ops) if args.storage_sizes else []
+
+        results = {
+            "meta": {
+                "commit": git_commit(),
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "script": args.script or "built-in",
+                "repeat": args.repeat,
+                "history": args.history,
+                "real_sentiment": args.real_sentiment,
+                "latencies": latencies.as_dict(),
+            },
+            "turns": len(turn_latencies),
+            "turns_per_second": len(turn_latencies) / elapsed if elapsed else 0.0,
+            "import_seconds": import_seconds,
+            "turn": summarize(turn_latencies),
+            "first_audio": summarize(first_audio),
+            "stages": {stage: summarize(d) for stage, d in sorted(stage_times.durations.items())},
+            "memory": {"peak_rss_mb": peak_rss_mb()},
+            "storage": storage_rows,
+            "side_effects": len(stand_ins.effects.calls),
+        }
+        if args.trace_malloc:
+            results["memory"]["peak_python_heap_mb"] = tracemalloc.get_traced_memory()[1] / (1024.0 * 1024.0)
+            tracemalloc.stop()
+    finally:
+        benchfakes.write_back()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{results['turns']} turns, {results['turns_per_second']:.2f} turns/s, "
+          f"import {import_seconds:.2f}s, peak RSS {results['memory']['peak_rss_mb'] or 0:.0f} MB")
+    rows = [dict(name="turn", **results["turn"]), dict(name="first audio", **results["first_audio"])]
+    rows += [dict(name=stage, **stats) for stage, stats in results["stages"].items()]
+    print_table(rows, ["name", "count", "mean_ms", "p50_ms", "p99_ms", "max_ms"])
+    if storage_rows:
+        print()
+        print_table(storage_rows, ["op", "entries", "count", "mean_ms", "p50_ms", "p99_ms", "max_ms"])
+    write_results(out_path, results)
+
+    if compare_path:
+        with open(compare_path, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        print(f"\nCompared with {compare_path} (commit {old.get('meta', {}).get('commit')}):")
+        print_table(compare(old, results), ["metric", "p50_ms_before", "p50_ms_after", "p50_change_%",
+                                            "p99_ms_before", "p99_ms_after", "p99_change_%"])
+
+
+if __name__ == "__main__":
+    main()
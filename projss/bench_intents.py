@@ -0,0 +1,127 @@
+# bench_intents.py
+"""
+Intent routing: accuracy on the regression corpus (intent_corpus.jsonl) and
+per-query latency of the old if/elif substring chain versus the compiled router,
+also with a large synthetic app table to show how each scales.
+
+Usage: python bench_intents.py [--corpus intent_corpus.jsonl] [--repeat 200] [--apps 1000] [--no-lemma]
+"""
+import argparse
+import json
+
+import models
+from benchutil import print_table, summarize, time_calls
+from commands import APP_CLOSE_MAP, APP_OPEN_MAP, SOCIAL_SITES, build_router
+
+
+def legacy_route(query, open_map=APP_OPEN_MAP, close_map=APP_CLOSE_MAP):
+    """The original handle_query chain plus open_any_app/close_any_app, returning (intent, slots)."""
+    query = query.lower()
+    if any(x in query for x in SOCIAL_SITES):
+        return "social_media", {}
+    elif "university time table" in query or "schedule" in query:
+        return "schedule", {}
+    elif "volume up" in query:
+        return "volume_up", {}
+    elif "volume down" in query:
+        return "volume_down", {}
+    elif "mute" in query:
+        return "mute", {}
+    elif "screenshot" in query:
+        return "screenshot", {}
+    elif "scroll down" in query:
+        return "scroll_down", {}
+    elif "scroll up" in query:
+        return "scroll_up", {}
+    elif "click mouse" in query:
+        return "click", {}
+    elif "double click" in query:
+        return "double_click", {}
+    elif "open" in query:
+        for key in open_map:
+            if key in query:
+                return "open_app", {"app": key}
+        return "open_app", {}
+    elif "close" in query:
+        for key in close_map:
+            if key in query:
+                return "close_app", {"running_app": key}
+        return "close_app", {}
+    elif "exit" in query or "bye" in query or "goodbye" in query:
+        return "exit", {}
+    return None, {}
+
+
+def load_corpus(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def router_route(router):
+    def route(query):
+        match = router.route(query)
+        return (match.name, match.slots) if match is not None else (None, {})
+    return route
+
+
+def evaluate(route, corpus):
+    failures = []
+    for case in corpus:
+        intent, slots = route(case["text"])
+        if intent != case["intent"] or slots != case["slots"]:
+            failures.append((case["text"], case["intent"], case["slots"], intent, slots))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default="intent_corpus.jsonl")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--apps", type=int, default=1000, help="size of the synthetic app table")
+    parser.add_argument("--no-lemma", action="store_true", help="skip the NLTK lemmatizer fallback")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    lemmatizer_loader = None
+    if not args.no_lemma:
+        try:
+            models.get("nltk")
+            lemmatizer_loader = models.resource("nltk").get
+        except Exception as e:
+            print(f"NLTK unavailable ({e}); corpus cases that need lemmatization are skipped")
+    if lemmatizer_loader is None:
+        corpus = [case for case in corpus if case.get("needs") != "lemma"]
+    router = build_router(lemmatizer_loader=lemmatizer_loader)
+
+    print(f"Regression corpus: {len(corpus)} utterances")
+    for name, route in (("legacy chain", legacy_route), ("intent router", router_route(router))):
+        failures = evaluate(route, corpus)
+        print(f"  {name}: {len(corpus) - len(failures)}/{len(corpus)} correct")
+        for text, want, want_slots, got, got_slots in failures:
+            print(f"    {text!r}: expected {want} {want_slots}, got {got} {got_slots}")
+
+    queries = [case["text"] for case in corpus] * args.repeat
+    rows = []
+    for name, route in (("legacy chain", legacy_route), ("intent router", router_route(router))):
+        row = {"router": name, "apps": len(APP_OPEN_MAP)}
+        row.update(summarize(time_calls(route, queries)))
+        rows.append(row)
+
+    # Scaling: many registered apps; queries name apps near the end of the table
+    big_open = dict(APP_OPEN_MAP)
+    big_open.update({f"app{i} tool": "" for i in range(args.apps)})
+    big_close = dict(APP_CLOSE_MAP)
+    big_close.update({f"app{i} tool": "" for i in range(args.apps)})
+    big_router = build_router(open_map=big_open, close_map=big_close)
+    big_queries = [f"please open app{args.apps - 1 - i % 10} tool" for i in range(len(queries))]
+    for name, route in (("legacy chain", lambda q: legacy_route(q, big_open, big_close)),
+                        ("intent router", router_route(big_router))):
+        row = {"router": name, "apps": len(big_open)}
+        row.update(summarize(time_calls(route, big_queries)))
+        rows.append(row)
+
+    print_table(rows, ["router", "apps", "count", "mean_ms", "p50_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
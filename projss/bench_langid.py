@@ -0,0 +1,94 @@
+# bench_langid.py
+"""
+Language detection for speech output: accuracy on langid_corpus.jsonl (English,
+Tamil script, Thanglish) and per-call latency of the old langdetect + per-keyword
+regex path versus langid.LanguageIdentifier, cold (empty cache) and warm.
+
+Usage: python bench_langid.py [--corpus langid_corpus.jsonl] [--repeat 200]
+"""
+import argparse
+import json
+import re
+
+import langid
+from benchutil import print_table, summarize, time_calls
+
+
+def legacy_detect_thanglish(text):
+    """The original assistant.detect_thanglish: one re.search per keyword."""
+    for word in langid.THANGLISH_KEYWORDS:
+        if re.search(r"\b" + re.escape(word) + r"\b", text.lower()):
+            return True
+    return False
+
+
+def legacy_detect_speech_lang(text):
+    """The original assistant.detect_speech_lang (unseeded langdetect)."""
+    from langdetect import detect
+
+    try:
+        lang = detect(text)
+    except Exception:
+        lang = "en"
+    if legacy_detect_thanglish(text):
+        lang = "ta"
+    return lang
+
+
+def accuracy(detect, corpus):
+    misses = [(case["text"], case["lang"], detect(case["text"])) for case in corpus]
+    return [m for m in misses if m[1] != m[2]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default="langid_corpus.jsonl")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+    texts = [case["text"] for case in corpus]
+
+    try:
+        import langdetect  # noqa: F401
+        have_langdetect = True
+    except ImportError:
+        have_langdetect = False
+        print("langdetect not installed: legacy path timed on its Thanglish keyword scan only")
+
+    detectors = [("langid", langid.get_identifier().detect)]
+    if have_langdetect:
+        detectors.insert(0, ("legacy", legacy_detect_speech_lang))
+    for name, detect in detectors:
+        misses = accuracy(detect, corpus)
+        print(f"{name}: {len(corpus) - len(misses)}/{len(corpus)} correct")
+        for text, want, got in misses:
+            print(f"    {text!r}: expected {want}, got {got}")
+
+    rows = []
+    legacy = legacy_detect_speech_lang if have_langdetect else legacy_detect_thanglish
+    row = {"detector": "legacy" if have_langdetect else "legacy keyword scan"}
+    row.update(summarize(time_calls(legacy, texts * max(1, args.repeat // 10))))
+    rows.append(row)
+
+    # Cold: a fresh identifier per pass so every text misses the cache
+    cold = []
+    for _ in range(args.repeat):
+        identifier = langid.LanguageIdentifier(langid.THANGLISH_KEYWORDS + langid.load_lexicon(langid.LEXICON_FILE))
+        cold.extend(time_calls(identifier.detect, texts))
+    row = {"detector": "langid (cold)"}
+    row.update(summarize(cold))
+    rows.append(row)
+
+    identifier = langid.get_identifier()
+    row = {"detector": "langid (cached)"}
+    row.update(summarize(time_calls(identifier.detect, texts * args.repeat)))
+    rows.append(row)
+
+    print_table(rows, ["detector", "count", "mean_ms", "p50_ms", "p99_ms", "max_ms"])
+    print(f"cache: {identifier.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
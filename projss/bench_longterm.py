@@ -0,0 +1,106 @@
+# bench_longterm.py
+"""
+Long-term memory index: insert cost, query latency and recall, brute force versus IVF.
+
+Vectors are synthetic unit vectors drawn around topic centres (like embeddings of
+many conversations about a few hundred subjects); queries are noisy copies of stored
+rows. Recall@k is measured against the exact brute-force top k. Runs in a temporary
+directory. With --model, the time to embed one query with the real CPU model is
+reported too.
+
+Usage: python bench_longterm.py [--sizes 10000 100000] [--queries 200] [--k 3] [--nprobe 4 8 16]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import models
+from benchutil import print_table, summarize
+from longterm import EMBEDDING_DIM, VectorIndex
+
+
+def synthetic(n, dim, topics, rng, noise=0.35):
+    centres = rng.normal(size=(topics, dim)).astype(np.float32)
+    rows = centres[rng.integers(0, topics, n)] + noise * rng.normal(size=(n, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def fill(index, vectors, batch=10000):
+    for start in range(0, len(vectors), batch):
+        chunk = vectors[start:start + batch]
+        index.add(chunk, [{"key": str(start + i), "text": ""} for i in range(len(chunk))])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--topics", type=int, default=300)
+    parser.add_argument("--inserts", type=int, default=200, help="single-row inserts timed per size")
+    parser.add_argument("--model", action="store_true", help="also time the real embedding model")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            index = VectorIndex(os.path.join(tmp, f"longterm_{size}"), EMBEDDING_DIM)
+            vectors = synthetic(size, EMBEDDING_DIM, args.topics, rng)
+            fill(index, vectors)
+
+            extra = synthetic(args.inserts, EMBEDDING_DIM, args.topics, rng)
+            latencies = []
+            for i, vector in enumerate(extra):
+                start = time.perf_counter()
+                index.add(vector, [{"key": f"extra{i}", "text": ""}])
+                latencies.append(time.perf_counter() - start)
+            rows.append(dict(op="insert (1 row)", entries=size, **summarize(latencies)))
+
+            picks = rng.integers(0, len(index), args.queries)
+            matrix = np.asarray(index.matrix())
+            queries = matrix[picks] + 0.3 * rng.normal(size=(args.queries, EMBEDDING_DIM)).astype(np.float32)
+            queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+            exact, latencies = [], []
+            index.search(queries[0], args.k, exact=True)  # page the matrix in
+            for query in queries:
+                start = time.perf_counter()
+                exact.append({row for row, _ in index.search(query, args.k, exact=True)})
+                latencies.append(time.perf_counter() - start)
+            rows.append(dict(op="brute force", entries=size, recall=1.0, **summarize(latencies)))
+
+            start = time.perf_counter()
+            index.train()
+            train_seconds = time.perf_counter() - start
+            for nprobe in args.nprobe:
+                found, latencies = 0, []
+                for query, truth in zip(queries, exact):
+                    start = time.perf_counter()
+                    result = index.search(query, args.k, nprobe=nprobe)
+                    latencies.append(time.perf_counter() - start)
+                    found += len(truth & {row for row, _ in result})
+                recall = found / float(sum(len(t) for t in exact))
+                rows.append(dict(op=f"ivf nprobe={nprobe}", entries=size, recall=recall,
+                                 train_s=train_seconds, **summarize(latencies)))
+
+    print_table(rows, ["op", "entries", "recall", "count", "mean_ms", "p50_ms", "p99_ms", "train_s"])
+
+    if args.model:
+        embedder = models.get("embedder")
+        texts = ["what did I say about my sister's birthday?"] * 50
+        latencies = []
+        for text in texts:
+            start = time.perf_counter()
+            embedder.encode([text], normalize_embeddings=True)
+            latencies.append(time.perf_counter() - start)
+        stats = summarize(latencies[5:])
+        print(f"\nQuery embedding: p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
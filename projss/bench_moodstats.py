@@ -0,0 +1,113 @@
+# bench_moodstats.py
+"""
+Mood analytics: the original approach (parse the whole mood_log.json to read the
+last mood or count a week) versus the append log and moodstats.MoodStats, at 1M
+logged moods by default. Runs in a temporary directory.
+
+Usage: python bench_moodstats.py [--entries 1000000] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchutil import print_table, summarize
+from moodstats import MOODS, MoodStats
+from storage import AppendLog
+
+
+def write_logs(directory, entries, seed=0):
+    """Same moods, one entry every ~95s back from now, as mood_log.json (list) and mood_log.jsonl."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    step = timedelta(days=3 * 365) / entries
+    lines = []
+    for i in range(entries):
+        moment = now - step * (entries - i)
+        lines.append(json.dumps({"timestamp": moment.isoformat(), "mood": rng.choice(MOODS)}))
+    json_path = os.path.join(directory, "mood_log.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        f.write("[" + ",\n".join(lines) + "]")
+    jsonl_path = os.path.join(directory, "mood_log.jsonl")
+    with open(jsonl_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return json_path, jsonl_path
+
+
+def load_json_log(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def legacy_last_mood(path):
+    log = load_json_log(path)
+    return log[-1]["mood"] if log else None
+
+
+def week_counts(records, start, end):
+    counts = {}
+    for entry in records:
+        if start <= datetime.fromisoformat(entry["timestamp"]) < end:
+            counts[entry["mood"]] = counts.get(entry["mood"], 0) + 1
+    return counts
+
+
+def timed(fn, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--legacy-repeat", type=int, default=3, help="repeats of the full-parse rows")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path, jsonl_path = write_logs(tmp, args.entries)
+        log = AppendLog(jsonl_path)
+        end = datetime.now()
+        start = end - timedelta(days=7)
+
+        def row(approach, query, latencies):
+            rows.append(dict(approach=approach, query=query, **summarize(latencies)))
+
+        row("mood_log.json (before)", "last mood", timed(lambda: legacy_last_mood(json_path), args.legacy_repeat))
+        row("mood_log.json (before)", "week counts", timed(
+            lambda: week_counts(load_json_log(json_path), start, end), args.legacy_repeat))
+        row("append log", "last mood", timed(log.last, args.repeat))
+        row("append log", "week counts", timed(lambda: week_counts(log.read_all(), start, end), args.legacy_repeat))
+
+        stats_path = os.path.join(tmp, "mood_stats.bin")
+        row("MoodStats", "first index build", timed(lambda: MoodStats(log, stats_path).sync(), 1))
+        row("MoodStats", "load side-file", timed(lambda: MoodStats(log, stats_path).sync(), args.repeat))
+        stats = MoodStats(log, stats_path)
+        stats.sync()
+        row("MoodStats", "last mood", timed(stats.latest, args.repeat))
+        row("MoodStats", "week counts", timed(lambda: stats.counts(start, end), args.repeat))
+        row("MoodStats", "12 weeks", timed(lambda: stats.weekly(12), args.repeat))
+        row("MoodStats", "summary (7 days)", timed(lambda: stats.summary(7), args.repeat))
+
+        def append_and_sync():
+            log.append({"timestamp": datetime.now().isoformat(), "mood": "Happy"})
+            stats.sync()
+        row("MoodStats", "append + sync", timed(append_and_sync, args.repeat))
+
+        assert stats.counts(start, end + timedelta(minutes=1)) == week_counts(log.read_all(), start,
+                                                                               end + timedelta(minutes=1))
+        print(stats.summary(7))
+
+    print_table(rows, ["approach", "query", "count", "mean_ms", "p50_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# bench_procman.py
+"""
+Open/close commands: dispatch-to-return latency of the original os.system calls
+versus procman.ProcessManager, using stub executables in a temporary directory
+(see procman.write_stub_apps). "return" is when the assistant loop gets control
+back; "done" is when the app has actually started or stopped.
+
+The original commands are emulated with their POSIX equivalents: `start app` as
+`app &`, `taskkill /f /im app` as `pkill -x app`, and the explorer restart as the
+two calls in a row. POSIX only.
+
+Usage: python bench_procman.py [--rounds 50] [--background 0]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchutil import print_table, summarize
+from commands import APP_COMMANDS
+from procman import ProcessManager, ProcessTable, write_stub_apps
+
+APPS = ["notepad", "calculator", "vlc"]
+
+
+def legacy(stubs, app, action):
+    command = stubs[app]
+    if action == "open":
+        return os.system(f'"{command.launch[0]}" &')
+    if action == "close":
+        return os.system(f"pkill -x {command.processes[0]}")
+    os.system(f"pkill -x {command.processes[0]}")
+    return os.system(f'"{command.launch[0]}" &')
+
+
+def measure(rounds, call, settle=None):
+    returned, done = [], []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = call()
+        returned.append(time.perf_counter() - start)
+        if settle is not None:
+            settle(result)
+        done.append(time.perf_counter() - start)
+    return returned, done
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--background", type=int, default=0,
+                        help="extra idle processes to start, to grow the process table")
+    args = parser.parse_args()
+    if sys.platform == "win32":
+        sys.exit("bench_procman.py uses POSIX stub scripts and pkill; run it on Linux or macOS.")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        stubs = write_stub_apps(tmp, {app: APP_COMMANDS["linux"][app] for app in APPS + ["explorer"]})
+        manager = ProcessManager(stubs)
+        filler = ProcessManager(write_stub_apps(tmp, {f"filler {i}": APP_COMMANDS["linux"]["notepad"]
+                                                      for i in range(args.background)}))
+        for app in filler.commands:
+            filler.open(app).result()
+
+        def app_at(i):
+            return APPS[i % len(APPS)]
+
+        # Original: the shell runs inline, so "return" and "done" are the same call
+        for action in ("open", "close", "restart"):
+            counter = iter(range(args.rounds))
+            app = "explorer" if action == "restart" else None
+            returned, _ = measure(args.rounds, lambda: legacy(stubs, app or app_at(next(counter)), action))
+            rows.append(dict(manager="os.system (before)", action=action, **summarize(returned)))
+            time.sleep(0.3)  # let the backgrounded stubs start before they are closed
+        os.system("pkill -f " + os.path.join(tmp, "stub-"))
+
+        for action in ("open", "close", "restart"):
+            counter = iter(range(args.rounds))
+            if action == "open":
+                call = lambda: manager.open(app_at(next(counter)))
+            elif action == "close":
+                call = lambda: manager.close(app_at(next(counter)))
+            else:
+                call = lambda: manager.close("explorer")
+            returned, done = measure(args.rounds, call, settle=lambda future: future.result())
+            rows.append(dict(manager="ProcessManager (after)", action=action, **summarize(returned)))
+            rows.append(dict(manager="ProcessManager (after)", action=action + " done", **summarize(done)))
+
+        # The is-it-running check done on the worker before every close (ProcessManager.lookup)
+        table = ProcessTable()
+        returned, _ = measure(args.rounds, lambda: (table.invalidate(), table.find(["stub-notepad"])))
+        rows.append(dict(manager="process table", action="scan", **summarize(returned)))
+        table.refresh()
+        returned, _ = measure(args.rounds, lambda: table.find(["stub-notepad"]))
+        rows.append(dict(manager="process table", action="cached lookup", **summarize(returned)))
+
+        for app in filler.commands:
+            filler.close(app).result()
+        manager.shutdown()
+        filler.shutdown()
+        os.system("pkill -f " + os.path.join(tmp, "stub-"))  # the restarted explorer stub
+
+    print_table(rows, ["manager", "action", "count", "mean_ms", "p50_ms", "p99_ms", "max_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# bench_prompt.py
+"""
+Prompt-eval cost per turn as a conversation grows, against a running Ollama server.
+
+Compares the original prompt (the last 10 turns flattened into one user message,
+rebuilt every call) with prompt.PromptBuilder (role messages, token budget, prefix
+kept stable between trims, keep_alive). Ollama reports how many prompt tokens it
+evaluated and how long that took; tokens served from its prefix cache are not counted,
+so a reused prefix shows up as a small prompt_eval_count.
+
+Usage: python bench_prompt.py [--turns 30] [--model llama3] [--num-ctx 4096] [--reply-tokens 48]
+"""
+import argparse
+
+from benchutil import print_table, summarize
+from prompt import PromptBuilder
+
+SYSTEM_PROMPT = "You are a friendly, helpful AI assistant named Nova."
+LEGACY_TURNS = 10
+
+QUESTIONS = [
+    "What is a good way to start my morning?",
+    "Can you explain how a rainbow forms?",
+    "Give me a quick idea for dinner tonight.",
+    "Why is the sky dark at night if there are so many stars?",
+    "How do I stay focused while studying?",
+    "Tell me a fun fact about octopuses.",
+    "What should I pack for a weekend trip to the hills?",
+    "How does a computer remember things?",
+]
+
+
+def legacy_messages(history, user_message):
+    """The original build_chat_messages: formatted context in one user message."""
+    context_str = "".join(f"User: {t['user']}\nNova: {t['nova']}\n" for t in history[-LEGACY_TURNS:])
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": context_str + f"\nUser: {user_message}\nNova:"},
+    ]
+
+
+def run(chat, model, turns, build, reply_tokens, **chat_kwargs):
+    history, rows = [], []
+    options = dict(chat_kwargs.pop("options", {}), num_predict=reply_tokens)
+    for i in range(turns):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        response = chat(model=model, messages=build(history, question), options=options, **chat_kwargs)
+        history.append({"user": question, "nova": response["message"]["content"]})
+        rows.append({
+            "turn": i + 1,
+            "prompt_eval_count": response.get("prompt_eval_count", 0),
+            "prompt_eval_ms": response.get("prompt_eval_duration", 0) / 1e6,
+            "total_ms": response.get("total_duration", 0) / 1e6,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--model", default="llama3")
+    parser.add_argument("--num-ctx", type=int, default=4096)
+    parser.add_argument("--reply-tokens", type=int, default=48, help="num_predict per reply")
+    parser.add_argument("--every", type=int, default=5, help="print every Nth turn")
+    args = parser.parse_args()
+
+    from ollama import chat
+
+    # Load the model first so neither run pays for it
+    chat(model=args.model, messages=[{"role": "user", "content": "hi"}], options={"num_predict": 1},
+         keep_alive="30m")
+
+    legacy = run(chat, args.model, args.turns, legacy_messages, args.reply_tokens)
+    builder = PromptBuilder(SYSTEM_PROMPT, num_ctx=args.num_ctx, reply_tokens=args.reply_tokens)
+    built = run(chat, args.model, args.turns, builder.messages, args.reply_tokens, **builder.chat_options())
+
+    rows = []
+    for name, result in (("flattened (before)", legacy), ("prompt builder (after)", built)):
+        for row in result:
+            if row["turn"] % args.every == 0 or row["turn"] == 1:
+                rows.append(dict(prompt=name, **row))
+    print_table(rows, ["prompt", "turn", "prompt_eval_count", "prompt_eval_ms", "total_ms"])
+
+    print()
+    summary = []
+    for name, result in (("flattened (before)", legacy), ("prompt builder (after)", built)):
+        row = {"prompt": name, "evaluated_tokens": sum(r["prompt_eval_count"] for r in result)}
+        row.update(summarize([r["prompt_eval_ms"] / 1000.0 for r in result]))
+        summary.append(row)
+    print_table(summary, ["prompt", "evaluated_tokens", "mean_ms", "p50_ms", "p99_ms", "max_ms"])
+    print(f"Prompt builder trims: {builder.trims}")
+
+
+if __name__ == "__main__":
+    main()
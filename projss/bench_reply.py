@@ -0,0 +1,119 @@
+# bench_reply.py
+"""
+Critical path of a streamed chat reply: the original sequence (sentiment, mood log,
+prompt, then the LLM request) versus assistant.ai_friendly_reply_streaming, where
+sentiment and mood logging run alongside prompt building and generation and the
+mood prefix is spoken as soon as it is known.
+
+The mood prefix is spoken first on both paths, so first audio still waits for
+sentiment; what the parallel path saves is the time to the first LLM token.
+
+Uses the local stand-ins from benchfakes.py, so sentiment and LLM latency are the
+injected values (or BERT itself with --real-sentiment). Runs in a temporary directory.
+
+Usage: python bench_reply.py [--turns 20] [--sentiment-ms 120] [--llm-first-token-ms 250] [--tts-ms 40]
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import benchfakes
+from bench_e2e import DATA_FILES, HERE
+from benchutil import print_table, summarize
+
+QUESTIONS = [
+    "I feel a bit tired today, any advice?",
+    "tell me something interesting about space",
+    "I got great news at work today",
+    "this bug is so frustrating",
+    "what should I cook tonight",
+]
+
+
+def legacy_reply_streaming(assistant, user_message):
+    """The original path: sentiment and the mood log finish before the prompt and LLM start."""
+    from streaming import stream_reply
+
+    mood = assistant.analyze_mood_with_bert(user_message)
+    assistant.record_mood(mood)
+    prefix = assistant.MOOD_PREFIXES.get(mood, "")
+    return stream_reply(assistant.build_chat_messages(user_message), assistant.speak, chat_fn=assistant.chat,
+                        model="llama3", lead_in=prefix.strip(), **assistant.prompt_builder.chat_options())
+
+
+def parallel_reply_streaming(assistant, user_message):
+    """The same steps as assistant.ai_friendly_reply_streaming, returning stream_reply's timings."""
+    from streaming import stream_reply
+
+    prefix = assistant.start_mood_prefix(user_message)
+    messages = assistant.start_chat_messages(user_message).result()
+    return stream_reply(messages, assistant.speak, chat_fn=assistant.chat, model="llama3", lead_in=prefix,
+                        **assistant.prompt_builder.chat_options())
+
+
+def measure(assistant, stand_ins, reply, turns, run):
+    first_audio, first_token = [], []
+    for i in range(turns):
+        # Tagged with the run too, so neither path scores a question the other already cached
+        question = QUESTIONS[i % len(QUESTIONS)] + f" ({run}.{i})"
+        stand_ins.mixer.first_play = None
+        start = time.perf_counter()
+        _, timings = reply(assistant, question)
+        if stand_ins.mixer.first_play is not None:
+            first_audio.append(stand_ins.mixer.first_play - start)
+        if timings["first_token"] is not None:
+            # stream_reply times from its own start, which the legacy path delays by sentiment + prompt
+            llm_offset = time.perf_counter() - start - timings["total"]
+            first_token.append(llm_offset + timings["first_token"])
+    return first_audio, first_token
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--sentiment-ms", type=float, default=120.0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=250.0)
+    parser.add_argument("--llm-token-ms", type=float, default=20.0)
+    parser.add_argument("--tts-ms", type=float, default=40.0)
+    parser.add_argument("--real-sentiment", action="store_true")
+    args = parser.parse_args()
+
+    latencies = benchfakes.Latencies(
+        sentiment=args.sentiment_ms / 1000.0, llm_first_token=args.llm_first_token_ms / 1000.0,
+        llm_token=args.llm_token_ms / 1000.0, tts=args.tts_ms / 1000.0,
+    )
+    workdir = tempfile.mkdtemp(prefix="luma-bench-")
+    cwd = os.getcwd()
+    rows = []
+    try:
+        for name in DATA_FILES:
+            shutil.copy(os.path.join(HERE, name), workdir)
+        os.chdir(workdir)
+        stand_ins = benchfakes.install(latencies)
+        with contextlib.redirect_stdout(io.StringIO()):
+            import assistant
+            import sentiment
+            if not args.real_sentiment:
+                sentiment._engine = benchfakes.stand_in_sentiment(latencies)
+            for run, (name, reply) in enumerate((("sequential (before)", legacy_reply_streaming),
+                                                 ("parallel (after)", parallel_reply_streaming))):
+                first_audio, first_token = measure(assistant, stand_ins, reply, args.turns, run)
+                rows.append({"reply": name,
+                             "first_audio_p50_ms": summarize(first_audio)["p50_ms"],
+                             "first_audio_p99_ms": summarize(first_audio)["p99_ms"],
+                             "first_token_p50_ms": summarize(first_token)["p50_ms"],
+                             "first_token_p99_ms": summarize(first_token)["p99_ms"]})
+    finally:
+        benchfakes.write_back()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(rows, ["reply", "first_audio_p50_ms", "first_audio_p99_ms", "first_token_p50_ms", "first_token_p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
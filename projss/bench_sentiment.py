@@ -0,0 +1,96 @@
+# bench_sentiment.py
+"""
+Compare the original per-utterance BERT call with the batched, cached SentimentEngine.
+
+Usage: python bench_sentiment.py [--texts 200] [--batch 16] [--no-quantize] [--threads N]
+"""
+import argparse
+import random
+import time
+
+import models
+from benchutil import print_table, summarize, time_calls
+from sentiment import SentimentEngine, rating_to_mood
+
+SAMPLE_TEXTS = [
+    "I am so happy today, everything went well",
+    "this is really frustrating, nothing works",
+    "I feel a bit lonely tonight",
+    "open the calculator please",
+    "tell me a joke",
+    "what's the weather like",
+    "I got the job, I can't believe it",
+    "my code keeps crashing and I'm angry",
+    "it's an okay day I guess",
+    "thanks for helping me earlier",
+]
+
+
+def legacy_analyze(text):
+    """The original analyze_mood_with_bert: fp32, torch.no_grad, one text at a time."""
+    import torch
+
+    tokenizer, model = models.get("sentiment")
+    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
+    with torch.no_grad():
+        outputs = model(**inputs)
+    scores = outputs.logits.softmax(dim=1)
+    return rating_to_mood(int(torch.argmax(scores)) + 1)
+
+
+def make_corpus(n, unique_ratio=1.0, seed=0):
+    rng = random.Random(seed)
+    unique = [f"{rng.choice(SAMPLE_TEXTS)} {i}" for i in range(max(1, int(n * unique_ratio)))]
+    return [rng.choice(unique) for _ in range(n)] if unique_ratio < 1.0 else unique
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+
+    models.get("sentiment")  # keep model load time out of the measurements
+    texts = make_corpus(args.texts)
+    repeated = make_corpus(args.texts, unique_ratio=0.2, seed=1)
+    rows = []
+
+    def record(name, latencies, total, n):
+        row = {"run": name, "texts_per_s": n / total if total else 0.0}
+        row.update(summarize(latencies))
+        rows.append(row)
+
+    legacy_analyze(texts[0])  # warm-up
+    start = time.perf_counter()
+    lat = time_calls(legacy_analyze, texts)
+    record("legacy single", lat, time.perf_counter() - start, len(texts))
+
+    engine = SentimentEngine(max_batch_size=args.batch, quantize=not args.no_quantize,
+                             num_threads=args.threads)
+    engine.analyze_batch([texts[0]])  # warm-up (includes quantization)
+    engine.clear_cache()
+    start = time.perf_counter()
+    lat = time_calls(lambda t: engine.analyze_batch([t]), texts)
+    record("engine single", lat, time.perf_counter() - start, len(texts))
+
+    engine.clear_cache()
+    batches = [texts[i:i + args.batch] for i in range(0, len(texts), args.batch)]
+    start = time.perf_counter()
+    lat = time_calls(engine.analyze_batch, batches)
+    total = time.perf_counter() - start
+    # Per-text latency within a batch is the time of the whole batch
+    record("engine batched", [l for l, b in zip(lat, batches) for _ in b], total, len(texts))
+
+    engine.clear_cache()
+    start = time.perf_counter()
+    lat = time_calls(lambda t: engine.analyze_batch([t]), repeated)
+    record("engine cached (20% unique)", lat, time.perf_counter() - start, len(repeated))
+    print(f"Cache: {engine.cache_info()}")
+
+    print_table(rows, ["run", "count", "texts_per_s", "mean_ms", "p50_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# bench_server.py
+"""
+Load test for server.py: N sessions send chat turns concurrently, each waiting
+--think-ms between turns like a person would. For every concurrency level it
+reports turns/s, turn latency, the share of turns shed with 503 or failed (reset
+connections, 500s), CPU cores the server used, and sessions per core.
+
+By default the server runs in this process on the local stand-ins from
+benchfakes.py (injected sentiment / LLM latencies, hashing embedder), in a
+temporary directory; its CPU figure then includes the load generator's own threads.
+With --url it loads an already running server instead; pass --server-pid to read
+that server's CPU time from /proc.
+
+Usage: python bench_server.py [--sessions 1 4 16 64] [--duration 10] [--think-ms 500] [--slo-ms 2000]
+       python bench_server.py --url http://127.0.0.1:8765 --server-pid 1234
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+from benchutil import print_table, summarize
+
+QUESTIONS = [
+    "I feel a bit tired today, any advice?",
+    "tell me something interesting about space",
+    "I got great news at work today",
+    "this bug is so frustrating",
+    "what should I cook tonight",
+]
+
+
+class Client:
+    """One session on its own keep-alive connection."""
+
+    def __init__(self, host, port, session_id):
+        self.connection = http.client.HTTPConnection(host, port, timeout=120)
+        self.session_id = session_id
+
+    def turn(self, text):
+        body = json.dumps({"text": text})
+        self.connection.request("POST", f"/sessions/{self.session_id}/turns", body=body,
+                                headers={"Content-Type": "application/json"})
+        response = self.connection.getresponse()
+        response.read()
+        return response.status, float(response.getheader("Retry-After") or 0)
+
+    def reset(self):
+        self.connection.close()  # the next request reconnects
+
+    def close(self):
+        self.connection.close()
+
+
+def process_cpu_seconds(pid=None):
+    """CPU time (user + system) of this process, or of pid read from /proc."""
+    if pid is None:
+        return time.process_time()
+    with open(f"/proc/{pid}/stat", "r") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def run_level(host, port, sessions, duration, think, server_pid, level):
+    latencies, shed, failed = [], [0], [0]
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def client_loop(i):
+        client = Client(host, port, f"load-{level}-{i}")
+        turn = 0
+        while time.monotonic() < stop:
+            question = QUESTIONS[(i + turn) % len(QUESTIONS)] + f" ({i}.{turn})"  # no cache hits
+            start = time.perf_counter()
+            try:
+                status, retry_after = client.turn(question)
+            except (OSError, http.client.HTTPException):
+                # Reset or refused connections count as failed turns, not as missing sessions
+                client.reset()
+                status, retry_after = None, 0.0
+            elapsed = time.perf_counter() - start
+            with lock:
+                if status == 200:
+                    latencies.append(elapsed)
+                elif status == 503:
+                    shed[0] += 1
+                else:
+                    failed[0] += 1
+            turn += 1
+            time.sleep(max(think, min(retry_after, 1.0)) if status == 503 else think)
+        client.close()
+
+    cpu_start, wall_start = process_cpu_seconds(server_pid), time.perf_counter()
+    threads = [threading.Thread(target=client_loop, args=(i,), daemon=True) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+    cores = (process_cpu_seconds(server_pid) - cpu_start) / wall
+
+    stats = summarize(latencies)
+    total = len(latencies) + shed[0] + failed[0]
+    return {"sessions": sessions, "turns_per_s": len(latencies) / wall, "p50_ms": stats["p50_ms"],
+            "p99_ms": stats["p99_ms"], "shed": shed[0] / total if total else 0.0,
+            "failed": failed[0] / total if total else 0.0, "cores": cores,
+            "sessions_per_core": sessions / cores if cores > 0 else 0.0}
+
+
+def start_local_server(args, workdir):
+    """server.py on the benchfakes stand-ins, listening on a free local port."""
+    import benchfakes
+
+    latencies = benchfakes.Latencies(sentiment=args.sentiment_ms / 1000.0,
+                                     llm_first_token=args.llm_first_token_ms / 1000.0,
+                                     llm_token=args.llm_token_ms / 1000.0)
+    benchfakes.install(latencies)
+    import models
+    import sentiment
+    import server
+    from modelpool import ModelPool
+
+    sentiment._engine = benchfakes.stand_in_sentiment(latencies)
+    models.warm_up(["embedder"], background=False)
+    pool = ModelPool(llm_workers=args.llm_workers, max_pending=args.max_pending)
+    manager = server.SessionManager(os.path.join(workdir, "sessions"), pool, max_sessions=max(args.sessions) * 2)
+    http_server = server.serve(manager, "127.0.0.1", 0)
+    return http_server, manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--think-ms", type=float, default=500.0, help="pause between a session's turns")
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="p99 turn latency target")
+    parser.add_argument("--url", help="load a running server instead of an in-process one")
+    parser.add_argument("--server-pid", type=int, help="with --url: server process to read CPU time from")
+    parser.add_argument("--llm-workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=32)
+    parser.add_argument("--sentiment-ms", type=float, default=20.0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=150.0)
+    parser.add_argument("--llm-token-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rows = []
+    workdir, cwd, manager, http_server = None, os.getcwd(), None, None
+    try:
+        if args.url:
+            url = urlparse(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            workdir = tempfile.mkdtemp(prefix="luma-server-bench-")
+            os.chdir(workdir)
+            http_server, manager = start_local_server(args, workdir)
+            host, port = http_server.server_address[:2]
+        for level, sessions in enumerate(args.sessions):
+            row = run_level(host, port, sessions, args.duration, args.think_ms / 1000.0,
+                            args.server_pid if args.url else None, level)
+            rows.append(row)
+            print(f"{sessions} sessions: {row['turns_per_s']:.1f} turns/s, p99 {row['p99_ms']:.0f} ms", flush=True)
+        if manager is not None:
+            lanes = manager.pool.stats()
+            print("lanes:", {name: {"mean_batch": round(s["mean_batch"], 1), "rejected": s["rejected"]}
+                             for name, s in lanes.items()})
+    finally:
+        if http_server is not None:
+            http_server.shutdown()
+            manager.close_all()
+        os.chdir(cwd)
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(rows, ["sessions", "turns_per_s", "p50_ms", "p99_ms", "shed", "failed", "cores", "sessions_per_core"])
+    within = [row["sessions"] for row in rows
+              if row["p99_ms"] <= args.slo_ms and row["shed"] == 0 and row["failed"] == 0]
+    if within and (args.server_pid or not args.url):
+        best = max(within)
+        cores = next(row["cores"] for row in rows if row["sessions"] == best)
+        print(f"\nUp to {best} sessions within p99 <= {args.slo_ms:.0f} ms, using {cores:.2f} cores "
+              f"(~{best / max(cores, 1e-9):.1f} sessions per core busy; {os.cpu_count()} cores available)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# bench_storage.py
+"""
+Per-write cost of the mood log as it grows: the original load/append/rewrite JSON
+file versus the JSON-lines AppendLog. Runs in a temporary directory.
+
+Usage: python bench_storage.py [--sizes 1000 10000 100000] [--writes 200] [--legacy-max 10000]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from benchutil import print_table, summarize
+from storage import AppendLog
+
+
+def legacy_log_mood(path, mood):
+    """The original memory.log_mood: read the whole list, append, rewrite with indent=4."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            moods = json.load(f)
+    except FileNotFoundError:
+        moods = []
+    moods.append({"timestamp": datetime.now().isoformat(), "mood": mood})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(moods, f, indent=4)
+
+
+def prefill(n):
+    now = datetime.now().isoformat()
+    return [{"timestamp": now, "mood": "Neutral"} for _ in range(n)]
+
+
+def measure(write, writes):
+    latencies = []
+    for i in range(writes):
+        start = time.perf_counter()
+        write("Happy" if i % 2 else "Sad")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--legacy-max", type=int, default=10000,
+                        help="skip the legacy backend above this size (it is O(n) per write)")
+    parser.add_argument("--fsync", action="store_true", help="fsync every append")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            records = prefill(size)
+
+            log = AppendLog(os.path.join(tmp, f"mood_{size}.jsonl"), fsync=args.fsync)
+            log.rewrite(records)
+            lat = measure(lambda m: log.append({"timestamp": datetime.now().isoformat(), "mood": m}),
+                          args.writes)
+            row = {"backend": "append log", "entries": size}
+            row.update(summarize(lat))
+            rows.append(row)
+
+            start = time.perf_counter()
+            log.last()
+            rows.append({"backend": "append log last()", "entries": size, "count": 1,
+                         "mean_ms": 1000.0 * (time.perf_counter() - start)})
+
+            if size <= args.legacy_max:
+                path = os.path.join(tmp, f"mood_{size}.json")
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(records, f, indent=4)
+                lat = measure(lambda m: legacy_log_mood(path, m), args.writes)
+                row = {"backend": "legacy json", "entries": size}
+                row.update(summarize(lat))
+                rows.append(row)
+
+    print_table(rows, ["backend", "entries", "count", "mean_ms", "p50_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
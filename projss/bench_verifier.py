@@ -0,0 +1,105 @@
+# bench_verifier.py
+"""
+Speaker verification latency and accuracy: the whole-clip check (identify on the
+finished recording) versus the streaming verifier fed frame by frame.
+
+Genuine probes are the bundled WAVs. Unless --impostors is given, impostor probes
+are the same clips pitch-shifted up (resampled), a rough stand-in for another voice.
+Decision time is measured from the start of speech, assuming audio arrives in real
+time: the whole-clip check can only start once the clip ends.
+
+Usage: python bench_verifier.py [--reference my_voice_sample.wav] [--genuine a.wav ...]
+                                [--impostors DIR] [--realtime] [--threshold 0.75]
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import models
+from auth import VoiceAuthenticator
+from benchutil import print_table, summarize
+from verifier import SAMPLE_RATE, StreamingVerifier
+from wakeword import load_wav, resample
+
+GENUINE = ["temp_auth.wav", "temp_test.wav"]  # temp_wake_audio.wav is digital silence
+
+
+def pitch_shift(samples, factor=1.25):
+    """Play the clip `factor` times faster: higher pitch, shorter clip."""
+    return resample(samples, SAMPLE_RATE, int(SAMPLE_RATE / factor))
+
+
+def run_streaming(authenticator, samples, realtime, chunk_seconds=0.1):
+    verifier = StreamingVerifier(authenticator)
+    step = int(chunk_seconds * SAMPLE_RATE)
+    start = time.perf_counter()
+    for offset in range(0, len(samples), step):
+        verifier.feed(samples[offset:offset + step])
+        if realtime:
+            time.sleep(chunk_seconds)
+        if verifier.future.done():
+            break
+    fed = time.perf_counter()
+    decision = verifier.finish().result()
+    done = time.perf_counter()
+    if realtime:
+        at = done - start
+    else:
+        # Audio needed for the decision plus the work that could not overlap with it
+        at = decision.audio_seconds + max(0.0, done - fed)
+    return decision, at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reference", default="my_voice_sample.wav")
+    parser.add_argument("--genuine", nargs="*", default=GENUINE)
+    parser.add_argument("--impostors", help="directory of WAVs from other speakers")
+    parser.add_argument("--threshold", type=float, default=0.75)
+    parser.add_argument("--realtime", action="store_true", help="feed the streaming verifier at real-time pace")
+    args = parser.parse_args()
+
+    probes = [(path, load_wav(path), True) for path in args.genuine if os.path.exists(path)]
+    if args.impostors:
+        probes += [(path, load_wav(path), False) for path in sorted(glob.glob(os.path.join(args.impostors, "*.wav")))]
+    else:
+        probes += [(f"{path} (pitch x1.25)", pitch_shift(samples), False) for path, samples, _ in list(probes)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        authenticator = VoiceAuthenticator(args.reference, threshold=args.threshold,
+                                           encoder_loader=models.resource("speaker_encoder").get,
+                                           cache_path=os.path.join(tmp, "voice_embeddings"))
+        authenticator.load_index()  # enrollment and model load are not part of the comparison
+
+        rows, whole_at, stream_at = [], [], []
+        correct = {"whole clip": 0, "streaming": 0}
+        for name, samples, genuine in probes:
+            duration = len(samples) / SAMPLE_RATE
+            start = time.perf_counter()
+            match = authenticator.identify(samples, sample_rate=SAMPLE_RATE)
+            whole = duration + time.perf_counter() - start
+            decision, streamed = run_streaming(authenticator, samples, args.realtime)
+            correct["whole clip"] += match.accepted == genuine
+            correct["streaming"] += decision.accepted == genuine
+            whole_at.append(whole)
+            stream_at.append(streamed)
+            rows.append({
+                "clip": name, "genuine": genuine, "seconds": duration,
+                "whole_score": match.score, "whole_at_s": whole,
+                "stream_score": decision.score, "stream_at_s": streamed,
+                "early": decision.early, "windows": decision.windows,
+            })
+
+    print_table(rows, ["clip", "genuine", "seconds", "whole_score", "whole_at_s",
+                       "stream_score", "stream_at_s", "early", "windows"])
+    print()
+    for name, latencies in (("whole clip", whole_at), ("streaming", stream_at)):
+        stats = summarize(latencies)
+        print(f"{name}: accuracy {correct[name]}/{len(probes)}, decision at "
+              f"p50 {stats['p50_ms'] / 1000:.2f}s, max {stats['max_ms'] / 1000:.2f}s from start of speech")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# bench_wakeword.py
+"""
+False accept / false reject rates, detection latency and CPU load of the wake-word detector.
+
+With --templates/--positives/--negatives you can point it at real recordings (each positive
+clip contains the wake phrase, negatives contain none). Without them it builds a
+synthetic fixture set from the bundled WAVs: a 0.8 s stretch of temp_test.wav is used
+as the "wake phrase", and positives re-embed it in noise with different gain and speed.
+
+Usage: python bench_wakeword.py [--templates t.npz] [--positives a.wav ...] [--negatives b.wav ...]
+                                [--threshold 0.85 0.9 0.95] [--chunk-ms 100]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchutil import print_table, summarize
+from wakeword import (SAMPLE_RATE, THRESHOLD, WakeWordDetector, enroll, features, load_templates, load_wav,
+                      resample, trim_to_speech)
+
+
+def embed(clip, rng, lead=1.0, tail=1.0, noise_rms=0.001, gain=1.0):
+    """Place clip between noise segments; returns (samples, end of clip in seconds)."""
+    pre = rng.normal(0, noise_rms, int(lead * SAMPLE_RATE)).astype(np.float32)
+    post = rng.normal(0, noise_rms, int(tail * SAMPLE_RATE)).astype(np.float32)
+    body = clip * gain + rng.normal(0, noise_rms, len(clip)).astype(np.float32)
+    return np.concatenate((pre, body, post)), (len(pre) + len(body)) / SAMPLE_RATE
+
+
+def synthetic_fixtures(rng):
+    source = load_wav("temp_test.wav")
+    feats, energy = features(source)
+    loud = np.nonzero(energy > energy.max() - 15)[0]
+    start = loud[0] * 160
+    keyword = source[start:start + int(0.8 * SAMPLE_RATE)]
+    # Enroll from noisy takes, as real enrollment clips come from the same microphone
+    templates = enroll([embed(keyword, rng, lead=0.3, tail=0.3)[0],
+                        embed(resample(keyword, SAMPLE_RATE, int(SAMPLE_RATE * 1.05)), rng, lead=0.3, tail=0.3)[0]])
+    positives = []
+    for speed in (0.9, 0.95, 1.0, 1.05, 1.1):
+        for gain in (0.5, 1.0, 2.0):
+            clip = resample(keyword, SAMPLE_RATE, int(SAMPLE_RATE / speed))
+            positives.append(embed(clip, rng, gain=gain))
+    clips = [load_wav(p) for p in ("temp_auth.wav", "my_voice_sample.wav", "temp_wake_audio.wav")]
+    # The rest of temp_test.wav (after the keyword) is a hard negative: same speaker, same session
+    clips.append(source[start + int(1.0 * SAMPLE_RATE):])
+    negatives = [embed(clip, rng, gain=gain)[0] for gain in (0.5, 1.0, 2.0) for clip in clips]
+    return templates, positives, negatives
+
+
+def stream(detector, samples, chunk):
+    """Feed samples in chunks; return (detections, per-chunk wall latencies)."""
+    detector.reset()
+    hits, latencies = [], []
+    for start in range(0, len(samples), chunk):
+        t0 = time.perf_counter()
+        hit = detector.process(samples[start:start + chunk])
+        latencies.append(time.perf_counter() - t0)
+        if hit is not None:
+            hits.append(hit)
+    return hits, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--templates")
+    parser.add_argument("--positives", nargs="*", default=[])
+    parser.add_argument("--negatives", nargs="*", default=[])
+    parser.add_argument("--threshold", type=float, nargs="+", default=[THRESHOLD],
+                        help="one result row per threshold")
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.templates:
+        templates = load_templates(args.templates)
+        positives = []
+        for path in args.positives:
+            samples = load_wav(path)
+            feats, energy = features(samples)
+            speech = trim_to_speech(np.arange(len(energy)), energy, pad=0)
+            end = (speech[-1] * 160 + 400) / SAMPLE_RATE if len(speech) else len(samples) / SAMPLE_RATE
+            positives.append((samples, end))
+        negatives = [load_wav(p) for p in args.negatives]
+    else:
+        templates, positives, negatives = synthetic_fixtures(rng)
+
+    chunk = SAMPLE_RATE * args.chunk_ms // 1000
+    negative_seconds = sum(len(samples) for samples in negatives) / SAMPLE_RATE
+    rows = []
+    for threshold in args.threshold:
+        detector = WakeWordDetector(templates, threshold=threshold)
+        detected, delays, chunk_lat = 0, [], []
+        for samples, keyword_end in positives:
+            hits, lat = stream(detector, samples, chunk)
+            chunk_lat += lat
+            if hits:
+                detected += 1
+                # Negative when it fires before the clip's trailing edge (the tail is often silence)
+                delays.append(hits[0].time - keyword_end)
+
+        false_accepts = 0
+        for samples in negatives:
+            hits, lat = stream(detector, samples, chunk)
+            chunk_lat += lat
+            false_accepts += len(hits)
+
+        rows.append({
+            "threshold": threshold,
+            "positives": len(positives),
+            "false_reject_rate": 1.0 - detected / len(positives) if positives else 0.0,
+            "false_accepts": false_accepts,
+            "fa_per_hour": false_accepts * 3600.0 / negative_seconds if negative_seconds else 0.0,
+            "delay_p50_ms": summarize(delays)["p50_ms"],
+            "delay_max_ms": summarize(delays)["max_ms"],
+            "cpu_load_pct": 100.0 * detector.cpu_load,
+            "chunk_p99_ms": summarize(chunk_lat)["p99_ms"],
+        })
+    print_table(rows, list(rows[0]))
+    # One false accept in this much negative audio is the smallest nonzero FA/h measurable
+    print(f"{negative_seconds:.0f}s of negative audio (1 false accept = "
+          f"{3600.0 / max(negative_seconds, 1e-9):.0f}/h); cpu_load_pct is the detector thread's CPU time")
+
+if __name__ == "__main__":
+    main()
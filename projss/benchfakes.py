@@ -0,0 +1,372 @@
+# benchfakes.py
+import io
+import os
+import queue
+import tempfile
+import sys
+import threading
+import time
+import types
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+import speech_recognition as sr
+
+# Local stand-ins for the microphone, Google ASR, Ollama, gTTS, the pygame mixer, the
+# sentence embedder and the desktop side effects (pyautogui, os.system, the browser, launched
+# apps), with configurable injected latencies. install() patches them in before assistant.py is imported,
+# so the real dispatch code runs unchanged. Used by bench_e2e.py.
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+CHUNK = 1024
+NOISE_RMS = 15
+TRAILING_SILENCE = 1.2  # longer than the recognizer's pause_threshold, so each phrase ends
+
+
+class Latencies:
+    """Injected delays in seconds (playback is seconds of audio per spoken character)."""
+
+    def __init__(self, asr: float = 0.05, llm_first_token: float = 0.05, llm_token: float = 0.005,
+                 tts: float = 0.02, playback_per_char: float = 0.0, sentiment: float = 0.01,
+                 embed: float = 0.005, mic_speed: float = 0.0):
+        self.asr = asr
+        self.llm_first_token = llm_first_token
+        self.llm_token = llm_token
+        self.tts = tts
+        self.playback_per_char = playback_per_char
+        self.sentiment = sentiment
+        self.embed = embed
+        self.mic_speed = mic_speed  # 1.0 plays scripted speech in real time, 0 as fast as it can be read
+
+    def as_dict(self) -> Dict[str, float]:
+        return dict(vars(self))
+
+
+def noise(seconds: float, rng: np.random.Generator, rms: float = NOISE_RMS) -> bytes:
+    samples = rng.normal(0.0, rms, int(seconds * SAMPLE_RATE))
+    return samples.astype(np.int16).tobytes()
+
+
+def load_wav_frames(path: str) -> bytes:
+    """16 kHz mono 16-bit PCM frames of a WAV file (converted if needed)."""
+    with sr.AudioFile(path) as source:
+        audio = sr.Recognizer().record(source)
+    return audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=SAMPLE_WIDTH)
+
+
+# ----------- MICROPHONE + ASR -------------------
+
+class ScriptedSpeech:
+    """What the fake microphone will "hear" next, and the transcript ASR returns for it."""
+
+    def __init__(self, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.audio: "queue.Queue[bytes]" = queue.Queue()
+        self.transcripts: "queue.Queue[str]" = queue.Queue()
+
+    def say(self, frames: bytes, text: str) -> None:
+        self.transcripts.put(text)
+        self.audio.put(frames + noise(TRAILING_SILENCE, self.rng))
+
+    def next_transcript(self) -> Optional[str]:
+        try:
+            return self.transcripts.get_nowait()
+        except queue.Empty:
+            return None
+
+
+class FakeMicrophone(sr.AudioSource):
+    """
+    Stand-in for sr.Microphone. Between scripted phrases it produces low background
+    noise at real-time pace (like an idle mic); scripted speech is read at
+    `mic_speed` times real time.
+    """
+
+    speech: Optional[ScriptedSpeech] = None
+    latencies: Optional[Latencies] = None
+
+    def __init__(self, device_index=None, sample_rate=None, chunk_size=CHUNK):
+        self.SAMPLE_RATE = SAMPLE_RATE
+        self.SAMPLE_WIDTH = SAMPLE_WIDTH
+        self.CHUNK = chunk_size
+        self.stream = None
+        self._buffer = b""
+        self._closed = False
+
+    def __enter__(self):
+        self._closed = False
+        self.stream = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._closed = True
+        self.stream = None
+
+    def read(self, frames: int) -> bytes:
+        size = frames * SAMPLE_WIDTH
+        seconds = frames / SAMPLE_RATE
+        if self._closed:
+            return b""
+        if not self._buffer:
+            try:
+                self._buffer = self.speech.audio.get_nowait()
+            except queue.Empty:
+                time.sleep(seconds)
+                return noise(seconds, self.speech.rng)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        if len(chunk) < size:
+            chunk += noise((size - len(chunk)) / (SAMPLE_RATE * SAMPLE_WIDTH), self.speech.rng)
+        if self.latencies.mic_speed:
+            time.sleep(seconds * self.latencies.mic_speed)
+        return chunk
+
+
+def make_recognize_google(speech: ScriptedSpeech, latencies: Latencies):
+    def recognize_google(self, audio_data, key=None, language="en-US", **kwargs):
+        time.sleep(latencies.asr)
+        text = speech.next_transcript()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+    return recognize_google
+
+
+# ----------- LLM -------------------
+
+class FakeOllama:
+    """ollama.chat stand-in: replies with a canned multi-sentence answer, token by token."""
+
+    REPLY = ("Sure, here is what I think. It depends a little on your day, but a short walk usually helps. "
+             "Want me to remind you later?")
+
+    def __init__(self, latencies: Latencies):
+        self.latencies = latencies
+        self.calls = 0
+
+    def _tokens(self) -> List[str]:
+        return [word + " " for word in self.REPLY.split(" ")]
+
+    def chat(self, model=None, messages=None, stream=False, **kwargs):
+        self.calls += 1
+        if stream:
+            return self._stream()
+        time.sleep(self.latencies.llm_first_token + self.latencies.llm_token * len(self._tokens()))
+        return {"message": {"role": "assistant", "content": self.REPLY}}
+
+    def _stream(self):
+        time.sleep(self.latencies.llm_first_token)
+        for token in self._tokens():
+            yield {"message": {"role": "assistant", "content": token}}
+            time.sleep(self.latencies.llm_token)
+
+
+# ----------- TTS + MIXER -------------------
+
+def make_gtts(latencies: Latencies):
+    class FakeGTTS:
+        """gTTS stand-in: 'MP3' bytes that encode the text, so the mixer can size playback."""
+
+        def __init__(self, text, lang="en", **kwargs):
+            self.text = text
+            self.lang = lang
+
+        def write_to_fp(self, fp):
+            time.sleep(latencies.tts)
+            fp.write(b"FAKEMP3" + self.text.encode("utf-8"))
+
+    return FakeGTTS
+
+
+class FakeChannel:
+    def stop(self) -> None:
+        pass
+
+
+class FakeMixer:
+    """pygame.mixer stand-in. Sounds last playback_per_char seconds per character."""
+
+    def __init__(self, latencies: Latencies):
+        self.latencies = latencies
+        self.first_play: Optional[float] = None  # reset by the harness at the start of each turn
+        self.plays = 0
+        mixer = self
+
+        class Sound:
+            def __init__(self, file=None, buffer=None):
+                data = file.read() if isinstance(file, io.IOBase) else (buffer or b"")
+                self.length = max(0, len(data) - len(b"FAKEMP3")) * mixer.latencies.playback_per_char
+
+            def get_length(self) -> float:
+                return self.length
+
+            def play(self) -> FakeChannel:
+                mixer.plays += 1
+                if mixer.first_play is None:
+                    mixer.first_play = time.perf_counter()
+                return FakeChannel()
+
+        self.Sound = Sound
+
+    def init(self) -> None:
+        pass
+
+
+# ----------- EMBEDDINGS -------------------
+
+class HashingEmbedder:
+    """sentence-transformers stand-in: hashed bag of words, so similar texts still score high."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def encode(self, texts, normalize_embeddings=True):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[i, zlib.crc32(word.strip(".,!?").encode("utf-8")) % self.dim] += 1.0
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        return vectors
+
+
+# ----------- DESKTOP SIDE EFFECTS -------------------
+
+class SideEffects:
+    """Records what pyautogui / os.system / the browser would have done."""
+
+    def __init__(self):
+        self.calls: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, name: str, *args) -> None:
+        with self._lock:
+            self.calls.append(f"{name}{args}")
+
+    def module(self, real=None) -> types.ModuleType:
+        module = real or types.ModuleType("pyautogui")
+        for name in ("press", "screenshot", "scroll", "click", "doubleClick"):
+            setattr(module, name, lambda *args, _name=name, **kwargs: self.record(_name, *args))
+        return module
+
+    def system(self, cmd: str) -> int:
+        self.record("os.system", cmd)
+        return 0
+
+    def browser(self, name=None):
+        effects = self
+
+        class Browser:
+            def open(self, url, *args, **kwargs):
+                effects.record("browser.open", url)
+                return True
+
+        return Browser()
+
+
+def _module(name: str) -> types.ModuleType:
+    """The real module if it imports here, otherwise an empty stand-in registered under its name."""
+    try:
+        __import__(name)
+        return sys.modules[name]
+    except Exception:  # missing, or pyautogui without a display
+        module = types.ModuleType(name)
+        sys.modules[name] = module
+        return module
+
+
+class StandIns:
+    def __init__(self, latencies: Latencies, speech: ScriptedSpeech, ollama: FakeOllama,
+                 mixer: FakeMixer, effects: SideEffects):
+        self.latencies = latencies
+        self.speech = speech
+        self.ollama = ollama
+        self.mixer = mixer
+        self.effects = effects
+
+
+def install(latencies: Latencies, seed: int = 0) -> StandIns:
+    """Patch every external service; call before importing assistant.py."""
+    import webbrowser
+
+    import models
+    import procman
+    from commands import APP_COMMANDS
+
+    speech = ScriptedSpeech(seed)
+    FakeMicrophone.speech = speech
+    FakeMicrophone.latencies = latencies
+    sr.Microphone = FakeMicrophone
+    sr.Recognizer.recognize_google = make_recognize_google(speech, latencies)
+
+    ollama = FakeOllama(latencies)
+    _module("ollama").chat = ollama.chat
+    _module("gtts").gTTS = make_gtts(latencies)
+
+    mixer = FakeMixer(latencies)
+    models.register("mixer", lambda: mixer)
+    models.register("embedder", HashingEmbedder)
+
+    effects = SideEffects()
+    effects.module(_module("pyautogui"))
+    os.system = effects.system
+    webbrowser.get = effects.browser
+    apps = APP_COMMANDS.get(sys.platform, APP_COMMANDS["linux"])
+    procman._manager = procman.ProcessManager(procman.write_stub_apps(tempfile.mkdtemp(prefix="luma-apps-"), apps))
+    return StandIns(latencies, speech, ollama, mixer, effects)
+
+
+def write_back() -> None:
+    """
+    Flush the chat history and long-term memory that assistant.py writes in the
+    background, so it lands in the bench's working directory before that is left.
+    """
+    context = sys.modules.get("context")
+    if context is not None and context._store is not None:
+        context._store.flush()
+    longterm = sys.modules.get("longterm")
+    if longterm is not None and longterm._memory is not None:
+        longterm._memory.close()
+
+
+def stand_in_authenticator(reference_audio_path: str, latencies: Latencies, threshold: float = 0.75):
+    """VoiceAuthenticator whose encoder returns one fixed embedding, so every clip is the owner."""
+    from auth import VoiceAuthenticator
+
+    embedding = np.ones(256, dtype=np.float32) / np.sqrt(256)
+
+    class Encoder:
+        def embed_utterance(self, wav):
+            time.sleep(latencies.embed)
+            return embedding
+
+    class StandInAuthenticator(VoiceAuthenticator):
+        def _embed_audio(self, audio, sample_rate=None):
+            return self.encoder.embed_utterance(audio)
+
+    return StandInAuthenticator(reference_audio_path, threshold, encoder_loader=Encoder)
+
+
+def stand_in_sentiment(latencies: Latencies):
+    """SentimentEngine with the real batching and cache, but a keyword rule instead of BERT."""
+    from sentiment import SentimentEngine
+
+    class StandInSentiment(SentimentEngine):
+        def _infer(self, texts):
+            time.sleep(latencies.sentiment)
+            moods = []
+            for text in texts:
+                words = set(text.lower().split())
+                if words & {"sad", "lonely", "tired", "down"}:
+                    moods.append("Sad")
+                elif words & {"angry", "frustrating", "annoyed"}:
+                    moods.append("Angry")
+                elif words & {"happy", "great", "awesome", "thanks"}:
+                    moods.append("Happy")
+                else:
+                    moods.append("Neutral")
+            return moods
+
+    return StandInSentiment()
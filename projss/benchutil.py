@@ -0,0 +1,56 @@
+# benchutil.py
+import json
+import math
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+# Small helpers shared by the bench_*.py scripts
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (pct in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(math.ceil(pct / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: Sequence[float]) -> Dict[str, float]:
+    """Return count, mean, p50, p99 and max of latencies given in seconds, in ms."""
+    if not latencies:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    return {
+        "count": len(latencies),
+        "mean_ms": 1000.0 * sum(latencies) / len(latencies),
+        "p50_ms": 1000.0 * percentile(latencies, 50),
+        "p99_ms": 1000.0 * percentile(latencies, 99),
+        "max_ms": 1000.0 * max(latencies),
+    }
+
+
+def time_calls(fn: Callable[[Any], Any], inputs: Sequence[Any]) -> List[float]:
+    """Call fn on every input and return the per-call latency in seconds."""
+    latencies = []
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def print_table(rows: List[Dict[str, Any]], columns: Sequence[str]) -> None:
+    """Print rows of dicts as a plain aligned table."""
+    def fmt(value):
+        return f"{value:.3f}" if isinstance(value, float) else str(value)
+
+    widths = [max(len(c), *(len(fmt(r.get(c, ""))) for r in rows)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(fmt(row.get(c, "")).ljust(w) for c, w in zip(columns, widths)))
+
+
+def write_results(path: str, results: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"Results written to {path}")
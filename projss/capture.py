@@ -0,0 +1,164 @@
+# capture.py
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+import speech_recognition as sr
+
+import tracing
+
+# Long-lived microphone capture: the input stream is opened and calibrated once,
+# the energy threshold keeps adapting while listening, and finished phrases are
+# handed to recognition through a queue.
+
+CALIBRATION_SECONDS = 1.0
+PHRASE_TIME_LIMIT = 10
+
+
+class CapturedPhrase:
+    """One finished phrase and the time listen() returned it (about pause_threshold after speech ended)."""
+
+    def __init__(self, audio: sr.AudioData, captured_at: float, stream_position: Optional[float] = None):
+        self.audio = audio
+        self.captured_at = captured_at
+        # Seconds of audio read from the source so far, if the source reports it (WAV fixtures do)
+        self.stream_position = stream_position
+
+
+class CaptureSession:
+    """
+    Keeps one audio source open and listens continuously on a background thread.
+
+    :param source_factory: Builds the audio source (sr.Microphone by default).
+    :param recognizer: Shared recognizer; its energy threshold is calibrated once and
+                       then adapted continuously (dynamic_energy_threshold).
+    :param wake_detector: Optional wakeword.WakeWordDetector. When set, raw frames go to the
+                          detector first and only the phrase after a detected wake word is queued.
+    :param on_wake: Called when the wake word is detected (e.g. to barge in on playback).
+    """
+
+    def __init__(
+        self,
+        source_factory: Callable[[], sr.AudioSource] = sr.Microphone,
+        recognizer: Optional[sr.Recognizer] = None,
+        calibration_seconds: float = CALIBRATION_SECONDS,
+        phrase_time_limit: Optional[float] = PHRASE_TIME_LIMIT,
+        max_queued: int = 8,
+        wake_detector=None,
+        on_wake: Optional[Callable[[], None]] = None,
+    ):
+        self.source_factory = source_factory
+        self.recognizer = recognizer or sr.Recognizer()
+        self.recognizer.dynamic_energy_threshold = True
+        self.calibration_seconds = calibration_seconds
+        self.phrase_time_limit = phrase_time_limit
+        self.phrases: "queue.Queue[CapturedPhrase]" = queue.Queue(maxsize=max_queued)
+        self.source: Optional[sr.AudioSource] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.calibration_time: Optional[float] = None
+        self.wake_detector = wake_detector
+        self.on_wake = on_wake
+
+    def start(self) -> None:
+        """Open the source, calibrate once, and start listening in the background."""
+        if self._thread is not None:
+            return
+        self.source = self.source_factory()
+        self.source.__enter__()
+        start = time.perf_counter()
+        with tracing.span("capture.calibrate"):
+            self.recognizer.adjust_for_ambient_noise(self.source, duration=self.calibration_seconds)
+        self.calibration_time = time.perf_counter() - start
+        print(f"[capture.py] Calibrated energy threshold {self.recognizer.energy_threshold:.0f} "
+              f"in {self.calibration_time:.2f}s")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self._thread.start()
+
+    @property
+    def wake_gated(self) -> bool:
+        return self.wake_detector is not None
+
+    def _wait_for_wake(self) -> bool:
+        """Feed raw frames to the wake-word detector until it fires; False if the source ends."""
+        self.wake_detector.reset()
+        while not self._stop.is_set():
+            chunk = self.source.stream.read(self.source.CHUNK)
+            if not chunk:
+                return False
+            samples = np.frombuffer(chunk, dtype=np.int16)
+            if self.wake_detector.process(samples, self.source.SAMPLE_RATE) is not None:
+                print(f"[capture.py] Wake word detected (score {self.wake_detector.last_score:.2f})")
+                if self.on_wake is not None:
+                    self.on_wake()
+                return True
+        return False
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.wake_detector is not None and not self._wait_for_wake():
+                    return
+                audio = self.recognizer.listen(self.source, phrase_time_limit=self.phrase_time_limit)
+            except Exception as e:
+                if self._stop.is_set():
+                    return
+                print(f"[capture.py] Listen error: {e}")
+                time.sleep(0.2)
+                continue
+            if audio.frame_data:
+                self._put(CapturedPhrase(audio, time.perf_counter(), getattr(self.source, "position", None)))
+            if not audio.frame_data or getattr(self.source, "exhausted", False):
+                # Source exhausted (e.g. a WAV fixture)
+                return
+
+    def _put(self, phrase: CapturedPhrase) -> None:
+        try:
+            self.phrases.put_nowait(phrase)
+        except queue.Full:
+            # Recognition is falling behind: drop the oldest phrase rather than block the mic
+            try:
+                self.phrases.get_nowait()
+            except queue.Empty:
+                pass
+            self.phrases.put_nowait(phrase)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[CapturedPhrase]:
+        """Return the next finished phrase, or None on timeout."""
+        if self._thread is None:
+            self.start()
+        try:
+            return self.phrases.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def listen(self) -> Optional[sr.AudioData]:
+        """Blocking drop-in for the old per-call listen(): returns the next phrase's audio."""
+        phrase = self.get()
+        return phrase.audio if phrase is not None else None
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.source is not None:
+            try:
+                self.source.__exit__(None, None, None)
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+
+_session: Optional[CaptureSession] = None
+
+
+def get_session(**kwargs) -> CaptureSession:
+    """Return the shared microphone session, opening it on first use (kwargs apply then)."""
+    global _session
+    if _session is None:
+        _session = CaptureSession(**kwargs)
+        _session.start()
+    return _session
@@ -0,0 +1,152 @@
+# commands.py
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from intents import IntentRouter
+
+# The assistant's command table: which phrases trigger which intent, and the
+# apps that can be opened or closed, with the per-platform commands procman.py runs
+# for them. assistant.py attaches a handler to each intent.
+
+chrome_path = r"C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe"
+
+# App -> what the assistant says; the router's "app" / "running_app" slots
+APP_OPEN_MAP = {
+    "chrome": "Opening Google Chrome",
+    "youtube": "Opening YouTube Shortcut",
+    "calculator": "Opening Calculator",
+    "notepad": "Opening Notepad",
+    "paint": "Opening Paint",
+    "camera": "Opening Camera",
+    "explorer": "Opening File Explorer",
+    "settings": "Opening Settings",
+    "vlc": "Opening VLC Media Player",
+    "spotify": "Opening Spotify",
+    "vs code": "Opening Visual Studio Code",
+    "visual studio code": "Opening Visual Studio Code",
+    "word": "Opening Microsoft Word",
+    "excel": "Opening Microsoft Excel",
+    "powerpoint": "Opening Microsoft PowerPoint",
+    "task manager": "Opening Task Manager",
+    "control panel": "Opening Control Panel",
+}
+
+APP_CLOSE_MAP = {
+    "calculator": "Closing Calculator",
+    "notepad": "Closing Notepad",
+    "paint": "Closing Paint",
+    "camera": "Closing Camera",
+    "chrome": "Closing Chrome",
+    "youtube": "Closing YouTube",
+    "vlc": "Closing VLC",
+    "spotify": "Closing Spotify",
+    "vs code": "Closing Visual Studio Code",
+    "visual studio code": "Closing Visual Studio Code",
+    "word": "Closing Word",
+    "excel": "Closing Excel",
+    "powerpoint": "Closing PowerPoint",
+    "task manager": "Closing Task Manager",
+    "explorer": "Restarting Explorer",
+    "file explorer": "Restarting Explorer",
+    "settings": "Closing Settings",
+    "control panel": "Closing Control Panel",
+}
+
+
+class AppCommand(NamedTuple):
+    """
+    How one app is started and found on one platform (see procman.py).
+
+    launch:    argv run without a shell, or a string (URI, shortcut, app alias) handed to
+               the desktop's default handler (os.startfile / xdg-open); None if close-only.
+    processes: executable names to look for in the process table when closing.
+    restart:   closing restarts the app instead (the desktop shell itself).
+    """
+    launch: Union[List[str], str, None]
+    processes: Tuple[str, ...] = ()
+    restart: bool = False
+
+
+_WINDOWS_APPS = {
+    "chrome": AppCommand([r"C:\Program Files\Google\Chrome\Application\chrome.exe"], ("chrome.exe",)),
+    "youtube": AppCommand(r"C:\Users\Moorthy\OneDrive\Desktop\YouTube.lnk", ("chrome.exe",)),
+    "calculator": AppCommand(["calc.exe"], ("CalculatorApp.exe",)),
+    "notepad": AppCommand(["notepad.exe"], ("notepad.exe",)),
+    "paint": AppCommand(["mspaint.exe"], ("mspaint.exe",)),
+    "camera": AppCommand("microsoft.windows.camera:", ("WindowsCamera.exe",)),
+    "explorer": AppCommand(["explorer.exe"], ("explorer.exe",), restart=True),
+    "file explorer": AppCommand(["explorer.exe"], ("explorer.exe",), restart=True),
+    "settings": AppCommand("ms-settings:", ("SystemSettings.exe",)),
+    "vlc": AppCommand([r"C:\Program Files\VideoLAN\VLC\vlc.exe"], ("vlc.exe",)),
+    "spotify": AppCommand("spotify:", ("Spotify.exe",)),
+    "vs code": AppCommand(["code"], ("Code.exe",)),
+    "visual studio code": AppCommand(["code"], ("Code.exe",)),
+    # Office registers App Paths, which only the shell's default handler resolves
+    "word": AppCommand("winword", ("WINWORD.EXE",)),
+    "excel": AppCommand("excel", ("EXCEL.EXE",)),
+    "powerpoint": AppCommand("powerpnt", ("POWERPNT.EXE",)),
+    "task manager": AppCommand(["taskmgr.exe"], ("Taskmgr.exe",)),
+    "control panel": AppCommand(["control.exe"], ("control.exe",)),
+}
+
+# GNOME / LibreOffice equivalents
+_LINUX_APPS = {
+    "chrome": AppCommand(["google-chrome"], ("chrome",)),
+    "youtube": AppCommand("https://www.youtube.com/", ("chrome",)),
+    "calculator": AppCommand(["gnome-calculator"], ("gnome-calculator",)),
+    "notepad": AppCommand(["gedit"], ("gedit",)),
+    "paint": AppCommand(["pinta"], ("pinta",)),
+    "camera": AppCommand(["cheese"], ("cheese",)),
+    "explorer": AppCommand(["nautilus"], ("nautilus",), restart=True),
+    "file explorer": AppCommand(["nautilus"], ("nautilus",), restart=True),
+    "settings": AppCommand(["gnome-control-center"], ("gnome-control-center",)),
+    "vlc": AppCommand(["vlc"], ("vlc",)),
+    "spotify": AppCommand(["spotify"], ("spotify",)),
+    "vs code": AppCommand(["code"], ("code",)),
+    "visual studio code": AppCommand(["code"], ("code",)),
+    "word": AppCommand(["libreoffice", "--writer"], ("soffice.bin",)),
+    "excel": AppCommand(["libreoffice", "--calc"], ("soffice.bin",)),
+    "powerpoint": AppCommand(["libreoffice", "--impress"], ("soffice.bin",)),
+    "task manager": AppCommand(["gnome-system-monitor"], ("gnome-system-monitor",)),
+    "control panel": AppCommand(["gnome-control-center"], ("gnome-control-center",)),
+}
+
+# sys.platform -> app -> AppCommand
+APP_COMMANDS: Dict[str, Dict[str, AppCommand]] = {
+    "win32": _WINDOWS_APPS,
+    "linux": _LINUX_APPS,
+}
+
+SOCIAL_SITES = ["facebook", "instagram", "whatsapp", "discord", "chatgpt", "youtube"]
+
+# (intent, phrases, slot) in priority order: when two matches are equally long,
+# the intent listed first wins, as in the old if/elif chain.
+COMMAND_INTENTS = [
+    ("social_media", SOCIAL_SITES, None),
+    ("schedule", ["university time table", "time table", "timetable", "schedule"], None),
+    ("volume_up", ["volume up", "increase volume", "increase the volume", "turn up the volume"], None),
+    ("volume_down", ["volume down", "decrease volume", "decrease the volume", "turn down the volume"], None),
+    ("mute", ["mute", "mute volume", "mute the volume"], None),
+    ("screenshot", ["screenshot", "screen shot", "take a screenshot"], None),
+    ("scroll_down", ["scroll down"], None),
+    ("scroll_up", ["scroll up"], None),
+    ("click", ["click mouse", "mouse click", "left click"], None),
+    ("double_click", ["double click"], None),
+    ("open_app", ["open", "open {app}", "launch {app}", "start {app}"], "app"),
+    ("close_app", ["close", "close {running_app}", "quit {running_app}", "kill {running_app}"], "running_app"),
+    ("mood_summary", ["how was my mood", "how is my mood", "how has my mood been", "my mood this week",
+                      "mood summary", "how have i been feeling", "how was i feeling"], None),
+    ("exit", ["exit", "bye", "goodbye", "good bye", "bye bye"], None),
+]
+
+
+def build_router(lemmatizer_loader: Optional[Callable[[], Any]] = None,
+                 open_map: Optional[Dict[str, Any]] = None,
+                 close_map: Optional[Dict[str, Any]] = None) -> IntentRouter:
+    """Compile the command table; handlers can be attached afterwards via router.intents[name].handler."""
+    router = IntentRouter(lemmatizer_loader=lemmatizer_loader)
+    router.add_slot("app", APP_OPEN_MAP if open_map is None else open_map)
+    router.add_slot("running_app", APP_CLOSE_MAP if close_map is None else close_map)
+    for name, phrases, slot in COMMAND_INTENTS:
+        router.add_intent(name, phrases, slot=slot)
+    router.compile()
+    return router
@@ -1,47 +1,165 @@
 # context.py
-import json
+import atexit
 import os
-from typing import List, Dict
+import threading
+from collections import deque
+from typing import Deque, List, Dict, Optional
+
+from storage import AppendLog, get_log, migrate_json_list
 
 CONTEXT_FOLDER = "memory"
 os.makedirs(CONTEXT_FOLDER, exist_ok=True)
-CONTEXT_FILE = os.path.join(CONTEXT_FOLDER, "chat_history.json")
-MAX_CONTEXT_TURNS = 10  # Number of dialogue pairs to keep
+# Same JSON-lines log as memory.CHAT_HISTORY_FILE, shared through storage.get_log
+CONTEXT_FILE = os.path.join(CONTEXT_FOLDER, "chat_history.jsonl")
+LEGACY_CONTEXT_FILE = os.path.join(CONTEXT_FOLDER, "chat_history.json")
+MAX_CONTEXT_TURNS = 50  # Dialogue pairs kept; prompt.py trims them to llama3's token budget
+
+def context_store() -> AppendLog:
+    return get_log(CONTEXT_FILE, max_entries=MAX_CONTEXT_TURNS)
+
+migrate_json_list(LEGACY_CONTEXT_FILE, context_store())
+
+FLUSH_DELAY = 2.0  # Seconds of quiet before pending turns are written to disk
+
+
+def _format_turn(turn: Dict[str, str]) -> str:
+    return f"User: {turn['user']}\nNova: {turn['nova']}\n"
+
+
+class ContextStore:
+    """
+    In-memory write-back cache of the rolling chat history.
+
+    History is read from disk once, kept in a bounded deque, and the formatted
+    prompt string is updated incrementally. New turns are appended to the log by
+    a debounced background flush and on interpreter exit.
+    """
+
+    def __init__(self, log: AppendLog, max_turns: int = MAX_CONTEXT_TURNS,
+                 flush_delay: float = FLUSH_DELAY):
+        self.log = log
+        self.max_turns = max_turns
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._turns: Deque[Dict[str, str]] = deque(maxlen=max_turns)
+        self._formatted: Deque[str] = deque(maxlen=max_turns)
+        self._prompt = ""
+        self._loaded = False
+        self._pending: List[Dict[str, str]] = []
+        self._needs_rewrite = False
+        self._timer: Optional[threading.Timer] = None
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                turns = self.log.tail(self.max_turns)
+            except Exception as e:
+                print(f"[context.py] Error loading context: {e}")
+                turns = []
+            self._set(turns)
+            self._loaded = True
+
+    def _set(self, turns: List[Dict[str, str]]) -> None:
+        self._turns.clear()
+        self._formatted.clear()
+        for turn in turns[-self.max_turns:]:
+            self._turns.append(turn)
+            self._formatted.append(_format_turn(turn))
+        self._prompt = "".join(self._formatted)
+
+    def history(self) -> List[Dict[str, str]]:
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._turns)
+
+    def formatted(self) -> str:
+        self._ensure_loaded()
+        return self._prompt
+
+    def add(self, user_message: str, nova_reply: str) -> None:
+        self._ensure_loaded()
+        turn = {"user": user_message, "nova": nova_reply}
+        text = _format_turn(turn)
+        with self._lock:
+            if len(self._formatted) == self.max_turns:
+                # The oldest turn falls out of the window: drop its prefix
+                self._prompt = self._prompt[len(self._formatted[0]):]
+            self._turns.append(turn)
+            self._formatted.append(text)
+            self._prompt += text
+            self._pending.append(turn)
+            self._schedule_flush()
+
+    def replace(self, history: List[Dict[str, str]]) -> None:
+        with self._lock:
+            self._set(history)
+            self._loaded = True
+            self._pending = []
+            self._needs_rewrite = True
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.flush_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self) -> None:
+        """Write pending turns to disk now."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            try:
+                if self._needs_rewrite:
+                    self.log.rewrite(list(self._turns))
+                else:
+                    self.log.extend(self._pending)
+                self._pending = []
+                self._needs_rewrite = False
+            except Exception as e:
+                print(f"[context.py] Error saving context: {e}")
+
+
+_store: Optional[ContextStore] = None
+_store_lock = threading.Lock()
+
+
+def get_context_store() -> ContextStore:
+    """Return the shared context store (also used by memory.py's chat history functions)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ContextStore(context_store())
+                atexit.register(_store.flush)
+    return _store
+
 
 def load_context() -> List[Dict[str, str]]:
-    """Load recent user-Nova exchanges from file."""
-    try:
-        with open(CONTEXT_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
-    except Exception as e:
-        print(f"[context.py] Error loading context: {e}")
-        return []
+    """Load recent user-Nova exchanges (read from disk only once)."""
+    return get_context_store().history()
 
 def save_context(history: List[Dict[str, str]]) -> None:
-    """Save user-Nova exchanges to context file."""
-    try:
-        with open(CONTEXT_FILE, "w", encoding="utf-8") as f:
-            json.dump(history, f, indent=4)
-    except Exception as e:
-        print(f"[context.py] Error saving context: {e}")
+    """Replace the stored user-Nova exchanges."""
+    get_context_store().replace(history)
 
 def add_exchange(user_message: str, nova_reply: str) -> None:
-    """Add a new Q&A turn and enforce context window size."""
-    history = load_context()
-    history.append({"user": user_message, "nova": nova_reply})
-    if len(history) > MAX_CONTEXT_TURNS:
-        history = history[-MAX_CONTEXT_TURNS:]
-    save_context(history)
+    """Add a new Q&A turn; the context window is enforced in memory."""
+    get_context_store().add(user_message, nova_reply)
 
 def get_formatted_context() -> str:
     """Format rolling chat history for conversation-aware LLM prompts."""
-    history = load_context()
-    formatted = ""
-    for turn in history:
-        formatted += f"User: {turn['user']}\nNova: {turn['nova']}\n"
-    return formatted
+    return get_context_store().formatted()
+
+def flush_context() -> None:
+    """Write any buffered turns to disk immediately."""
+    get_context_store().flush()
 
 def clear_context() -> None:
     """Optional: Clear chat context (for privacy or resetting)."""
@@ -0,0 +1,283 @@
+# intents.py
+import difflib
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# Declarative intent routing. Every command phrase is compiled into one word-level
+# Aho-Corasick automaton, so a query is routed in a single pass over its words.
+# Matches respect word boundaries, and the longest phrase wins over a shorter overlapping one.
+# When nothing matches exactly, the query is retried with lemmatized words, then
+# with misheard names snapped to the closest slot value ("crome" -> "chrome").
+
+LEMMA_CONFIDENCE = 0.9
+FUZZY_CUTOFF = 0.85
+FUZZY_MIN_LENGTH = 5  # Shorter words are too easy to confuse ("word" / "world")
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+class _Entry:
+    """One compiled phrase: either an intent trigger or a slot value."""
+
+    def __init__(self, kind: str, name: str, phrase: Tuple[str, ...], order: int,
+                 slot_type: Optional[str] = None, slot_value: Optional[str] = None):
+        self.kind = kind  # "intent" or "slot"
+        self.name = name
+        self.phrase = phrase
+        self.order = order
+        self.slot_type = slot_type
+        self.slot_value = slot_value
+
+
+class Intent:
+    def __init__(self, name: str, phrases: List[str], slot: Optional[str],
+                 handler: Optional[Callable[..., Any]], order: int):
+        self.name = name
+        self.phrases = phrases
+        self.slot = slot
+        self.handler = handler
+        self.order = order
+
+
+class IntentMatch:
+    """Result of routing one query."""
+
+    def __init__(self, intent: Intent, confidence: float, phrase: str, method: str,
+                 span: Tuple[int, int], slots: Dict[str, str]):
+        self.intent = intent
+        self.name = intent.name
+        self.confidence = confidence
+        self.phrase = phrase  # the registered phrase that matched
+        self.method = method  # "exact", "lemma" or "fuzzy"
+        self.span = span      # word offsets in the (normalized) query
+        self.slots = slots
+
+    def __repr__(self):
+        return f"IntentMatch({self.name!r}, {self.confidence:.2f}, {self.method}, slots={self.slots})"
+
+
+class _Automaton:
+    """Word-level Aho-Corasick automaton over a set of phrases."""
+
+    def __init__(self, entries: List[_Entry], words: Callable[[_Entry], Tuple[str, ...]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[_Entry]] = [[]]
+        for entry in entries:
+            node = 0
+            for word in words(entry):
+                nxt = self.goto[node].get(word)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][word] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append(entry)
+        # Breadth-first failure links; each node also inherits the outputs of its fallback
+        pending = list(self.goto[0].values())
+        while pending:
+            node = pending.pop(0)
+            for word, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(word, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+                pending.append(child)
+        self.vocabulary = {word for table in self.goto for word in table}
+
+    def scan(self, tokens: List[str]) -> List[Tuple[int, int, _Entry]]:
+        """All (start, end, entry) phrase occurrences in tokens."""
+        found = []
+        node = 0
+        for end, word in enumerate(tokens, 1):
+            while node and word not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(word, 0)
+            for entry in self.out[node]:
+                found.append((end - len(entry.phrase), end, entry))
+        return found
+
+
+class IntentRouter:
+    """
+    Registry of intents and slot vocabularies, compiled into one automaton.
+
+    Phrases may contain a "{slot}" placeholder, e.g. "open {app}", which expands
+    to one phrase per registered value of that slot. An intent that declares a
+    slot also picks the value up anywhere else in the query ("open the chrome").
+
+    :param lemmatizer_loader: Returns an object with lemmatize(word, pos) (NLTK's
+                              WordNetLemmatizer); only called for the fallback.
+    """
+
+    def __init__(self, lemmatizer_loader: Optional[Callable[[], Any]] = None,
+                 fuzzy_cutoff: float = FUZZY_CUTOFF):
+        self.intents: Dict[str, Intent] = {}
+        self.slot_values: Dict[str, Dict[str, str]] = {}
+        self.lemmatizer_loader = lemmatizer_loader
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._lemmatizer = None
+        self._automaton: Optional[_Automaton] = None
+        self._lemma_automaton: Optional[_Automaton] = None
+        self._entries: List[_Entry] = []
+        self._fuzzy_cache: Dict[str, Optional[Tuple[str, float]]] = {}
+        self._slot_vocabulary: List[str] = []
+
+    # ----------- REGISTRATION -------------------
+
+    def add_intent(self, name: str, phrases: Iterable[str], slot: Optional[str] = None,
+                   handler: Optional[Callable[..., Any]] = None) -> Intent:
+        """Register an intent. Earlier registrations win ties between equally long matches."""
+        intent = Intent(name, list(phrases), slot, handler, len(self.intents))
+        self.intents[name] = intent
+        self._automaton = None
+        return intent
+
+    def add_slot(self, slot_type: str, values: Union[Dict[str, Any], Iterable[str]]) -> None:
+        """Register the phrases a slot can take; each phrase maps to itself as the value."""
+        self.slot_values.setdefault(slot_type, {}).update({" ".join(tokenize(v)): v for v in values})
+        self._automaton = None
+
+    def compile(self) -> None:
+        entries = []
+        for intent in self.intents.values():
+            for phrase in intent.phrases:
+                placeholder = re.search(r"\{(\w+)\}", phrase)
+                if placeholder is None:
+                    entries.append(_Entry("intent", intent.name, tuple(tokenize(phrase)), intent.order))
+                    continue
+                slot_type = placeholder.group(1)
+                for normalized, value in self.slot_values.get(slot_type, {}).items():
+                    expanded = phrase.replace(placeholder.group(0), normalized)
+                    entries.append(_Entry("intent", intent.name, tuple(tokenize(expanded)), intent.order,
+                                          slot_type, value))
+        for slot_type, values in self.slot_values.items():
+            for normalized, value in values.items():
+                entries.append(_Entry("slot", slot_type, tuple(normalized.split()), -1, slot_type, value))
+        self._entries = [e for e in entries if e.phrase]
+        # Only names are fuzzy-matched; trigger words are not ("closer" must not become "close")
+        self._slot_vocabulary = sorted({w for e in self._entries if e.kind == "slot" for w in e.phrase})
+        self._automaton = _Automaton(self._entries, lambda e: e.phrase)
+        self._lemma_automaton = None
+        self._fuzzy_cache.clear()
+
+    # ----------- ROUTING -------------------
+
+    def route(self, query: str) -> Optional[IntentMatch]:
+        """Return the best intent for query, or None if no command phrase matches."""
+        if self._automaton is None:
+            self.compile()
+        tokens = tokenize(query)
+        match = self._resolve(self._automaton, tokens, 1.0, "exact")
+        if match is not None:
+            if match.intent.slot is not None and not match.slots:
+                # "open calculater": the verb matched but the name was misheard
+                corrected, confidence = self._correct(tokens)
+                if confidence < 1.0:
+                    fuzzy = self._resolve(self._automaton, corrected, confidence, "fuzzy")
+                    if fuzzy is not None and fuzzy.name == match.name and fuzzy.slots:
+                        return fuzzy
+            return match
+
+        lemma_automaton = self._lemmas()
+        if lemma_automaton is not None:
+            match = self._resolve(lemma_automaton, [self._lemma(t) for t in tokens], LEMMA_CONFIDENCE, "lemma")
+            if match is not None:
+                return match
+
+        corrected, confidence = self._correct(tokens)
+        if confidence < 1.0:
+            return self._resolve(self._automaton, corrected, confidence * LEMMA_CONFIDENCE, "fuzzy")
+        return None
+
+    def dispatch(self, query: str, default: Optional[Callable[[str], Any]] = None) -> Any:
+        """Route query and call the matched intent's handler(query, match), or default(query)."""
+        match = self.route(query)
+        if match is None or match.intent.handler is None:
+            return default(query) if default is not None else None
+        return match.intent.handler(query, match)
+
+    def _resolve(self, automaton: _Automaton, tokens: List[str], confidence: float,
+                 method: str) -> Optional[IntentMatch]:
+        found = automaton.scan(tokens)
+        best = None
+        for start, end, entry in found:
+            if entry.kind != "intent":
+                continue
+            # Longest phrase first, then registration order, then leftmost
+            key = (end - start, -entry.order, -start)
+            if best is None or key > best[0]:
+                best = (key, start, end, entry)
+        if best is None:
+            return None
+        _, start, end, entry = best
+        intent = self.intents[entry.name]
+        slots = {}
+        if entry.slot_type is not None:
+            slots[entry.slot_type] = entry.slot_value
+        elif intent.slot is not None:
+            values = [(e - s, s, item) for s, e, item in found
+                      if item.kind == "slot" and item.slot_type == intent.slot and (e <= start or s >= end)]
+            if values:
+                slots[intent.slot] = max(values, key=lambda v: (v[0], -v[1]))[2].slot_value
+        return IntentMatch(intent, confidence, " ".join(entry.phrase), method, (start, end), slots)
+
+    # ----------- FALLBACKS -------------------
+
+    def _lemma(self, word: str) -> str:
+        return self._lemmatizer.lemmatize(self._lemmatizer.lemmatize(word, "n"), "v")
+
+    def _lemmas(self) -> Optional[_Automaton]:
+        if self.lemmatizer_loader is None:
+            return None
+        if self._lemma_automaton is None:
+            try:
+                self._lemmatizer = self.lemmatizer_loader()
+            except Exception as e:
+                print(f"[intents.py] Lemmatizer unavailable, skipping lemma fallback: {e}")
+                self.lemmatizer_loader = None
+                return None
+            self._lemma_automaton = _Automaton(self._entries, lambda e: tuple(self._lemma(w) for w in e.phrase))
+        return self._lemma_automaton
+
+    def _correct(self, tokens: List[str]) -> Tuple[List[str], float]:
+        """Snap unknown words to the closest slot word; returns (tokens, lowest similarity)."""
+        vocabulary = self._automaton.vocabulary
+        slot_vocabulary = self._slot_vocabulary
+        corrected, confidence = [], 1.0
+        for token in tokens:
+            if token in vocabulary or len(token) < FUZZY_MIN_LENGTH:
+                corrected.append(token)
+                continue
+            if token not in self._fuzzy_cache:
+                if len(self._fuzzy_cache) > 4096:
+                    self._fuzzy_cache.clear()
+                close = difflib.get_close_matches(token, slot_vocabulary, n=1, cutoff=self.fuzzy_cutoff)
+                self._fuzzy_cache[token] = (
+                    (close[0], difflib.SequenceMatcher(None, token, close[0]).ratio()) if close else None
+                )
+            hit = self._fuzzy_cache[token]
+            if hit is None:
+                corrected.append(token)
+            else:
+                corrected.append(hit[0])
+                confidence = min(confidence, hit[1])
+        return corrected, confidence
+
+
+# Optional direct module testing:
+#   python intents.py "open vs code" "close file explorer"
+if __name__ == "__main__":
+    import sys
+
+    from commands import build_router
+
+    router = build_router()
+    for query in sys.argv[1:] or ["open vs code", "open my password manager", "open crome"]:
+        print(f"{query!r} -> {router.route(query)}")
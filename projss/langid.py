@@ -0,0 +1,130 @@
+# langid.py
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+# Language identification for speech output. Cheap checks run first: script
+# ranges (Tamil letters), then one compiled regex over the Thanglish lexicon,
+# then plain ASCII short-circuits to English. Only other non-ASCII text reaches
+# langdetect, seeded so the same text always gets the same answer.
+
+# Romanized Tamil words that mark an utterance as Thanglish; extended from LEXICON_FILE
+THANGLISH_KEYWORDS = [
+    "vanakkam", "eppadi", "iruka", "sollu", "pesu", "enna",
+    "pudhu", "thunai", "mudivu", "vazhkai", "nala", "unnai",
+    "kaatchi", "sirikka", "sandhosham",
+]
+LEXICON_FILE = "thanglish_lexicon.txt"
+
+# Unicode blocks that identify a language on their own
+SCRIPT_RANGES = {
+    "ta": ("\u0b80", "\u0bff"),  # Tamil
+    "hi": ("\u0900", "\u097f"),  # Devanagari
+}
+
+DEFAULT_LANG = "en"
+
+
+def load_lexicon(path: str) -> List[str]:
+    """Words from a lexicon file: one per line, '#' starts a comment."""
+    if not os.path.exists(path):
+        return []
+    words = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            word = line.split("#", 1)[0].strip().lower()
+            if word:
+                words.append(word)
+    return words
+
+
+_SCRIPT_PATTERNS = [(lang, re.compile(f"[{low}-{high}]")) for lang, (low, high) in SCRIPT_RANGES.items()]
+
+
+def _script_language(text: str) -> Optional[str]:
+    for lang, pattern in _SCRIPT_PATTERNS:
+        if pattern.search(text):
+            return lang
+    return None
+
+
+def _langdetect(text: str) -> str:
+    from langdetect import DetectorFactory, detect
+
+    DetectorFactory.seed = 0  # langdetect is randomized unless seeded
+    return detect(text)
+
+
+class LanguageIdentifier:
+    """
+    Picks the TTS language for a text, caching results per text.
+
+    :param keywords: Thanglish lexicon, compiled once into a single word-boundary alternation.
+    :param fallback: Detector for non-ASCII text in unknown scripts (seeded langdetect by default).
+    """
+
+    def __init__(self, keywords: Iterable[str] = THANGLISH_KEYWORDS, cache_size: int = 2048,
+                 fallback=None):
+        self.keywords = sorted({k.lower() for k in keywords if k.strip()}, key=len, reverse=True)
+        self._pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, self.keywords)) + r")\b", re.IGNORECASE)
+        self.fallback = fallback or _langdetect
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def is_thanglish(self, text: str) -> bool:
+        return self._pattern.search(text) is not None
+
+    def detect(self, text: str) -> str:
+        key = " ".join(text.split())
+        with self._lock:
+            lang = self._cache.get(key)
+            if lang is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return lang
+            self.misses += 1
+        lang = self._identify(key)
+        with self._lock:
+            self._cache[key] = lang
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return lang
+
+    def _identify(self, text: str) -> str:
+        if text.isascii():
+            return "ta" if self.is_thanglish(text) else DEFAULT_LANG
+        lang = _script_language(text)
+        if lang is not None:
+            return lang
+        if self.is_thanglish(text):
+            return "ta"
+        # Only letters count: emoji and punctuation don't make a phrase foreign
+        if all(ch < "\u0080" for ch in text if ch.isalpha()):
+            return DEFAULT_LANG
+        try:
+            return self.fallback(text)
+        except Exception:
+            return DEFAULT_LANG
+
+    def cache_info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+
+_identifier: Optional[LanguageIdentifier] = None
+
+
+def get_identifier() -> LanguageIdentifier:
+    """Shared identifier with the built-in lexicon plus LEXICON_FILE."""
+    global _identifier
+    if _identifier is None:
+        _identifier = LanguageIdentifier(THANGLISH_KEYWORDS + load_lexicon(LEXICON_FILE))
+    return _identifier
+
+
+def detect_language(text: str) -> str:
+    return get_identifier().detect(text)
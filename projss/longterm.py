@@ -0,0 +1,413 @@
+# longterm.py
+import hashlib
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import models
+from storage import AppendLog
+
+# Long-term semantic memory. Every chat exchange and stored preference is embedded
+# with a small CPU sentence model and kept in an on-disk vector index, so the few
+# memories relevant to a new message can be put into the prompt while the prompt
+# history itself stays short.
+#
+#   memory/longterm.f32     float32 vectors, one row per memory, appended in place
+#   memory/longterm.jsonl   one metadata record per row (AppendLog)
+#   memory/longterm.ivf.npz IVF centroids + row assignments, once trained
+#
+# Search is brute force over the memory-mapped matrix until an IVF index is trained,
+# then only the nprobe closest lists are scored.
+
+LONGTERM_PATH = os.path.join("memory", "longterm")
+EMBEDDING_DIM = 384          # all-MiniLM-L6-v2
+TOP_K = 3
+MIN_SCORE = 0.35             # Cosine similarity below this is not worth a place in the prompt
+IVF_MIN_ENTRIES = 50000      # Below this, brute force is already fast enough
+IVF_NPROBE = 8
+
+
+def _key(*parts: str) -> str:
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:20]
+
+
+class Memory:
+    """One recalled memory and its cosine similarity to the query."""
+
+    def __init__(self, row: int, text: str, kind: str, score: float, record: Dict[str, Any]):
+        self.row = row
+        self.text = text
+        self.kind = kind
+        self.score = score
+        self.record = record
+
+    def __repr__(self):
+        return f"Memory({self.kind}, {self.score:.3f}, {self.text[:40]!r})"
+
+
+def kmeans(data: np.ndarray, k: int, iters: int = 10, sample: int = 20000, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on (a sample of) unit vectors; returns (k, d) unit centroids."""
+    rng = np.random.default_rng(seed)
+    if len(data) > sample:
+        data = data[np.sort(rng.choice(len(data), sample, replace=False))]
+    data = np.ascontiguousarray(data, dtype=np.float32)
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        for c in range(k):
+            members = data[assign == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+    return centroids
+
+
+class VectorIndex:
+    """
+    Append-only on-disk vector index of unit float32 rows.
+
+    Vectors are appended to a raw .f32 file and read back through np.memmap; the
+    metadata record for a row is written after its vector, so after a crash the row
+    count is the shorter of the two and any extra vector bytes are cut off.
+    """
+
+    def __init__(self, path: str, dim: int = EMBEDDING_DIM):
+        self.path = path  # without extension
+        self.dim = dim
+        self.meta = AppendLog(path + ".jsonl")
+        self.records: List[Dict[str, Any]] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.RLock()
+        self._loaded = False
+        self.centroids: Optional[np.ndarray] = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self.trained_rows = 0  # rows the IVF lists were trained on; _assign also grows with inserts
+
+    @property
+    def vector_path(self) -> str:
+        return self.path + ".f32"
+
+    @property
+    def ivf_path(self) -> str:
+        return self.path + ".ivf.npz"
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self.records)
+
+    def load(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self.records = self.meta.read_all()
+            row_bytes = self.dim * 4
+            size = os.path.getsize(self.vector_path) if os.path.exists(self.vector_path) else 0
+            rows = min(len(self.records), size // row_bytes)
+            if size != rows * row_bytes:
+                with open(self.vector_path, "r+b") as f:
+                    f.truncate(rows * row_bytes)
+            if rows < len(self.records):
+                self.records = self.records[:rows]
+                self.meta.rewrite(self.records)
+            self._load_ivf()
+            self._loaded = True
+
+    def _load_ivf(self) -> None:
+        try:
+            with np.load(self.ivf_path) as data:
+                centroids, assign = data["centroids"], data["assign"]
+                trained_rows = int(data["trained_rows"]) if "trained_rows" in data.files else len(assign)
+        except (OSError, KeyError, ValueError):
+            return
+        if centroids.shape[1] != self.dim:
+            return
+        self.centroids = centroids.astype(np.float32)
+        self.trained_rows = trained_rows
+        self._assign = assign[:len(self.records)].astype(np.int32)
+        if len(self._assign) < len(self.records):
+            tail = self.matrix()[len(self._assign):]
+            self._assign = np.concatenate((self._assign, self._nearest(tail)))
+
+    def matrix(self) -> np.ndarray:
+        """All stored rows, memory-mapped (remapped after inserts)."""
+        n = len(self.records)
+        if self._matrix is None or len(self._matrix) != n:
+            if n == 0:
+                self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+            else:
+                self._matrix = np.memmap(self.vector_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+        return self._matrix
+
+    def _nearest(self, vectors: np.ndarray) -> np.ndarray:
+        if len(vectors) == 0:
+            return np.zeros(0, dtype=np.int32)
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def add(self, vectors: np.ndarray, records: Sequence[Dict[str, Any]]) -> List[int]:
+        """Append unit vectors with their metadata records; returns the new row numbers."""
+        vectors = np.ascontiguousarray(np.atleast_2d(vectors), dtype=np.float32)
+        if vectors.shape != (len(records), self.dim):
+            raise ValueError(f"expected {len(records)} vectors of dimension {self.dim}, got {vectors.shape}")
+        self.load()
+        with self._lock:
+            start = len(self.records)
+            with open(self.vector_path, "ab") as f:
+                f.write(vectors.tobytes())
+            self.meta.extend(list(records))
+            self.records.extend(records)
+            if self.centroids is not None:
+                self._assign = np.concatenate((self._assign, self._nearest(vectors)))
+            return list(range(start, len(self.records)))
+
+    def train(self, nlist: Optional[int] = None, iters: int = 10) -> None:
+        """Cluster the stored rows into nlist IVF lists (default ~4 * sqrt(n)) and save them."""
+        self.load()
+        with self._lock:
+            matrix = self.matrix()
+            if len(matrix) == 0:
+                return
+            nlist = nlist or max(1, int(4 * np.sqrt(len(matrix))))
+            centroids = kmeans(matrix, min(nlist, len(matrix)), iters)
+            self.centroids = centroids
+            self._assign = self._nearest_chunked(matrix)
+            self.trained_rows = len(matrix)
+            tmp_path = self.ivf_path + ".tmp.npz"
+            np.savez(tmp_path, centroids=centroids, assign=self._assign, trained_rows=self.trained_rows)
+            os.replace(tmp_path, self.ivf_path)
+
+    def _nearest_chunked(self, matrix: np.ndarray, chunk: int = 16384) -> np.ndarray:
+        return np.concatenate([self._nearest(np.asarray(matrix[i:i + chunk]))
+                               for i in range(0, len(matrix), chunk)] or [np.zeros(0, np.int32)])
+
+    def search(self, query: np.ndarray, k: int = TOP_K, nprobe: int = IVF_NPROBE,
+               exact: bool = False) -> List[Tuple[int, float]]:
+        """(row, cosine similarity) of the k best rows, best first."""
+        self.load()
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        with self._lock:
+            matrix = self.matrix()
+            if len(matrix) == 0:
+                return []
+            if self.centroids is not None and not exact:
+                probe = np.argpartition(-(self.centroids @ query), min(nprobe, len(self.centroids)) - 1)[:nprobe]
+                rows = np.flatnonzero(np.isin(self._assign, probe))
+                scores = matrix[rows] @ query
+            else:
+                rows = None
+                scores = matrix @ query
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        if rows is not None:
+            return [(int(rows[i]), float(scores[i])) for i in best]
+        return [(int(i), float(scores[i])) for i in best]
+
+
+class LongTermMemory:
+    """
+    Embeds exchanges and preference facts into a VectorIndex and recalls the most
+    relevant ones for a message. Inserts are embedded on a background thread so the
+    reply path never waits for them.
+
+    :param embedder_loader: Returns an object with encode(texts, normalize_embeddings=True)
+                            (a sentence-transformers model); loaded on first use.
+    """
+
+    def __init__(self, path: str = LONGTERM_PATH, embedder_loader: Optional[Callable[[], Any]] = None,
+                 dim: int = EMBEDDING_DIM, min_score: float = MIN_SCORE):
+        self.index = VectorIndex(path, dim)
+        self._embedder_loader = embedder_loader or models.resource("embedder").get
+        self.min_score = min_score
+        self._latest: Optional[Dict[str, int]] = None  # record key -> newest row with that key
+        self._queue: "queue.Queue[Optional[Tuple[str, str, Dict[str, Any]]]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self._embedder_loader().encode(texts, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+
+    def _keys(self) -> Dict[str, int]:
+        if self._latest is None:
+            with self._lock:
+                if self._latest is None:
+                    self.index.load()
+                    self._latest = {r.get("key"): row for row, r in enumerate(self.index.records)}
+        return self._latest
+
+    # ----------- INSERTS -------------------
+
+    def _submit(self, key: str, text: str, record: Dict[str, Any]) -> None:
+        self._queue.put((key, text, record))
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="longterm-memory", daemon=True)
+                    self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            items = [item for item in batch if item is not None]  # None: close() asked the thread to stop
+            try:
+                if items:
+                    self._insert(items)
+            except Exception as e:
+                print(f"[longterm.py] Could not store memories: {e}")
+            for _ in batch:
+                self._queue.task_done()
+            if len(items) < len(batch):
+                return
+
+    def _insert(self, batch: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        latest = self._keys()
+        fresh, seen = [], set()
+        for key, text, record in batch:
+            current = latest.get(key)
+            if key in seen or (current is not None and self.index.records[current].get("text") == text):
+                continue
+            seen.add(key)
+            fresh.append((key, text, record))
+        if not fresh:
+            return
+        vectors = self.embed([text for _, text, _ in fresh])
+        records = [dict(record, key=key, text=text) for key, text, record in fresh]
+        for (key, _, _), row in zip(fresh, self.index.add(vectors, records)):
+            latest[key] = row
+
+    def remember_exchange(self, user_message: str, nova_reply: str) -> None:
+        """Queue one chat exchange for embedding (identical exchanges are stored once)."""
+        text = exchange_text({"user": user_message, "nova": nova_reply})
+        self._submit(_key("chat", user_message, nova_reply), text,
+                     {"kind": "chat", "timestamp": datetime.now().isoformat()})
+
+    def remember_preferences(self, prefs: Dict[str, Any]) -> None:
+        """Queue user_prefs.json facts; a routine that changed replaces the old one at recall."""
+        now = datetime.now().isoformat()
+        for url in prefs.get("favorite_websites", []):
+            self._submit(_key("website", url), f"Moorthy's favorite website: {url}",
+                         {"kind": "preference", "timestamp": now})
+        for app in prefs.get("frequently_used_apps", []):
+            self._submit(_key("app", app.lower()), f"Moorthy often uses the app {app}",
+                         {"kind": "preference", "timestamp": now})
+        for time_of_day, activity in prefs.get("daily_routines", {}).items():
+            self._submit(_key("routine", time_of_day), f"Moorthy's {time_of_day} routine: {activity}",
+                         {"kind": "preference", "timestamp": now})
+
+    def flush(self, timeout: float = 30.0) -> None:
+        """Wait until queued memories are stored."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Store queued memories and stop the insert thread (the next insert starts a new one)."""
+        self.flush(timeout)
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            self._queue.put(None)
+            worker.join(timeout)
+
+    # ----------- RECALL -------------------
+
+    def recall(self, query: str, k: int = TOP_K, exclude: Sequence[str] = ()) -> List[Memory]:
+        """
+        Up to k memories similar to query, skipping superseded rows and texts in
+        `exclude` (e.g. exchange_text() of the turns already in the prompt).
+        """
+        if len(self.index) == 0:
+            return []
+        latest = self._keys()
+        skip = set(exclude)
+        memories = []
+        for row, score in self.index.search(self.embed([query])[0], k + len(skip) + 4):
+            if score < self.min_score:
+                break
+            record = self.index.records[row]
+            if latest.get(record.get("key")) != row or record.get("text") in skip:
+                continue
+            memories.append(Memory(row, record["text"], record.get("kind", ""), score, record))
+            if len(memories) == k:
+                break
+        return memories
+
+    def sync(self, prefs: Dict[str, Any], history: Sequence[Dict[str, str]],
+             background: bool = True) -> Optional[threading.Thread]:
+        """
+        Queue current preferences and recent chat turns (already stored ones are skipped),
+        then train the IVF index if it has grown enough. By default on a daemon thread.
+        """
+        def _run():
+            try:
+                self.remember_preferences(prefs)
+                for turn in history:
+                    self.remember_exchange(turn["user"], turn["nova"])
+                self.flush()
+                self.maybe_train()
+            except Exception as e:
+                print(f"[longterm.py] Sync failed: {e}")
+
+        if not background:
+            _run()
+            return None
+        thread = threading.Thread(target=_run, name="longterm-sync", daemon=True)
+        thread.start()
+        return thread
+
+    def maybe_train(self) -> bool:
+        """Train the IVF lists once the index is big enough (or has doubled since training)."""
+        n = len(self.index)
+        trained = self.index.trained_rows if self.index.centroids is not None else 0
+        if n < IVF_MIN_ENTRIES or (trained and n < 2 * trained):
+            return False
+        start = time.perf_counter()
+        self.index.train()
+        print(f"[longterm.py] Trained IVF index over {n} memories in {time.perf_counter() - start:.1f}s")
+        return True
+
+
+def exchange_text(turn: Dict[str, str]) -> str:
+    return f"User: {turn['user']}\nNova: {turn['nova']}"
+
+
+_memory: Optional[LongTermMemory] = None
+_memory_lock = threading.Lock()
+
+
+def get_memory() -> LongTermMemory:
+    """Return the shared long-term memory."""
+    global _memory
+    if _memory is None:
+        with _memory_lock:
+            if _memory is None:
+                _memory = LongTermMemory()
+    return _memory
+
+
+# Optional direct module testing: store a few facts and recall them
+if __name__ == "__main__":
+    import sys
+
+    ltm = get_memory()
+    ltm.remember_exchange("My sister's birthday is on the 14th of March", "I'll remember that, Moorthy!")
+    ltm.remember_exchange("I'm learning to play the guitar", "That's awesome, keep practicing!")
+    ltm.remember_preferences({"favorite_websites": ["https://github.com"], "daily_routines": {"morning": "gym at 6"}})
+    ltm.flush()
+    query = " ".join(sys.argv[1:]) or "when is my sister's birthday?"
+    for memory in ltm.recall(query):
+        print(memory)
@@ -1,27 +1,65 @@
 import json
 import os
+import threading
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
 
+from storage import AppendLog, atomic_write_json, get_log, migrate_json_list
+from context import CONTEXT_FILE, ContextStore, get_context_store
+from moodstats import MoodStats
+
 # Base folder for memory JSON files
 MEMORY_DIR = "memory"
 
 # Ensure memory directory exists
 os.makedirs(MEMORY_DIR, exist_ok=True)
 
+MAX_CHAT_ENTRIES = 10
+# Moods kept when the mood log is compacted (about three years at 100 a day); it is
+# compacted at startup once it holds twice this many
+MAX_MOOD_ENTRIES = 100000
+
 # File paths
 USER_PREFS_FILE = os.path.join(MEMORY_DIR, "user_prefs.json")
-MOOD_LOG_FILE = os.path.join(MEMORY_DIR, "mood_log.json")
-CHAT_HISTORY_FILE = os.path.join(MEMORY_DIR, "chat_history.json")
+# Mood log and chat history are JSON-lines append logs (one entry per line)
+MOOD_LOG_FILE = os.path.join(MEMORY_DIR, "mood_log.jsonl")
+# Columnar index of the mood log for analytics (see moodstats.py)
+MOOD_STATS_FILE = os.path.join(MEMORY_DIR, "mood_stats.bin")
+# Chat history is owned by context.py's in-memory store; this is the same file
+CHAT_HISTORY_FILE = CONTEXT_FILE
+
+# Pre-append-log file, migrated once on first import (context.py migrates chat history)
+LEGACY_MOOD_LOG_FILE = os.path.join(MEMORY_DIR, "mood_log.json")
+
+
+def mood_log_store() -> AppendLog:
+    return get_log(MOOD_LOG_FILE)
+
+
+_mood_stats: Optional[MoodStats] = None
+
+
+def mood_stats() -> MoodStats:
+    global _mood_stats
+    if _mood_stats is None:
+        _mood_stats = MoodStats(mood_log_store(), MOOD_STATS_FILE)
+    return _mood_stats
+
+
+def chat_history_store() -> ContextStore:
+    return get_context_store()
+
+
+migrate_json_list(LEGACY_MOOD_LOG_FILE, mood_log_store())
 
 
 def save_to_file(data: Union[Dict, List], filename: str) -> None:
     """
     Save data (dictionary or list) to a JSON file.
+    The write is atomic: a crash leaves the previous file intact.
     """
     try:
-        with open(filename, "w", encoding="utf-8") as file:
-            json.dump(data, file, indent=4)
+        atomic_write_json(data, filename)
     except Exception as e:
         print(f"[memory.py] Error saving to {filename}: {e}")
 
@@ -101,58 +139,58 @@ def update_daily_routine(time_of_day: str, activity: str) -> None:
 
 def load_mood_log() -> List[Dict[str, str]]:
     """
-    Load mood log list from JSON file.
+    Load mood log list from the append log.
     Returns empty list if none found.
     """
-    moods = load_from_file(MOOD_LOG_FILE)
-    return moods if moods is not None else []
+    try:
+        return mood_log_store().read_all()
+    except Exception as e:
+        print(f"[memory.py] Error loading {MOOD_LOG_FILE}: {e}")
+        return []
 
 
 def log_mood(mood: str) -> None:
     """
-    Append a mood entry with current timestamp to the mood log.
+    Append a mood entry with current timestamp to the mood log (O(1)).
     """
-    moods = load_mood_log()
     mood_entry = {"timestamp": datetime.now().isoformat(), "mood": mood}
-    moods.append(mood_entry)
-    save_to_file(moods, MOOD_LOG_FILE)
+    try:
+        mood_log_store().append(mood_entry)
+    except Exception as e:
+        print(f"[memory.py] Error saving to {MOOD_LOG_FILE}: {e}")
 
 
 def get_last_mood() -> Optional[str]:
     """
     Return the last recorded mood, or None if no moods logged.
+    Only the end of the log is read.
     """
-    moods = load_mood_log()
-    if moods:
-        return moods[-1]["mood"]
+    try:
+        entry = mood_log_store().last()
+    except Exception as e:
+        print(f"[memory.py] Error loading {MOOD_LOG_FILE}: {e}")
+        return None
+    if entry:
+        return entry["mood"]
     return None
 
 
 # === Chat History Functions ===
 
-MAX_CHAT_ENTRIES = 10
-
-
 def load_chat_history() -> List[Dict[str, str]]:
     """
-    Load the chat history list from file.
+    Load the chat history list (served from context.py's in-memory store).
     Returns empty list if no history found.
     """
-    history = load_from_file(CHAT_HISTORY_FILE)
-    return history if history is not None else []
+    return chat_history_store().history()[-MAX_CHAT_ENTRIES:]
 
 
 def update_chat_history(user_message: str, nova_reply: str) -> None:
     """
-    Append a new user-Nova chat exchange to history,
-    keeping only the last MAX_CHAT_ENTRIES entries.
+    Append a new user-Nova chat exchange to history.
+    Shares context.py's store, so both modules see the same turns without re-reading disk.
     """
-    history = load_chat_history()
-    history.append({"user": user_message, "nova": nova_reply})
-    # Trim history if exceeding max entries
-    if len(history) > MAX_CHAT_ENTRIES:
-        history = history[-MAX_CHAT_ENTRIES:]
-    save_to_file(history, CHAT_HISTORY_FILE)
+    chat_history_store().add(user_message, nova_reply)
 
 
 def get_recent_chat_context() -> List[Dict[str, str]]:
@@ -174,11 +212,45 @@ def clear_user_prefs() -> None:
 
 
 def clear_mood_log() -> None:
-    save_to_file([], MOOD_LOG_FILE)
+    mood_log_store().clear()
+    mood_stats().rebuild()
 
 
 def clear_chat_history() -> None:
-    save_to_file([], CHAT_HISTORY_FILE)
+    chat_history_store().replace([])
+
+
+def _trim_mood_log() -> None:
+    log = mood_log_store()
+    log.rewrite(log.read_all()[-MAX_MOOD_ENTRIES:])
+    mood_stats().rebuild()
+
+
+def maintain_mood_log(background: bool = False):
+    """
+    Compact the mood log once it holds more than 2 * MAX_MOOD_ENTRIES moods, then
+    index the moods logged since the last run (see moodstats.py).
+    """
+    if background:
+        thread = threading.Thread(target=maintain_mood_log, name="mood-log", daemon=True)
+        thread.start()
+        return thread
+    try:
+        if mood_log_store().count() > 2 * MAX_MOOD_ENTRIES:
+            _trim_mood_log()
+        mood_stats().sync()
+    except Exception as e:
+        print(f"[memory.py] Error maintaining mood log: {e}")
+
+
+def compact_memory() -> None:
+    """
+    Rewrite the append logs, dropping torn lines left by a crash, trimming the mood
+    log to MAX_MOOD_ENTRIES and chat history to the context store's MAX_CONTEXT_TURNS.
+    """
+    _trim_mood_log()
+    chat_history_store().flush()
+    chat_history_store().log.compact()
 
 
 # Test code (run only if executed directly)
@@ -196,6 +268,7 @@ if __name__ == "__main__":
     print("Logging mood: Happy")
     log_mood("Happy")
     print(load_mood_log())
+    print(mood_stats().summary(7))
 
     print("Adding chat entry")
     update_chat_history("Hello Nova, how are you?", "I'm good, Moorthy! How can I help?")
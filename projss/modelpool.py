@@ -0,0 +1,222 @@
+# modelpool.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import asr
+import models
+import sentiment
+
+# Heavy models shared by every session of the server (see server.py). Each model sits
+# behind a lane: requests from any thread are queued, a worker collects whatever
+# arrives within a few milliseconds and runs it as one batch. Lanes are bounded;
+# when one is full, submit() raises Saturated so the caller can shed load instead
+# of queueing without limit.
+
+LLM_MODEL = "llama3"
+
+
+class Saturated(RuntimeError):
+    """A lane's queue is full; retry later."""
+
+
+class BatchWorker:
+    """
+    Runs fn(items) -> results on `workers` threads, batching up to max_batch items
+    that arrive within max_wait_ms of each other. At most max_pending items wait.
+    """
+
+    def __init__(self, name: str, fn: Callable[[List[Any]], List[Any]], max_batch: int = 16,
+                 max_wait_ms: float = 5.0, workers: int = 1, max_pending: int = 64):
+        self.name = name
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pending: Deque[Tuple[Any, Future]] = deque()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+        self.busy = 0
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+
+    def submit(self, item: Any, block: bool = False, timeout: Optional[float] = None) -> Future:
+        """
+        Queue one item and return a Future for its result. When the lane is full this
+        raises Saturated, or with block=True waits up to `timeout` for room first.
+        """
+        future: Future = Future()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while len(self._pending) >= self.max_pending and block and not self._closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if self._closed:
+                raise RuntimeError(f"{self.name} lane is closed")
+            if len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                raise Saturated(f"{self.name} lane is full ({self.max_pending} waiting)")
+            self._pending.append((item, future))
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._run, name=f"pool-{self.name}-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+            self._cond.notify_all()
+        return future
+
+    def run(self, item: Any, block: bool = False, timeout: Optional[float] = None) -> Any:
+        return self.submit(item, block, timeout).result()
+
+    def saturated(self, high_water: float = 0.8) -> bool:
+        return len(self._pending) >= high_water * self.max_pending
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pending": len(self._pending), "busy": self.busy, "batches": self.batches, "items": self.items,
+                "mean_batch": self.items / self.batches if self.batches else 0.0, "rejected": self.rejected}
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                # Give concurrent callers a short window to join this batch
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+                self.busy += 1
+                self._cond.notify_all()  # room for blocked submitters
+            try:
+                results = self.fn([item for item, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            finally:
+                with self._cond:
+                    self.busy -= 1
+                    self.batches += 1
+                    self.items += len(batch)
+
+
+class PooledEncoder:
+    """encode() front-end for longterm.LongTermMemory that runs on the shared embedder lane."""
+
+    def __init__(self, lane: BatchWorker, timeout: float = 10.0):
+        self.lane = lane
+        self.timeout = timeout
+
+    def encode(self, texts: List[str], normalize_embeddings: bool = True) -> np.ndarray:
+        # Blocks for room rather than failing: memory inserts run in the background
+        futures = [self.lane.submit(text, block=True, timeout=self.timeout) for text in texts]
+        return np.stack([future.result() for future in futures])
+
+
+class ModelPool:
+    """
+    One lane per shared model: sentiment (BERT), embedder (MiniLM), asr and llm.
+    BERT and the embedder batch; ASR and the LLM run one request per worker.
+    """
+
+    def __init__(self, llm_workers: int = 2, asr_workers: int = 2, max_pending: int = 32,
+                 chat_fn: Optional[Callable[..., Dict[str, Any]]] = None):
+        self._chat_fn = chat_fn
+        self.lanes: Dict[str, BatchWorker] = {
+            "sentiment": BatchWorker("sentiment", self._sentiment, max_batch=16, max_pending=max_pending * 2),
+            "embedder": BatchWorker("embedder", self._embed, max_batch=32, max_pending=max_pending * 4),
+            "asr": BatchWorker("asr", self._recognize, max_batch=1, workers=asr_workers, max_pending=max_pending),
+            "llm": BatchWorker("llm", self._chat, max_batch=1, workers=llm_workers, max_pending=max_pending),
+        }
+        self.encoder = PooledEncoder(self.lanes["embedder"])
+
+    # ----------- LANE FUNCTIONS -------------------
+
+    @staticmethod
+    def _sentiment(texts: List[str]) -> List[str]:
+        return sentiment.get_engine().analyze_batch(texts)
+
+    @staticmethod
+    def _embed(texts: List[str]) -> List[np.ndarray]:
+        vectors = models.get("embedder").encode(texts, normalize_embeddings=True)
+        return list(np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1))
+
+    @staticmethod
+    def _recognize(audios: List[Any]) -> List[Optional[str]]:
+        backend = asr.get_backend()
+        return [backend.recognize(audio) for audio in audios]
+
+    def _chat(self, requests: List[Dict[str, Any]]) -> List[str]:
+        chat = self._chat_fn
+        if chat is None:
+            import ollama  # looked up per call, so a patched ollama.chat is used
+            chat = ollama.chat
+        return [chat(model=LLM_MODEL, **request)["message"]["content"] for request in requests]
+
+    # ----------- REQUESTS -------------------
+
+    def submit(self, lane: str, item: Any) -> Future:
+        return self.lanes[lane].submit(item)
+
+    def saturated(self) -> Optional[str]:
+        """Name of the first lane near its limit, or None if there is room."""
+        for name, lane in self.lanes.items():
+            if lane.saturated():
+                return name
+        return None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: lane.stats() for name, lane in self.lanes.items()}
+
+    def prometheus_lines(self) -> List[str]:
+        """Queue depth and shed requests per lane, for tracing.render_prometheus."""
+        lines = ["# HELP luma_pool_pending Requests waiting in a model lane.",
+                 "# TYPE luma_pool_pending gauge"]
+        lines += [f'luma_pool_pending{{lane="{name}"}} {len(lane._pending)}' for name, lane in self.lanes.items()]
+        lines += ["# HELP luma_pool_rejected_total Requests refused because a lane was full.",
+                  "# TYPE luma_pool_rejected_total counter"]
+        lines += [f'luma_pool_rejected_total{{lane="{name}"}} {lane.rejected}' for name, lane in self.lanes.items()]
+        return lines
+
+    def close(self) -> None:
+        for lane in self.lanes.values():
+            lane.close()
+
+
+# Optional direct module testing: batching and back-pressure with a slow stand-in model
+if __name__ == "__main__":
+    def slow_upper(texts):
+        time.sleep(0.05)
+        return [text.upper() for text in texts]
+
+    lane = BatchWorker("upper", slow_upper, max_batch=8, max_wait_ms=10, max_pending=16)
+    futures = [lane.submit(f"text {i}") for i in range(16)]
+    try:
+        lane.submit("one too many")
+    except Saturated as e:
+        print("saturated:", e)
+    print([future.result() for future in futures][:3], lane.stats())
+    print("blocking submit:", lane.run("waited for room", block=True, timeout=1.0))
+    lane.close()
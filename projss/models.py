@@ -0,0 +1,139 @@
+# models.py
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Heavy resources (speaker encoder, BERT sentiment model, NLTK corpora, audio mixer)
+# are registered here and only loaded the first time something asks for them.
+
+SENTIMENT_MODEL_NAME = "nlptown/bert-base-multilingual-uncased-sentiment"
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"  # 384-d, CPU, for longterm.py
+
+# (nltk.data path, nltk.download package name)
+NLTK_RESOURCES = [
+    ("tokenizers/punkt", "punkt"),
+    ("corpora/wordnet", "wordnet"),
+]
+
+
+class LazyResource:
+    """A resource that is built by `loader` on first use and then reused."""
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self._loader = loader
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.load_time: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> Any:
+        """Return the resource, loading it if this is the first call."""
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                self._value = self._loader()
+                self.load_time = time.perf_counter() - start
+                self._loaded = True
+                print(f"[models.py] Loaded {self.name} in {self.load_time:.2f}s")
+        return self._value
+
+
+_registry: Dict[str, LazyResource] = {}
+
+
+def register(name: str, loader: Callable[[], Any]) -> LazyResource:
+    """Register a lazily loaded resource under `name`."""
+    resource = LazyResource(name, loader)
+    _registry[name] = resource
+    return resource
+
+
+def resource(name: str) -> LazyResource:
+    return _registry[name]
+
+
+def get(name: str) -> Any:
+    """Return the named resource, loading it on first use."""
+    return _registry[name].get()
+
+
+def is_loaded(name: str) -> bool:
+    return name in _registry and _registry[name].loaded
+
+
+def load_times() -> Dict[str, float]:
+    """Return load time in seconds for every resource loaded so far."""
+    return {name: res.load_time for name, res in _registry.items() if res.loaded}
+
+
+def warm_up(names: Optional[Iterable[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+    """
+    Load the given resources (all registered ones by default).
+    With background=True this runs in a daemon thread and returns it.
+    """
+    targets: List[str] = list(names) if names is not None else list(_registry)
+
+    def _run():
+        for name in targets:
+            try:
+                get(name)
+            except Exception as e:
+                print(f"[models.py] Warm-up of {name} failed: {e}")
+
+    if not background:
+        _run()
+        return None
+    thread = threading.Thread(target=_run, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+# ----------- LOADERS -------------------
+
+def _load_speaker_encoder():
+    from resemblyzer import VoiceEncoder
+    return VoiceEncoder()
+
+
+def _load_sentiment():
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL_NAME)
+    model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL_NAME)
+    model.eval()
+    return tokenizer, model
+
+
+def _load_embedder():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu")
+
+
+def _load_nltk():
+    import nltk
+    for path, package in NLTK_RESOURCES:
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(package, quiet=True)
+    from nltk.stem import WordNetLemmatizer
+    return WordNetLemmatizer()
+
+
+def _load_mixer():
+    import pygame
+    pygame.mixer.init()
+    return pygame.mixer
+
+
+register("speaker_encoder", _load_speaker_encoder)
+register("sentiment", _load_sentiment)
+register("embedder", _load_embedder)
+register("nltk", _load_nltk)
+register("mixer", _load_mixer)
@@ -0,0 +1,321 @@
+# moodstats.py
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from storage import AppendLog, atomic_write_json
+
+# Mood analytics over the mood append log (memory/mood_log.jsonl). Every logged mood
+# is mirrored into a compact columnar side-file (timestamp + mood code, 9 bytes a
+# row) and per-day counts kept in memory, so the latest mood, range counts, daily /
+# weekly breakdowns and trends never re-parse the JSON log. The side-file catches up
+# incrementally: only log bytes written since the last sync are parsed.
+
+RECORD = np.dtype([("time", "<f8"), ("mood", "u1")])  # time: local wall clock, seconds since 1970
+SECONDS_PER_DAY = 86400
+EPOCH = datetime(1970, 1, 1)
+
+# Moods sentiment.py produces; new labels are appended to the side-file's vocabulary
+MOODS = ["Happy", "Neutral", "Angry", "Sad"]
+VALENCE = {"Happy": 1.0, "Neutral": 0.0, "Angry": -1.0, "Sad": -1.0}
+
+
+def to_seconds(moment: datetime) -> float:
+    """Naive local datetime -> seconds since 1970 on the same wall clock (day boundaries at local midnight)."""
+    return (moment.replace(tzinfo=None) - EPOCH).total_seconds()
+
+
+def period_days(query: str) -> int:
+    """Days a mood summary covers for a spoken query: today, this month, or a week by default."""
+    return 1 if "today" in query else 30 if "month" in query else 7
+
+
+def _day_number(day: date) -> int:
+    return (day - EPOCH.date()).days
+
+
+def _times(n: int) -> str:
+    return f"{n} time" if n == 1 else f"{n} times"
+
+
+class MoodStats:
+    """
+    Columnar index of the mood log.
+
+    `path` holds the rows; `path` + ".json" the mood vocabulary, the number of rows and
+    how many bytes of the log they cover. A crash between the two writes is repaired
+    on load by dropping rows the metadata does not cover and re-reading the log from there.
+    """
+
+    def __init__(self, log: AppendLog, path: str):
+        self.log = log
+        self.path = path
+        self.meta_path = path + ".json"
+        self.moods: List[str] = list(MOODS)
+        self._times = np.zeros(0, dtype=np.float64)
+        self._codes = np.zeros(0, dtype=np.uint8)
+        self._size = 0  # valid rows in _times / _codes (capacity grows by doubling)
+        self._log_bytes = 0
+        self._first_day = 0
+        self._day_counts = np.zeros((0, len(self.moods)), dtype=np.int64)
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    # ----------- LOADING / SYNC -------------------
+
+    def _load(self) -> None:
+        meta = None
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[moodstats.py] Error loading {self.meta_path}, rebuilding: {e}")
+        rows = np.zeros(0, dtype=RECORD)
+        if meta is not None:
+            if os.path.exists(self.path):
+                rows = np.fromfile(self.path, dtype=RECORD, count=meta["rows"])
+            if len(rows) < meta["rows"]:
+                meta = None  # side-file shorter than its metadata: rebuild
+        if meta is None:
+            rows = np.zeros(0, dtype=RECORD)
+            self._truncate(0)
+            self._log_bytes = 0
+        else:
+            self.moods = meta["moods"]
+            self._log_bytes = meta["log_bytes"]
+            self._truncate(len(rows))
+        self._size = 0
+        self._day_counts = np.zeros((0, len(self.moods)), dtype=np.int64)
+        self._append_rows(rows["time"], rows["mood"])
+        self._loaded = True
+
+    def _truncate(self, rows: int) -> None:
+        if os.path.exists(self.path) and os.path.getsize(self.path) != rows * RECORD.itemsize:
+            with open(self.path, "r+b") as f:
+                f.truncate(rows * RECORD.itemsize)
+
+    def sync(self, background: bool = False):
+        """Index log entries written since the last sync (rebuilds if the log was cleared or compacted)."""
+        if background:
+            thread = threading.Thread(target=self.sync, daemon=True)
+            thread.start()
+            return thread
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            try:
+                size = os.path.getsize(self.log.path)
+            except FileNotFoundError:
+                size = 0
+            if size < self._log_bytes:
+                self._reset()
+            if size == self._log_bytes:
+                return
+            with open(self.log.path, "rb") as f:
+                f.seek(self._log_bytes)
+                data = f.read(size - self._log_bytes)
+            end = data.rfind(b"\n") + 1  # a torn last line waits for the next sync
+            if end == 0:
+                return
+            times, codes = self._parse(data[:end])
+            if len(times):
+                self._write_rows(times, codes)
+            self._log_bytes += end
+            self._write_meta()
+
+    def rebuild(self) -> None:
+        """Re-index the whole log (after it was compacted or cleared)."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._reset()
+            self.sync()
+
+    def _reset(self) -> None:
+        self.moods = list(MOODS)
+        self._size = 0
+        self._log_bytes = 0
+        self._day_counts = np.zeros((0, len(self.moods)), dtype=np.int64)
+        self._truncate(0)
+
+    def _parse(self, data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+        times, codes = [], []
+        for line in data.split(b"\n"):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                moment = to_seconds(datetime.fromisoformat(entry["timestamp"]))
+                mood = entry["mood"]
+            except (ValueError, KeyError, TypeError):
+                continue  # torn or corrupt line, skipped like AppendLog.read_all does
+            if not isinstance(mood, str):
+                continue
+            if mood not in self.moods:
+                self.moods.append(mood)
+            times.append(moment)
+            codes.append(self.moods.index(mood))
+        return np.asarray(times, dtype=np.float64), np.asarray(codes, dtype=np.uint8)
+
+    def _write_rows(self, times: np.ndarray, codes: np.ndarray) -> None:
+        rows = np.empty(len(times), dtype=RECORD)
+        rows["time"] = times
+        rows["mood"] = codes
+        with open(self.path, "ab") as f:
+            rows.tofile(f)
+        self._append_rows(times, codes)
+
+    def _write_meta(self) -> None:
+        atomic_write_json({"moods": self.moods, "rows": self._size, "log_bytes": self._log_bytes},
+                          self.meta_path, indent=None)
+
+    def _append_rows(self, times: np.ndarray, codes: np.ndarray) -> None:
+        """Add rows to the in-memory columns and the per-day counts."""
+        if not len(times):
+            return
+        needed = self._size + len(times)
+        if needed > len(self._times):
+            capacity = max(needed, 2 * len(self._times), 1024)
+            self._times = np.resize(self._times, capacity)
+            self._codes = np.resize(self._codes, capacity)
+        self._times[self._size:needed] = times
+        self._codes[self._size:needed] = codes
+        self._size = needed
+
+        days = np.floor_divide(times, SECONDS_PER_DAY).astype(np.int64)
+        if len(self._day_counts) == 0:
+            self._first_day = int(days.min())
+        low, high = min(self._first_day, int(days.min())), max(self._first_day + len(self._day_counts) - 1,
+                                                               int(days.max()))
+        counts = np.zeros((high - low + 1, len(self.moods)), dtype=np.int64)
+        old = self._day_counts
+        counts[self._first_day - low:self._first_day - low + len(old), :old.shape[1]] = old
+        width = len(self.moods)
+        cells = (days - low) * width + codes.astype(np.int64)
+        counts += np.bincount(cells, minlength=counts.size).reshape(counts.shape)
+        self._first_day, self._day_counts = low, counts
+
+    # ----------- QUERIES -------------------
+
+    def _ensure(self) -> None:
+        self.sync()
+
+    def __len__(self) -> int:
+        self._ensure()
+        return self._size
+
+    def latest(self) -> Optional[str]:
+        """The most recent mood, or None if none are logged."""
+        self._ensure()
+        with self._lock:
+            return self.moods[self._codes[self._size - 1]] if self._size else None
+
+    def counts(self, start: datetime, end: datetime) -> Dict[str, int]:
+        """
+        How often each mood was logged in [start, end): a binary search over the time
+        column, which is in log order (a clock set back can misplace a few entries).
+        """
+        self._ensure()
+        with self._lock:
+            times = self._times[:self._size]
+            lo, hi = np.searchsorted(times, [to_seconds(start), to_seconds(end)])
+            totals = np.bincount(self._codes[lo:hi], minlength=len(self.moods))
+        return {mood: int(n) for mood, n in zip(self.moods, totals) if n}
+
+    def daily(self, days: int = 7, until: Optional[date] = None) -> List[Tuple[date, Dict[str, int]]]:
+        """Per-day mood counts for the `days` days ending with `until` (today by default)."""
+        self._ensure()
+        until = until or datetime.now().date()
+        first = until - timedelta(days=days - 1)
+        block = self._day_block(_day_number(first), days)
+        return [(first + timedelta(days=i), {m: int(n) for m, n in zip(self.moods, row) if n})
+                for i, row in enumerate(block)]
+
+    def weekly(self, weeks: int = 4, until: Optional[date] = None) -> List[Tuple[date, Dict[str, int]]]:
+        """Per-week (Monday to Sunday) mood counts for the `weeks` weeks ending with the week of `until`."""
+        self._ensure()
+        until = until or datetime.now().date()
+        monday = until - timedelta(days=until.weekday()) - timedelta(weeks=weeks - 1)
+        block = self._day_block(_day_number(monday), 7 * weeks).reshape(weeks, 7, -1).sum(axis=1)
+        return [(monday + timedelta(weeks=i), {m: int(n) for m, n in zip(self.moods, row) if n})
+                for i, row in enumerate(block)]
+
+    def trend(self, days: int = 7, until: Optional[date] = None) -> Tuple[Optional[float], Optional[float]]:
+        """Mean valence (-1 sad/angry .. +1 happy) of the last `days` days and of the `days` before."""
+        self._ensure()
+        until = until or datetime.now().date()
+        block = self._day_block(_day_number(until) - 2 * days + 1, 2 * days)
+        weights = np.array([VALENCE.get(mood, 0.0) for mood in self.moods])
+        result = []
+        for part in (block[days:], block[:days]):
+            totals = part.sum(axis=0)
+            result.append(float(totals @ weights / totals.sum()) if totals.sum() else None)
+        return result[0], result[1]
+
+    def _day_block(self, first_day: int, days: int) -> np.ndarray:
+        """Counts for days first_day .. first_day + days - 1, zero-filled outside the log."""
+        with self._lock:
+            block = np.zeros((days, len(self.moods)), dtype=np.int64)
+            lo = max(first_day, self._first_day)
+            hi = min(first_day + days, self._first_day + len(self._day_counts))
+            if lo < hi:
+                block[lo - first_day:hi - first_day, :self._day_counts.shape[1]] = \
+                    self._day_counts[lo - self._first_day:hi - self._first_day]
+            return block
+
+    def summary(self, days: int = 7, until: Optional[date] = None) -> str:
+        """A spoken summary of the last `days` days."""
+        period = {1: "today", 7: "this week", 30: "this month"}.get(days, f"over the last {days} days")
+        before = {1: "yesterday", 7: "last week", 30: "last month"}.get(days, f"the {days} days before")
+        totals: Dict[str, int] = {}
+        for _, counts in self.daily(days, until):
+            for mood, n in counts.items():
+                totals[mood] = totals.get(mood, 0) + n
+        if not totals:
+            return f"I haven't noticed your mood {period} yet."
+        total = sum(totals.values())
+        ranked = sorted(totals.items(), key=lambda item: -item[1])
+        text = f"{period.capitalize()} you were mostly {ranked[0][0].lower()}, {ranked[0][1]} of {_times(total)}"
+        if len(ranked) > 1:
+            text += f", then {ranked[1][0].lower()} {_times(ranked[1][1])}"
+        text += "."
+        current, previous = self.trend(days, until)
+        if current is not None and previous is not None:
+            if current > previous + 0.1:
+                text += f" That's better than {before}."
+            elif current < previous - 0.1:
+                text += f" That's lower than {before}."
+            else:
+                text += f" That's about the same as {before}."
+        return text
+
+
+# Optional direct module testing
+if __name__ == "__main__":
+    import tempfile
+
+    from storage import get_log
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = get_log(os.path.join(tmp, "mood_log.jsonl"))
+        today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        for i, mood in enumerate(["Sad", "Sad", "Angry", "Neutral", "Happy", "Happy", "Happy", "Neutral"]):
+            log.append({"timestamp": (today - timedelta(days=10 - i)).isoformat(), "mood": mood})
+        stats = MoodStats(log, os.path.join(tmp, "mood_stats.bin"))
+        print("latest:", stats.latest(), "rows:", len(stats))
+        log.append({"timestamp": today.isoformat(), "mood": "Excited"})
+        print("latest after append:", stats.latest(), "rows:", len(stats))
+        print("last 3 days:", stats.counts(today - timedelta(days=3), today + timedelta(seconds=1)))
+        print("weekly:", stats.weekly(2))
+        print("trend:", stats.trend(5))
+        print(stats.summary(7))
+        reloaded = MoodStats(log, stats.path)
+        print("reloaded:", reloaded.latest(), len(reloaded), reloaded.moods)
+        log.clear()
+        print("after clear:", reloaded.latest(), len(reloaded))
@@ -0,0 +1,268 @@
+# procman.py
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from commands import APP_COMMANDS, AppCommand
+
+# Starts and stops desktop apps for the open/close commands without blocking the
+# assistant loop. Launches go through subprocess (no shell) or the desktop's default
+# handler on a small worker pool; the PIDs started here are tracked, and closing
+# first checks a cached process table so nothing is killed blindly.
+
+PROCESS_TABLE_TTL = 2.0  # seconds a process table snapshot is trusted
+STOP_TIMEOUT = 3.0  # seconds to wait for a stopped process before killing it
+COMM_LENGTH = 15  # Linux truncates /proc/<pid>/comm to 15 characters
+
+
+def _process_name(name: str) -> str:
+    name = name.lower()
+    if sys.platform.startswith("linux"):
+        name = name[:COMM_LENGTH]
+    return name
+
+
+def _scan_processes() -> Dict[str, List[int]]:
+    """Running processes as {lowercased executable name: [pid, ...]}."""
+    table: Dict[str, List[int]] = {}
+    if sys.platform == "win32":
+        output = subprocess.run(["tasklist", "/fo", "csv", "/nh"], capture_output=True, text=True,
+                                creationflags=subprocess.CREATE_NO_WINDOW).stdout
+        for line in output.splitlines():
+            fields = re.findall(r'"([^"]*)"', line)
+            if len(fields) >= 2 and fields[1].isdigit():
+                table.setdefault(fields[0].lower(), []).append(int(fields[1]))
+    elif os.path.isdir("/proc"):
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f"/proc/{pid}/comm", "r") as f:
+                    name = f.read().strip()
+            except OSError:  # exited while scanning
+                continue
+            table.setdefault(_process_name(name), []).append(int(pid))
+    else:
+        output = subprocess.run(["ps", "-axo", "pid=,comm="], capture_output=True, text=True).stdout
+        for line in output.splitlines():
+            pid, _, name = line.strip().partition(" ")
+            if pid.isdigit():
+                table.setdefault(os.path.basename(name.strip()).lower(), []).append(int(pid))
+    return table
+
+
+class ProcessTable:
+    """
+    Snapshot of running processes, rescanned at most every `ttl` seconds. Launching or
+    stopping an app invalidates it, so the next lookup sees the change.
+    """
+
+    def __init__(self, ttl: float = PROCESS_TABLE_TTL):
+        self.ttl = ttl
+        self._table: Dict[str, List[int]] = {}
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+        self.scans = 0
+
+    def refresh(self) -> Dict[str, List[int]]:
+        table = _scan_processes()
+        with self._lock:
+            self._table = table
+            self._scanned_at = time.monotonic()
+            self.scans += 1
+        return table
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._scanned_at = 0.0
+
+    def find(self, names) -> List[int]:
+        """PIDs of running processes with any of the given executable names."""
+        keys = [_process_name(name) for name in names]
+        with self._lock:
+            table, fresh = self._table, time.monotonic() - self._scanned_at < self.ttl
+        if not fresh:
+            table = self.refresh()
+        return [pid for key in keys for pid in table.get(key, ())]
+
+
+class ProcessManager:
+    """
+    Opens and closes the apps in `commands` (commands.APP_COMMANDS for this platform).
+
+    open() and close() return at once with a Future; the work runs on a two-thread pool.
+    """
+
+    def __init__(self, commands: Optional[Dict[str, AppCommand]] = None, table: Optional[ProcessTable] = None,
+                 platform: str = sys.platform):
+        self.platform = platform
+        self.commands = APP_COMMANDS.get(platform, {}) if commands is None else commands
+        self.table = table or ProcessTable()
+        self._children: Dict[str, List[subprocess.Popen]] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="procman")
+
+    def supports(self, app: str) -> bool:
+        return app in self.commands
+
+    def restarts(self, app: str) -> bool:
+        return app in self.commands and self.commands[app].restart
+
+    def warm_up(self, background=True):
+        """Take the first process table snapshot, so the first close does not wait for a scan."""
+        if background:
+            return self._pool.submit(self.table.refresh)
+        self.table.refresh()
+
+    # ----------- LOOKUP -------------------
+
+    def _live_children(self, app: str) -> List[subprocess.Popen]:
+        with self._lock:
+            children = [p for p in self._children.get(app, []) if p.poll() is None]
+            self._children[app] = children
+        return children
+
+    def running(self, app: str) -> List[int]:
+        """PIDs of the app: processes started here plus matches in the (cached) process table."""
+        if app not in self.commands:
+            return []
+        pids = [p.pid for p in self._live_children(app)]
+        for pid in self.table.find(self.commands[app].processes):
+            if pid not in pids:
+                pids.append(pid)
+        return pids
+
+    def lookup(self, app: str) -> "Future[List[int]]":
+        """running() on the worker pool, so a process table scan never blocks the caller."""
+        return self._pool.submit(self.running, app)
+
+    # ----------- OPEN / CLOSE -------------------
+
+    def open(self, app: str) -> "Future[Optional[int]]":
+        """Launch app; the Future holds the PID started here (None when a default handler opened it)."""
+        return self._pool.submit(self._launch, app)
+
+    def close(self, app: str) -> "Future[int]":
+        """Stop app (or restart it, for restart entries); the Future holds how many processes were stopped."""
+        return self._pool.submit(self._restart if self.restarts(app) else self._stop, app)
+
+    def _launch(self, app: str) -> Optional[int]:
+        launch = self.commands[app].launch
+        if launch is None:
+            raise ValueError(f"{app} has no launch command on {self.platform}")
+        try:
+            if isinstance(launch, str):
+                self._open_default(launch)
+                return None
+            argv = list(launch)
+            executable = shutil.which(argv[0])
+            if executable is None:
+                raise FileNotFoundError(f"{argv[0]} is not installed")
+            argv[0] = executable
+            if self.platform == "win32":
+                flags = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+                process = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                           stderr=subprocess.DEVNULL, creationflags=flags)
+            else:
+                process = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                           stderr=subprocess.DEVNULL, start_new_session=True)
+            with self._lock:
+                self._children.setdefault(app, []).append(process)
+            return process.pid
+        finally:
+            self.table.invalidate()
+
+    def _open_default(self, target: str) -> None:
+        if self.platform == "win32":
+            os.startfile(target)
+        elif self.platform == "darwin":
+            subprocess.Popen(["open", target], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            subprocess.Popen(["xdg-open", target], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                             start_new_session=True)
+
+    def _stop(self, app: str) -> int:
+        children = {p.pid: p for p in self._live_children(app)}
+        stopped = 0
+        for pid in self.running(app):
+            try:
+                if pid in children:
+                    children[pid].terminate()
+                else:
+                    os.kill(pid, signal.SIGTERM)  # TerminateProcess on Windows, like taskkill /f
+                stopped += 1
+            except (ProcessLookupError, PermissionError) as e:
+                print(f"[procman.py] Could not stop {app} (pid {pid}): {e}")
+        # Reap what was started here; kill anything that ignores the request
+        for process in children.values():
+            try:
+                process.wait(timeout=STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self.table.invalidate()
+        return stopped
+
+    def _restart(self, app: str) -> int:
+        stopped = self._stop(app)
+        self._launch(app)
+        return stopped
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+def write_stub_apps(directory: str, commands: Dict[str, AppCommand]) -> Dict[str, AppCommand]:
+    """
+    A copy of an app table whose apps are stub executables that idle until terminated,
+    for benchmarks and tests. On POSIX each stub is a shell script named stub-<app>, so
+    it shows up in the process table; on Windows stubs are Python processes found by PID only.
+    """
+    table = {}
+    for app, command in commands.items():
+        name = "stub-" + app.replace(" ", "-")
+        if sys.platform == "win32":
+            table[app] = AppCommand([sys.executable, "-c", "import time\nwhile True: time.sleep(0.2)"],
+                                    restart=command.restart)
+            continue
+        path = os.path.join(directory, name)
+        with open(path, "w") as f:
+            f.write('#!/bin/sh\ntrap "exit 0" TERM\nwhile :; do sleep 0.2; done\n')
+        os.chmod(path, 0o755)
+        table[app] = AppCommand([path], (name,), command.restart)
+    return table
+
+
+_manager: Optional[ProcessManager] = None
+
+
+def get_manager() -> ProcessManager:
+    global _manager
+    if _manager is None:
+        _manager = ProcessManager()
+    return _manager
+
+
+# Optional direct module testing: open and close a stub app
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = ProcessManager(write_stub_apps(tmp, {"notepad": APP_COMMANDS["linux"]["notepad"]}))
+
+        start = time.perf_counter()
+        future = manager.open("notepad")
+        print(f"open returned after {(time.perf_counter() - start) * 1000:.2f} ms")
+        print("pid:", future.result())
+        time.sleep(0.2)
+        print("running:", manager.running("notepad"))
+        print("stopped:", manager.close("notepad").result())
+        print("running after close:", manager.running("notepad"))
+        manager.shutdown()
@@ -0,0 +1,140 @@
+# prompt.py
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+# Chat prompts for llama3 as proper role messages: system prompt, then alternating
+# user / assistant turns, then the new user message. The history is trimmed to a
+# token budget, and only in large steps, so consecutive prompts share a long, identical
+# prefix that Ollama can reuse from its KV cache instead of evaluating it again.
+
+SYSTEM_PROMPT = "You are a friendly, helpful AI assistant named Nova."
+NUM_CTX = 4096           # Context window requested from Ollama
+REPLY_TOKENS = 512       # Room left for the reply
+KEEP_ALIVE = "30m"       # Keep llama3 loaded between turns
+LOW_WATER = 0.6          # After a trim the history fills at most this share of its budget
+MEMORY_HEADER = "Things you remember from earlier conversations with Moorthy:"
+
+_TOKEN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+MESSAGE_OVERHEAD = 4  # Role header and end-of-turn tokens of the llama3 chat template
+
+
+@lru_cache(maxsize=4096)
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local estimate of llama3 tokens: one per word or punctuation mark, plus one
+    per 8 characters of long words that the BPE vocabulary splits.
+    """
+    count = 0
+    for piece in _TOKEN.findall(text):
+        count += 1 + len(piece) // 8
+    return count + MESSAGE_OVERHEAD
+
+
+def turn_tokens(turn: Dict[str, str]) -> int:
+    return estimate_tokens(turn["user"]) + estimate_tokens(turn["nova"])
+
+
+class PromptBuilder:
+    """
+    Builds the message list for each llama3 call from the rolling chat history.
+
+    :param system_prompt: First message of every prompt.
+    :param num_ctx: Context window passed to Ollama.
+    :param reply_tokens: Tokens kept free for the reply.
+    :param low_water: When the history outgrows its budget, the oldest turns are dropped
+                      until it fits in low_water * budget. Between trims only new turns
+                      are appended, so the cached prompt prefix stays valid.
+    """
+
+    def __init__(self, system_prompt: str, num_ctx: int = NUM_CTX, reply_tokens: int = REPLY_TOKENS,
+                 keep_alive: Optional[str] = KEEP_ALIVE, low_water: float = LOW_WATER):
+        self.system_prompt = system_prompt
+        self.num_ctx = num_ctx
+        self.reply_tokens = reply_tokens
+        self.keep_alive = keep_alive
+        self.low_water = low_water
+        self._first: Optional[Dict[str, str]] = None  # Oldest turn in the last prompt
+        self.trims = 0
+
+    def budget(self, user_message: str) -> int:
+        """Tokens available for history once the system prompt, message and reply fit."""
+        return (self.num_ctx - self.reply_tokens - estimate_tokens(self.system_prompt)
+                - estimate_tokens(user_message))
+
+    def _start(self, history: List[Dict[str, str]], budget: int) -> int:
+        start = 0
+        anchored = self._first is None
+        if self._first is not None:
+            # Turn dicts are shared with the context store, so identity finds the old start
+            for i, turn in enumerate(history):
+                if turn is self._first:
+                    start = i
+                    anchored = True
+                    break
+        costs = [turn_tokens(turn) for turn in history[start:]]
+        total = sum(costs)
+        if total > budget or not anchored:
+            # Once the old first turn has rolled out of the context store the prefix changes
+            # anyway, so trim there too and keep fewer turns than the store holds; otherwise
+            # every new turn would push the start of the history forward by one
+            target = max(0, int(budget * self.low_water))
+            max_turns = len(costs) if anchored else int(len(costs) * self.low_water)
+            kept = len(costs)
+            for cost in costs:
+                if total <= target and kept <= max_turns:
+                    break
+                total -= cost
+                kept -= 1
+                start += 1
+            self.trims += 1
+        return start
+
+    def messages(self, history: List[Dict[str, str]], user_message: str,
+                 memories: Sequence[str] = ()) -> List[Dict[str, str]]:
+        """
+        System prompt, the kept history as user/assistant pairs, then the new message.
+
+        Recalled long-term memories go into the new message rather than the system
+        prompt, so they never change the cached prefix.
+        """
+        if memories:
+            notes = "\n".join(f"- {memory}" for memory in memories)
+            user_message = f"{MEMORY_HEADER}\n{notes}\n\n{user_message}"
+        start = self._start(history, self.budget(user_message))
+        kept = history[start:]
+        self._first = kept[0] if kept else None
+        messages = [{"role": "system", "content": self.system_prompt}]
+        for turn in kept:
+            messages.append({"role": "user", "content": turn["user"]})
+            messages.append({"role": "assistant", "content": turn["nova"]})
+        messages.append({"role": "user", "content": user_message})
+        return messages
+
+    def chat_options(self) -> Dict[str, Any]:
+        """keep_alive and options for ollama.chat, so the model and its context stay loaded."""
+        kwargs: Dict[str, Any] = {"options": {"num_ctx": self.num_ctx}}
+        if self.keep_alive is not None:
+            kwargs["keep_alive"] = self.keep_alive
+        return kwargs
+
+
+# Optional direct module testing: prefix stability as a conversation grows
+if __name__ == "__main__":
+    builder = PromptBuilder("You are Nova.", num_ctx=600, reply_tokens=100)
+    history = []
+    previous = []
+    for i in range(60):
+        message = f"Question {i}: tell me something about topic number {i}, please."
+        messages = builder.messages(history, message)
+        shared = 0
+        for old, new in zip(previous, messages):
+            if old != new:
+                break
+            shared += 1
+        tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        print(f"turn {i:2d}: {len(messages):2d} messages, ~{tokens} tokens, {shared} reused from last prompt")
+        previous = messages + [{"role": "assistant", "content": f"Here is an answer about topic {i}."}]
+        history.append({"user": message, "nova": f"Here is an answer about topic {i}."})
+        history = history[-20:]  # rolling window, like the context store's MAX_CONTEXT_TURNS
+    print(f"trims: {builder.trims}")
@@ -1,11 +1,30 @@
+import sys
+
 import sounddevice as sd
 from scipy.io.wavfile import write
 
 fs = 16000  # Sample rate
 duration = 5  # seconds
 
-print("Please speak now to create 'temp_test.wav'...")
+# Pass --verify to check the recording against my_voice_sample.wav in memory instead of saving it
+verify_only = "--verify" in sys.argv
+
+if verify_only:
+    print("Please speak now to verify your voice...")
+else:
+    print("Please speak now to create 'temp_test.wav'...")
 recording = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
 sd.wait()
-write("temp_test.wav", fs, recording)
-print("Recording saved as 'temp_test.wav'. You can now use it for testing.")
+
+if verify_only:
+    from auth import VoiceAuthenticator
+
+    auth = VoiceAuthenticator("my_voice_sample.wav", threshold=0.75)
+    samples = recording.reshape(-1).astype("float32") / 32768.0
+    if auth.is_my_voice(samples, sample_rate=fs):
+        print("Voice authenticated! This is you.")
+    else:
+        print("Voice NOT recognized.")
+else:
+    write("temp_test.wav", fs, recording)
+    print("Recording saved as 'temp_test.wav'. You can now use it for testing.")
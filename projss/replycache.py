@@ -0,0 +1,238 @@
+# replycache.py
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from intents import tokenize
+from storage import get_log
+
+# Cache of llama3 replies to open-ended questions the user asks again and again
+# ("how are you today?", "tell me a joke"). Lookups match the normalized question
+# exactly, then, once the sentence embedder is loaded, by cosine similarity.
+# Entries expire after a TTL and the least recently used are evicted. Questions that
+# refer to the conversation, to personal memories or to the current time/news always
+# go to the LLM. Entries are persisted as an append log under memory/.
+
+REPLY_CACHE_FILE = os.path.join("memory", "reply_cache.jsonl")
+MAX_ENTRIES = 500
+TTL_SECONDS = 7 * 24 * 3600
+SIMILARITY_THRESHOLD = 0.92  # None disables semantic matching
+
+# Words that make a reply depend on earlier turns, stored memories or the clock
+CONTEXT_WORDS = re.compile(
+    r"\b(it|that|this|those|these|he|she|him|her|they|them|again|more|else|also|continue|"
+    r"previous|last|earlier|before|above|my|mine|remember|we|our|us|"
+    r"time|date|weather|news|latest|tomorrow|yesterday|now)\b"
+)
+
+
+def normalize(query: str) -> str:
+    return " ".join(tokenize(query))
+
+
+class CacheHit:
+    def __init__(self, response: str, kind: str, score: float, saved_seconds: float):
+        self.response = response
+        self.kind = kind  # "exact" or "semantic"
+        self.score = score
+        self.saved_seconds = saved_seconds  # generation time of the cached reply
+
+    def __repr__(self):
+        return f"CacheHit({self.kind}, {self.score:.3f}, saved {self.saved_seconds * 1000:.0f}ms)"
+
+
+class ReplyCache:
+    """
+    LRU + TTL cache of replies keyed on normalized questions.
+
+    :param embedder_loader: Returns a sentence-transformers style encoder for semantic
+                            matching; semantic lookups are skipped while `embedder_ready`
+                            returns False, so the cache never loads the model itself.
+    :param threshold: Minimum cosine similarity for a semantic hit (None: exact only).
+    """
+
+    def __init__(self, path: str = REPLY_CACHE_FILE, max_entries: int = MAX_ENTRIES,
+                 ttl: float = TTL_SECONDS, threshold: Optional[float] = SIMILARITY_THRESHOLD,
+                 embedder_loader: Optional[Callable[[], Any]] = None,
+                 embedder_ready: Optional[Callable[[], bool]] = None):
+        self.log = get_log(path, max_entries=max_entries)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._embedder_loader = embedder_loader
+        self._embedder_ready = embedder_ready or (lambda: embedder_loader is not None)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.saved_seconds = 0.0
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            now = time.time()
+            try:
+                records = self.log.read_all()
+            except Exception as e:
+                print(f"[replycache.py] Error loading {self.log.path}: {e}")
+                records = []
+            for record in records:
+                if now - record.get("created", 0) < self.ttl:
+                    self._entries[record["key"]] = record
+                    self._entries.move_to_end(record["key"])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._loaded = True
+
+    @staticmethod
+    def cacheable(query: str) -> bool:
+        """False for questions whose answer depends on context, memories or the current time."""
+        key = normalize(query)
+        return bool(key) and CONTEXT_WORDS.search(key) is None
+
+    def _semantic_ready(self) -> bool:
+        return self.threshold is not None and self._embedder_loader is not None and self._embedder_ready()
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self._embedder_loader().encode(texts, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry["created"] >= self.ttl
+
+    def get(self, query: str) -> Optional[CacheHit]:
+        """Cached reply for query, or None (a miss, or a question that must not be cached)."""
+        if not self.cacheable(query):
+            self.bypassed += 1
+            return None
+        self._load()
+        key = normalize(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return self._hit(entry, "exact", 1.0)
+        if self._semantic_ready():
+            hit = self._semantic_get(key)
+            if hit is not None:
+                return hit
+        self.misses += 1
+        return None
+
+    def _semantic_get(self, key: str) -> Optional[CacheHit]:
+        with self._lock:
+            missing = [k for k in self._entries if k not in self._vectors]
+        if missing:
+            for k, vector in zip(missing, self._embed(missing)):
+                self._vectors[k] = vector
+        query = self._embed([key])[0]
+        with self._lock:
+            keys = [k for k in self._entries if k in self._vectors]
+            if not keys:
+                return None
+            scores = np.stack([self._vectors[k] for k in keys]) @ query
+            best = int(np.argmax(scores))
+            entry = self._entries[keys[best]]
+            if scores[best] < self.threshold or self._expired(entry):
+                return None
+            self._entries.move_to_end(keys[best])
+            return self._hit(entry, "semantic", float(scores[best]))
+
+    def _hit(self, entry: Dict[str, Any], kind: str, score: float) -> CacheHit:
+        self.hits += 1
+        if kind == "semantic":
+            self.semantic_hits += 1
+        saved = entry.get("generation_seconds", 0.0)
+        self.saved_seconds += saved
+        return CacheHit(entry["response"], kind, score, saved)
+
+    def _remove(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._vectors.pop(key, None)
+
+    def put(self, query: str, response: str, generation_seconds: float = 0.0) -> None:
+        """Store a freshly generated reply (ignored for uncacheable questions or empty replies)."""
+        if not response or not self.cacheable(query):
+            return
+        self._load()
+        key = normalize(query)
+        entry = {"key": key, "query": query, "response": response, "created": time.time(),
+                 "generation_seconds": generation_seconds}
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        try:
+            self.log.append(entry)
+        except Exception as e:
+            print(f"[replycache.py] Error saving to {self.log.path}: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+            self._loaded = True
+        self.log.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+        }
+
+    def prometheus_lines(self) -> List[str]:
+        """Counters for tracing.render_prometheus (see tracing.add_collector)."""
+        stats = self.stats()
+        return [
+            "# HELP luma_reply_cache_lookups_total Reply cache lookups by result.",
+            "# TYPE luma_reply_cache_lookups_total counter",
+            f'luma_reply_cache_lookups_total{{result="exact_hit"}} {self.hits - self.semantic_hits}',
+            f'luma_reply_cache_lookups_total{{result="semantic_hit"}} {self.semantic_hits}',
+            f'luma_reply_cache_lookups_total{{result="miss"}} {self.misses}',
+            f'luma_reply_cache_lookups_total{{result="bypass"}} {self.bypassed}',
+            "# HELP luma_reply_cache_saved_seconds_total LLM generation time avoided by cache hits.",
+            "# TYPE luma_reply_cache_saved_seconds_total counter",
+            f"luma_reply_cache_saved_seconds_total {stats['saved_seconds']:.3f}",
+            "# HELP luma_reply_cache_entries Replies currently cached.",
+            "# TYPE luma_reply_cache_entries gauge",
+            f"luma_reply_cache_entries {stats['entries']}",
+        ]
+
+
+# Optional direct module testing
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ReplyCache(os.path.join(tmp, "reply_cache.jsonl"), max_entries=2, ttl=60)
+        cache.put("Tell me a joke!", "Why did the chicken cross the road?", generation_seconds=1.5)
+        print("exact:", cache.get("tell me a joke"))
+        print("context-dependent:", cache.get("tell me that joke again"))
+        cache.put("How are you today?", "I'm great, thanks!", 0.8)
+        cache.put("What is a black hole?", "A region where gravity traps light.", 2.0)
+        print("evicted (LRU):", cache.get("tell me a joke"))
+        reloaded = ReplyCache(cache.log.path, max_entries=2, ttl=60)
+        print("after restart:", reloaded.get("How are you today"))
+        print(cache.stats())
@@ -0,0 +1,279 @@
+# runtime.py
+import itertools
+import queue
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import tracing
+
+# Thread-based runtime for the assistant: capture, recognition, dispatch and playback
+# each run on their own thread and talk through queues, so the microphone stays open
+# while Luma is speaking and a new wake word can cut the current reply short (barge-in).
+
+ECHO_OVERLAP = 0.6  # Share of recognized words that must match recent speech to count as echo
+ECHO_WINDOW = 5.0   # Seconds after a sentence ends that hearing it again still counts as echo
+
+_turn_ids = itertools.count(1)
+
+
+class TurnTrace:
+    """Timestamps for one user turn, measured from the end of the user's speech."""
+
+    STAGES = ("recognized", "dispatched", "first_audio", "handled")
+
+    def __init__(self, speech_end: Optional[float] = None):
+        self.turn_id = next(_turn_ids)
+        self.speech_end = speech_end if speech_end is not None else time.perf_counter()
+        self.marks: Dict[str, float] = {}
+        self.query: Optional[str] = None
+
+    def mark(self, stage: str) -> None:
+        if stage not in self.marks:
+            self.marks[stage] = time.perf_counter()
+
+    def elapsed(self) -> Dict[str, float]:
+        """Milliseconds from end of speech to each recorded stage."""
+        return {stage: (self.marks[stage] - self.speech_end) * 1000.0
+                for stage in self.STAGES if stage in self.marks}
+
+    def summary(self) -> str:
+        parts = [f"{stage}=+{ms:.0f}ms" for stage, ms in self.elapsed().items()]
+        return f"[trace] turn {self.turn_id}: " + " ".join(parts)
+
+
+class _Utterance:
+    def __init__(self, text: str, on_start: Optional[Callable[[], None]],
+                 turn: Optional[TurnTrace], generation: int):
+        self.text = text
+        self.on_start = on_start
+        self.turn = turn
+        self.generation = generation
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"[a-z']+", text.lower())
+
+
+class AssistantRuntime:
+    """
+    :param capture: Blocks until the user finishes a phrase and returns its audio (or None).
+    :param recognize: Turns captured audio into text (or None).
+    :param dispatch: Handles one recognized query with its audio; returns False to shut down.
+    :param play: Speaks one utterance, blocking until it finishes or is stopped;
+                 called as play(text, on_start=callback).
+    :param stop_audio: Stops whatever `play` is currently playing.
+    :param wake_words: Phrases that interrupt current speech when heard.
+    """
+
+    def __init__(
+        self,
+        capture: Callable[[], Any],
+        recognize: Callable[[Any], Optional[str]],
+        dispatch: Callable[[str, Any], bool],
+        play: Callable[..., None],
+        stop_audio: Callable[[], None],
+        wake_words: Sequence[str] = ("nova",),
+        on_trace: Optional[Callable[[TurnTrace], None]] = None,
+    ):
+        self.capture = capture
+        self.recognize = recognize
+        self.dispatch = dispatch
+        self.play = play
+        self.stop_audio = stop_audio
+        self.wake_words = list(wake_words)
+        self.on_trace = on_trace or (lambda trace: print(trace.summary()))
+
+        self.generation = 0  # bumped on every barge-in; queued speech from older generations is dropped
+        self._audio_q: "queue.Queue[Any]" = queue.Queue()
+        self._query_q: "queue.Queue[Any]" = queue.Queue()
+        self._speech_q: "queue.Queue[Optional[_Utterance]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._speaking: Optional[str] = None
+        self._spoken: Deque[Tuple[str, float]] = deque(maxlen=16)  # (sentence, monotonic end time)
+        self._local = threading.local()
+        self._threads: List[threading.Thread] = []
+
+    # ----------- SPEECH OUTPUT -------------------
+
+    def say(self, text: str, on_start: Optional[Callable[[], None]] = None,
+            turn: Optional[TurnTrace] = None, generation: Optional[int] = None) -> None:
+        """
+        Queue text for playback and return immediately. The turn and generation default
+        to those of the turn being handled on this thread; speech from an interrupted
+        generation is dropped.
+        """
+        if turn is None:
+            turn = getattr(self._local, "turn", None)
+        if generation is None:
+            generation = getattr(self._local, "generation", self.generation)
+        if generation != self.generation:
+            return
+        self._speech_q.put(_Utterance(text, on_start, turn, generation))
+
+    def turn_speaker(self) -> Callable[..., None]:
+        """
+        say() bound to the turn being handled on this thread, for speech queued later
+        from other threads (streamed sentences, a lead-in resolved on a worker).
+        """
+        turn = getattr(self._local, "turn", None)
+        generation = getattr(self._local, "generation", self.generation)
+
+        def speak(text: str, on_start: Optional[Callable[[], None]] = None) -> None:
+            self.say(text, on_start, turn, generation)
+        return speak
+
+    def is_speaking(self) -> bool:
+        return self._speaking is not None or not self._speech_q.empty()
+
+    def interrupt(self) -> None:
+        """Barge-in: stop current playback and drop everything still queued."""
+        self.generation += 1
+        while True:
+            try:
+                self._speech_q.get_nowait()
+            except queue.Empty:
+                break
+        self.stop_audio()
+
+    def turn_cancelled(self) -> bool:
+        """True if the turn being handled on this thread was interrupted."""
+        return getattr(self._local, "generation", self.generation) != self.generation
+
+    def wait_until_quiet(self, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while self.is_speaking() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    # ----------- TASKS -------------------
+
+    def _capture_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                audio = self.capture()
+            except Exception as e:
+                print(f"[runtime.py] Capture error: {e}")
+                time.sleep(0.5)
+                continue
+            if audio is not None:
+                self._audio_q.put((audio, TurnTrace()))
+
+    def _recognize_loop(self) -> None:
+        while not self._stop.is_set():
+            item = self._audio_q.get()
+            if item is None:
+                return
+            audio, trace = item
+            tracing.set_trace(trace.turn_id)
+            try:
+                text = self.recognize(audio)
+            except Exception as e:
+                print(f"[runtime.py] Recognition error: {e}")
+                text = None
+            trace.mark("recognized")
+            if not text:
+                continue
+            trace.query = text
+            # ASR returns a phrase only after it ends, so an echo of sentence N usually arrives
+            # while sentence N+1 plays or after playback has finished
+            if self._is_echo(text):
+                continue
+            if self.is_speaking() and any(wake in text.lower() for wake in self.wake_words):
+                self.interrupt()
+            self._query_q.put((text, audio, trace))
+
+    def _dispatch_loop(self) -> None:
+        while not self._stop.is_set():
+            item = self._query_q.get()
+            if item is None:
+                return
+            text, audio, trace = item
+            self._local.turn = trace
+            self._local.generation = self.generation
+            tracing.set_trace(trace.turn_id)
+            trace.mark("dispatched")
+            try:
+                keep_running = self.dispatch(text, audio)
+            except Exception as e:
+                print(f"[runtime.py] Dispatch error: {e}")
+                keep_running = True
+            trace.mark("handled")
+            tracing.observe("turn.handled", trace.marks["handled"] - trace.speech_end)
+            tracing.set_trace(None)
+            self._local.turn = None
+            if keep_running is False:
+                self.wait_until_quiet()
+                self.stop()
+                return
+
+    def _playback_loop(self) -> None:
+        while True:
+            item = self._speech_q.get()
+            if item is None:
+                return
+            if item.generation != self.generation:
+                continue
+
+            def on_start(item=item):
+                if item.turn is not None:
+                    first = "first_audio" not in item.turn.marks
+                    item.turn.mark("first_audio")
+                    if first:
+                        tracing.observe("turn.first_audio", item.turn.marks["first_audio"] - item.turn.speech_end)
+                        self.on_trace(item.turn)
+                if item.on_start is not None:
+                    item.on_start()
+
+            self._speaking = item.text
+            tracing.set_trace(item.turn.turn_id if item.turn is not None else None)
+            try:
+                self.play(item.text, on_start=on_start)
+            except Exception as e:
+                print(f"[runtime.py] Playback error: {e}")
+            finally:
+                self._spoken.append((item.text, time.monotonic()))
+                self._speaking = None
+
+    def _is_echo(self, text: str) -> bool:
+        """Whether recognized text is most likely Luma hearing its own voice."""
+        recent = time.monotonic() - ECHO_WINDOW
+        sentences = [sentence for sentence, ended in list(self._spoken) if ended >= recent]
+        speaking = self._speaking
+        if speaking:
+            sentences.append(speaking)
+        heard = _words(text)
+        if not sentences or not heard:
+            return False
+        # One phrase can span the end of one sentence and the start of the next
+        spoken = set(_words(" ".join(sentences)))
+        return sum(1 for w in heard if w in spoken) / len(heard) >= ECHO_OVERLAP
+
+    # ----------- LIFECYCLE -------------------
+
+    def start(self) -> None:
+        for name, target in (
+            ("capture", self._capture_loop),
+            ("recognize", self._recognize_loop),
+            ("dispatch", self._dispatch_loop),
+            ("playback", self._playback_loop),
+        ):
+            thread = threading.Thread(target=target, name=f"runtime-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._audio_q.put(None)
+        self._query_q.put(None)
+        self._speech_q.put(None)
+
+    def run(self) -> None:
+        """Start all tasks and block until dispatch asks to shut down (or Ctrl+C)."""
+        self.start()
+        try:
+            while not self._stop.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            self.stop()
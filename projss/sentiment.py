@@ -0,0 +1,214 @@
+# sentiment.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import models
+
+# nlptown model outputs 1-5 star ratings, mapped to the moods the assistant uses
+RATING_TO_MOOD = {5: "Happy", 4: "Happy", 3: "Neutral", 2: "Angry", 1: "Sad"}
+
+
+def rating_to_mood(rating: int) -> str:
+    """Map a 1-5 star rating to Happy / Neutral / Angry / Sad."""
+    return RATING_TO_MOOD.get(int(rating), "Sad")
+
+
+def normalize_text(text: str) -> str:
+    """Cache key for a text: lowercased with collapsed whitespace."""
+    return " ".join(text.lower().split())
+
+
+class SentimentEngine:
+    """
+    Batched, cached front-end for the BERT sentiment model.
+
+    Texts submitted from any thread are collected for up to `max_wait_ms` and run
+    through the model in one padded forward pass. Results are kept in an LRU cache
+    keyed on normalized text, so repeated utterances skip inference entirely.
+    """
+
+    def __init__(
+        self,
+        model_loader: Optional[Callable[[], Tuple[Any, Any]]] = None,
+        cache_size: int = 1024,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        quantize: bool = True,
+        num_threads: Optional[int] = None,
+    ):
+        self._model_loader = model_loader or models.resource("sentiment").get
+        self.cache_size = cache_size
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.quantize = quantize
+        self.num_threads = num_threads or min(4, os.cpu_count() or 1)
+
+        self._tokenizer = None
+        self._model = None
+        self._model_lock = threading.Lock()
+
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._pending: List[Tuple[str, Future]] = []
+        self._pending_cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+
+    # ----------- MODEL -------------------
+
+    def _ensure_model(self):
+        if self._model is not None:
+            return
+        with self._model_lock:
+            if self._model is not None:
+                return
+            import torch
+
+            tokenizer, model = self._model_loader()
+            torch.set_num_threads(self.num_threads)
+            if self.quantize:
+                try:
+                    # Returns a quantized copy, the shared fp32 model is left untouched
+                    model = torch.quantization.quantize_dynamic(
+                        model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+                except Exception as e:
+                    print(f"[sentiment.py] Dynamic quantization unavailable, using fp32: {e}")
+            model.eval()
+            self._tokenizer = tokenizer
+            self._model = model
+
+    def _infer(self, texts: List[str]) -> List[str]:
+        """Run one padded forward pass over `texts` and return their moods."""
+        import torch
+
+        self._ensure_model()
+        inputs = self._tokenizer(texts, return_tensors="pt", truncation=True, padding=True)
+        with torch.inference_mode():
+            logits = self._model(**inputs).logits
+        ratings = torch.argmax(logits, dim=1) + 1  # argmax of softmax == argmax of logits
+        return [rating_to_mood(r) for r in ratings.tolist()]
+
+    # ----------- CACHE -------------------
+
+    def _cache_get(self, key: str, count_miss: bool = True) -> Optional[str]:
+        with self._cache_lock:
+            mood = self._cache.get(key)
+            if mood is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            elif count_miss:
+                self.misses += 1
+            return mood
+
+    def _cache_put(self, key: str, mood: str) -> None:
+        with self._cache_lock:
+            self._cache[key] = mood
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self) -> Dict[str, int]:
+        with self._cache_lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+    # ----------- PUBLIC API -------------------
+
+    def analyze_batch(self, texts: List[str]) -> List[str]:
+        """Return the mood of every text, running uncached ones in a single batch."""
+        keys = [normalize_text(t) for t in texts]
+        results: List[Optional[str]] = [self._cache_get(k) for k in keys]
+
+        todo: Dict[str, str] = {}
+        for key, text, mood in zip(keys, texts, results):
+            if mood is None and key not in todo:
+                todo[key] = text
+        if todo:
+            todo_keys = list(todo)
+            for start in range(0, len(todo_keys), self.max_batch_size):
+                chunk = todo_keys[start:start + self.max_batch_size]
+                for key, mood in zip(chunk, self._infer([todo[k] for k in chunk])):
+                    self._cache_put(key, mood)
+                    todo[key] = mood
+            results = [mood if mood is not None else todo[key] for key, mood in zip(keys, results)]
+        return results  # type: ignore[return-value]
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for the next micro-batch and return a Future for its mood."""
+        future: Future = Future()
+        # Misses are counted once the batch worker looks the text up again
+        mood = self._cache_get(normalize_text(text), count_miss=False)
+        if mood is not None:
+            future.set_result(mood)
+            return future
+        with self._pending_cond:
+            if self._closed:
+                raise RuntimeError("SentimentEngine is closed")
+            self._pending.append((text, future))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="sentiment-batcher", daemon=True)
+                self._worker.start()
+            self._pending_cond.notify()
+        return future
+
+    def analyze(self, text: str) -> str:
+        """Return the mood for a single text (batched with any concurrent callers)."""
+        return self.submit(text).result()
+
+    def close(self) -> None:
+        with self._pending_cond:
+            self._closed = True
+            self._pending_cond.notify()
+        if self._worker is not None:
+            self._worker.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._pending_cond:
+                while not self._pending and not self._closed:
+                    self._pending_cond.wait()
+                if not self._pending and self._closed:
+                    return
+                # Give concurrent callers a short window to join this batch
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._pending_cond.wait(remaining)
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+            try:
+                moods = self.analyze_batch([text for text, _ in batch])
+                for (_, future), mood in zip(batch, moods):
+                    future.set_result(mood)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+
+_engine: Optional[SentimentEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> SentimentEngine:
+    """Return the shared sentiment engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = SentimentEngine()
+    return _engine
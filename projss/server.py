@@ -0,0 +1,347 @@
+# server.py
+"""
+Multi-session server mode: several clients send text or audio turns over HTTP and
+share one copy of each heavy model (see modelpool.py). Each session has its own chat
+history, mood log and long-term memory under memory/sessions/<id>/ instead of the
+shared memory/ files.
+
+    POST   /sessions                 {"session": "kitchen"} (optional id) -> {"session": id}
+    POST   /sessions/<id>/turns      {"text": "..."} or {"audio": "<base64 WAV, mono>"}
+    DELETE /sessions/<id>            flush the session and drop it from memory
+    GET    /stats                    sessions and per-lane queue depths
+
+Turns that match a desktop command (open app, volume, ...) are not executed here:
+the reply carries the intent and slots for the client to act on. When a model lane
+is saturated the server answers 503 with Retry-After instead of queueing.
+
+Usage: python server.py [--host 127.0.0.1] [--port 8765] [--llm-workers 2]
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import re
+import threading
+import time
+import uuid
+import wave
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+import speech_recognition as sr
+
+import longterm
+import models
+import tracing
+from commands import build_router
+from context import MAX_CONTEXT_TURNS, ContextStore
+from modelpool import ModelPool, Saturated
+from moodstats import MoodStats, period_days
+from prompt import SYSTEM_PROMPT, PromptBuilder
+from storage import get_log
+
+SESSIONS_DIR = os.path.join("memory", "sessions")
+MAX_SESSIONS = 256
+SESSION_IDLE_SECONDS = 15 * 60  # idle sessions are flushed and unloaded
+EVICT_INTERVAL = 60.0  # seconds between idle-session sweeps
+LISTEN_BACKLOG = 128  # at least; raised to max_sessions so a burst of connects is not reset
+RETRY_AFTER_SECONDS = 1
+SERVER_RESOURCES = ["sentiment", "embedder"]
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class Session:
+    """One client's conversation: its own context, mood log and long-term memory."""
+
+    def __init__(self, session_id: str, root: str, pool: ModelPool):
+        self.id = session_id
+        self.pool = pool
+        self.dir = os.path.join(root, session_id)
+        os.makedirs(self.dir, exist_ok=True)
+        self.context = ContextStore(get_log(os.path.join(self.dir, "chat_history.jsonl"),
+                                            max_entries=MAX_CONTEXT_TURNS))
+        self.mood_log = get_log(os.path.join(self.dir, "mood_log.jsonl"))
+        self.mood_stats = MoodStats(self.mood_log, os.path.join(self.dir, "mood_stats.bin"))
+        self.memory = longterm.LongTermMemory(os.path.join(self.dir, "longterm"),
+                                              embedder_loader=lambda: pool.encoder)
+        self.prompt_builder = PromptBuilder(SYSTEM_PROMPT)
+        self.lock = threading.Lock()  # one turn at a time per session
+        self.last_active = time.monotonic()
+        self.turns = 0
+        self.closed = False
+
+    def chat(self, text: str, timings: Dict[str, float]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        mood = self.pool.submit("sentiment", text)  # runs while the prompt is built
+        history = self.context.history()
+        memories = []
+        if models.is_loaded("embedder"):
+            with tracing.span("recall"):
+                found = self.memory.recall(text, exclude=[longterm.exchange_text(t) for t in history])
+            memories = [memory.text for memory in found]
+        timings["prompt"] = time.perf_counter() - start
+
+        llm_start = time.perf_counter()
+        with tracing.span("llm"):
+            request = {"messages": self.prompt_builder.messages(history, text, memories),
+                       **self.prompt_builder.chat_options()}
+            reply = self.pool.submit("llm", request).result()
+        timings["llm"] = time.perf_counter() - llm_start
+
+        mood = mood.result()
+        self.mood_log.append({"timestamp": datetime.now().isoformat(), "mood": mood})
+        self.context.add(text, reply)
+        self.memory.remember_exchange(text, reply)
+        return {"intent": None, "slots": {}, "reply": reply, "mood": mood}
+
+    def close(self) -> None:
+        self.closed = True
+        self.context.flush()
+        self.memory.close()
+
+
+class SessionManager:
+    def __init__(self, root: str = SESSIONS_DIR, pool: Optional[ModelPool] = None,
+                 max_sessions: int = MAX_SESSIONS, idle_seconds: float = SESSION_IDLE_SECONDS):
+        self.root = root
+        self.pool = pool or ModelPool()
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.router = build_router(lemmatizer_loader=models.resource("nltk").get)
+        self._sessions: Dict[str, Session] = {}
+        self._closing: Dict[str, threading.Event] = {}  # ids being flushed; get() waits for them
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        threading.Thread(target=self._evict_loop, name="session-evict", daemon=True).start()
+
+    def get(self, session_id: Optional[str] = None) -> Session:
+        """Return the session, loading or creating it (a new id when none is given)."""
+        session_id = session_id or uuid.uuid4().hex[:12]
+        if not _SESSION_ID.match(session_id):
+            raise ValueError("session ids are 1-64 letters, digits, '-' or '_'")
+        while True:
+            with self._lock:
+                closing = self._closing.get(session_id)
+                if closing is None:
+                    session = self._sessions.get(session_id)
+                    if session is None:
+                        if len(self._sessions) >= self.max_sessions:
+                            raise Saturated(f"{self.max_sessions} sessions open")
+                        session = self._sessions[session_id] = Session(session_id, self.root, self.pool)
+                    session.last_active = time.monotonic()
+                    return session
+            # Reopened only once the old session's files are flushed
+            closing.wait()
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return False
+            self._closing[session_id] = threading.Event()
+        session.lock.acquire()  # after the running turn, if any
+        self._finish_close(session)
+        return True
+
+    def close_all(self) -> None:
+        self._stop.set()
+        for session_id in list(self._sessions):
+            self.close(session_id)
+
+    def evict_idle(self) -> int:
+        """Flush and unload sessions idle for idle_seconds; returns how many were closed."""
+        now = time.monotonic()
+        idle = []
+        with self._lock:
+            for session_id, session in list(self._sessions.items()):
+                # A session with a turn running is not idle, so only take free locks
+                if now - session.last_active > self.idle_seconds and session.lock.acquire(blocking=False):
+                    del self._sessions[session_id]
+                    self._closing[session_id] = threading.Event()
+                    idle.append(session)
+        for session in idle:
+            self._finish_close(session)
+        return len(idle)
+
+    def _finish_close(self, session: Session) -> None:
+        """Close a session whose lock the caller holds, then let get() reopen its id."""
+        try:
+            session.close()
+        except Exception as e:
+            print(f"[server.py] Closing session {session.id} failed: {e}")
+        finally:
+            session.lock.release()
+            with self._lock:
+                closing = self._closing.pop(session.id)
+            closing.set()
+
+    def _evict_loop(self) -> None:
+        while not self._stop.wait(min(EVICT_INTERVAL, self.idle_seconds)):
+            self.evict_idle()
+
+    def turn(self, session_id: str, text: Optional[str] = None,
+             audio: Optional[sr.AudioData] = None) -> Dict[str, Any]:
+        """Handle one turn. Raises Saturated when the model pool is near its limits."""
+        lane = self.pool.saturated()
+        if lane is not None:
+            raise Saturated(f"{lane} lane is busy")
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        while True:
+            session = self.get(session_id)
+            session.lock.acquire()
+            if not session.closed:
+                break
+            session.lock.release()  # closed while this turn waited; get() opens it again
+        tracing.set_trace(f"{session.id}/{session.turns + 1}")
+        try:
+            if audio is not None:
+                asr_start = time.perf_counter()
+                with tracing.span("asr"):
+                    text = self.pool.submit("asr", audio).result()
+                timings["asr"] = time.perf_counter() - asr_start
+            result = self._handle(session, text, timings)
+            session.turns += 1
+            session.last_active = time.monotonic()
+        finally:
+            tracing.set_trace(None)
+            session.lock.release()
+        timings["total"] = time.perf_counter() - start
+        result.update(session=session.id, text=text,
+                      timings_ms={name: round(seconds * 1000.0, 1) for name, seconds in timings.items()})
+        return result
+
+    def _handle(self, session: Session, text: Optional[str], timings: Dict[str, float]) -> Dict[str, Any]:
+        if not text:
+            return {"intent": None, "slots": {}, "reply": None, "mood": None}
+        with tracing.span("intent"):
+            match = self.router.route(text.lower())
+        if match is None:
+            return session.chat(text, timings)
+        if match.name == "mood_summary":
+            reply = session.mood_stats.summary(period_days(text.lower()))
+            return {"intent": match.name, "slots": {}, "reply": reply, "mood": None}
+        # Desktop commands run on the client
+        return {"intent": match.name, "slots": match.slots, "reply": None, "mood": None}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sessions": len(self._sessions), "lanes": self.pool.stats()}
+
+
+def decode_wav(data: str) -> sr.AudioData:
+    """Base64 WAV (16-bit mono PCM) -> AudioData for the recognizer."""
+    with wave.open(io.BytesIO(base64.b64decode(data)), "rb") as wav:
+        if wav.getnchannels() != 1:
+            raise ValueError("audio must be mono")
+        return sr.AudioData(wav.readframes(wav.getnframes()), wav.getframerate(), wav.getsampwidth())
+
+
+def make_handler(manager: SessionManager):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so load tests measure turns rather than connects
+
+        def _send(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _body(self) -> Dict[str, Any]:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+        def _route(self, method: str):
+            parts = [p for p in self.path.split("?")[0].split("/") if p]
+            try:
+                if method == "GET" and parts == ["stats"]:
+                    return self._send(200, manager.stats())
+                if method == "POST" and parts == ["sessions"]:
+                    session = manager.get(self._body().get("session"))
+                    return self._send(201, {"session": session.id})
+                if method == "POST" and len(parts) == 3 and parts[0] == "sessions" and parts[2] == "turns":
+                    body = self._body()
+                    audio = decode_wav(body["audio"]) if body.get("audio") else None
+                    if audio is None and not body.get("text"):
+                        return self._send(400, {"error": "send text or audio"})
+                    return self._send(200, manager.turn(parts[1], text=body.get("text"), audio=audio))
+                if method == "DELETE" and len(parts) == 2 and parts[0] == "sessions":
+                    return self._send(200 if manager.close(parts[1]) else 404, {"session": parts[1]})
+                return self._send(404, {"error": "not found"})
+            except Saturated as e:
+                return self._send(503, {"error": str(e)}, {"Retry-After": str(RETRY_AFTER_SECONDS)})
+            except (ValueError, KeyError, wave.Error) as e:
+                return self._send(400, {"error": str(e)})
+            except Exception as e:
+                print(f"[server.py] {method} {self.path} failed: {e}")
+                return self._send(500, {"error": str(e)})
+
+        def do_GET(self):
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+        def do_DELETE(self):
+            self._route("DELETE")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class SessionHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler, backlog: int = LISTEN_BACKLOG):
+        # socketserver's default listen backlog of 5 resets connects when many sessions start at once
+        self.request_queue_size = backlog
+        super().__init__(address, handler)
+
+
+def serve(manager: SessionManager, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """Start the HTTP server on a daemon thread (port 0 picks a free one; see server.server_address)."""
+    server = SessionHTTPServer((host, port), make_handler(manager),
+                               backlog=max(LISTEN_BACKLOG, manager.max_sessions))
+    threading.Thread(target=server.serve_forever, name="session-http", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--root", default=SESSIONS_DIR, help="where per-session memory is kept")
+    parser.add_argument("--llm-workers", type=int, default=2, help="concurrent Ollama requests")
+    parser.add_argument("--asr-workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=32, help="queued requests per lane before 503s")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    args = parser.parse_args()
+
+    # LUMA_TRACE=1 records stage timings; LUMA_METRICS_PORT / LUMA_METRICS_FILE export them
+    tracing.configure()
+    models.warm_up(SERVER_RESOURCES)
+    pool = ModelPool(llm_workers=args.llm_workers, asr_workers=args.asr_workers, max_pending=args.max_pending)
+    tracing.add_collector(pool.prometheus_lines)
+    manager = SessionManager(args.root, pool, max_sessions=args.max_sessions)
+    server = serve(manager, args.host, args.port)
+    print(f"[server.py] Serving sessions at http://{args.host}:{server.server_address[1]}/sessions")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
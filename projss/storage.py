@@ -0,0 +1,232 @@
+# storage.py
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Union
+
+# Crash-safe storage primitives used by memory.py and context.py:
+#  - atomic_write_json: whole-file writes go to a temp file and are swapped in with os.replace
+#  - AppendLog: JSON-lines file where each record is one line, so appends are O(1)
+
+
+def atomic_write_json(data: Union[Dict, List], filename: str, indent: Optional[int] = 4) -> None:
+    """
+    Write data as JSON so that readers see either the old or the new file, never half of one.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=indent)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, filename)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class AppendLog:
+    """
+    JSON-lines log with O(1) appends.
+
+    A torn last line (crash mid-append) is skipped on read and fenced off with a
+    newline before the next append. If max_entries is set, the log is compacted
+    back down to the newest max_entries records once it holds
+    max_entries + compact_slack lines.
+    """
+
+    def __init__(self, path: str, max_entries: Optional[int] = None,
+                 compact_slack: Optional[int] = None, fsync: bool = False):
+        self.path = os.path.abspath(path)  # stays put if the working directory changes
+        self.max_entries = max_entries
+        self.compact_slack = compact_slack if compact_slack is not None else (max_entries or 0)
+        self.fsync = fsync
+        self.corrupt_lines = 0
+        self._lock = threading.RLock()
+        self._count: Optional[int] = None
+        self._tail_checked = False
+
+    # ----------- WRITES -------------------
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one record as a single line."""
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            prefix = b"" if self._tail_checked else self._tail_fence()
+            with open(self.path, "ab") as file:
+                file.write(prefix + line)
+                file.flush()
+                if self.fsync:
+                    os.fsync(file.fileno())
+            if self._count is not None:
+                self._count += 1
+            if self.max_entries is not None and self.count() > self.max_entries + self.compact_slack:
+                self.compact()
+
+    def extend(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            self.append(record)
+
+    def rewrite(self, records: List[Dict[str, Any]]) -> None:
+        """Atomically replace the whole log with `records`."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as file:
+                    for record in records:
+                        file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._count = len(records)
+            self._tail_checked = True
+            self.corrupt_lines = 0
+
+    def compact(self) -> None:
+        """Drop corrupt lines and, if bounded, everything but the newest max_entries records."""
+        with self._lock:
+            records = self.read_all()
+            if self.max_entries is not None:
+                records = records[-self.max_entries:] if self.max_entries else []
+            self.rewrite(records)
+
+    def clear(self) -> None:
+        self.rewrite([])
+
+    # ----------- READS -------------------
+
+    def read_all(self) -> List[Dict[str, Any]]:
+        """Return every valid record in order, skipping torn or corrupt lines."""
+        records = []
+        corrupt = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        corrupt += 1
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            self.corrupt_lines = corrupt
+            self._count = len(records) + corrupt
+        return records
+
+    def tail(self, n: int) -> List[Dict[str, Any]]:
+        """Return the last n valid records, reading only the end of the file."""
+        if n <= 0:
+            return []
+        try:
+            with open(self.path, "rb") as file:
+                file.seek(0, os.SEEK_END)
+                pos = file.tell()
+                buffer = b""
+                block = 4096
+                while pos > 0 and buffer.count(b"\n") <= n:
+                    step = min(block, pos)
+                    pos -= step
+                    file.seek(pos)
+                    buffer = file.read(step) + buffer
+                    block *= 2
+        except FileNotFoundError:
+            return []
+        lines = buffer.split(b"\n")
+        if pos > 0:
+            lines = lines[1:]  # first piece may be a partial line
+        records = []
+        for line in reversed(lines):
+            if len(records) == n:
+                break
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line.decode("utf-8")))
+            except ValueError:
+                continue
+        records.reverse()
+        return records
+
+    def last(self) -> Optional[Dict[str, Any]]:
+        records = self.tail(1)
+        return records[0] if records else None
+
+    def count(self) -> int:
+        """Number of lines in the log (counted once, then tracked on append)."""
+        with self._lock:
+            if self._count is None:
+                try:
+                    with open(self.path, "rb") as file:
+                        self._count = sum(1 for line in file if line.strip())
+                except FileNotFoundError:
+                    self._count = 0
+            return self._count
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _tail_fence(self) -> bytes:
+        """Return a newline if the file ends in a torn line that must be fenced off."""
+        self._tail_checked = True
+        try:
+            with open(self.path, "rb") as file:
+                file.seek(0, os.SEEK_END)
+                if file.tell() == 0:
+                    return b""
+                file.seek(-1, os.SEEK_END)
+                return b"" if file.read(1) == b"\n" else b"\n"
+        except FileNotFoundError:
+            return b""
+
+
+_logs: Dict[str, AppendLog] = {}
+_logs_lock = threading.Lock()
+
+
+def get_log(path: str, **kwargs) -> AppendLog:
+    """Return the shared AppendLog for `path`, so every module appends through one lock."""
+    key = os.path.abspath(path)
+    with _logs_lock:
+        log = _logs.get(key)
+        if log is None:
+            log = AppendLog(path, **kwargs)
+            _logs[key] = log
+        return log
+
+
+def migrate_json_list(json_path: str, log: AppendLog) -> bool:
+    """
+    One-time migration of a legacy JSON list file into `log`.
+    The old file is kept as <name>.migrated. Returns True if a migration ran.
+    """
+    if log.exists() or not os.path.exists(json_path):
+        return False
+    try:
+        with open(json_path, "r", encoding="utf-8") as file:
+            records = json.load(file)
+    except Exception as e:
+        print(f"[storage.py] Could not migrate {json_path}: {e}")
+        return False
+    if not isinstance(records, list):
+        print(f"[storage.py] Could not migrate {json_path}: expected a JSON list")
+        return False
+    log.rewrite(records)
+    if log.max_entries is not None and len(records) > log.max_entries:
+        log.compact()
+    os.replace(json_path, json_path + ".migrated")
+    print(f"[storage.py] Migrated {len(records)} entries from {json_path} to {log.path}")
+    return True
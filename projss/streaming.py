@@ -0,0 +1,275 @@
+# streaming.py
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Streams llama3 replies token by token, cuts them into sentences as they arrive
+# and speaks each sentence while the rest of the reply is still being generated.
+
+# End of a sentence: ., ! or ? (optionally closed by quotes/brackets) followed by whitespace,
+# or a line break
+SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n+")
+MIN_SENTENCE_CHARS = 12  # Shorter pieces ("Hi.", "1.") are merged with the next one
+LEAD_IN_WAIT = 2.0  # Longest the first generated sentence waits for a lead-in still being computed
+
+
+class SentenceSplitter:
+    """Accumulates streamed text and returns complete sentences as soon as they end."""
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return rest or None
+
+
+def iter_chat_content(stream: Iterable[Any]) -> Iterator[str]:
+    """Yield the text of each chunk of an ollama chat(stream=True) response."""
+    for chunk in stream:
+        content = chunk["message"]["content"]
+        if content:
+            yield content
+
+
+class SpeechQueue:
+    """
+    Speaks queued sentences one after another on a worker thread.
+
+    `speak_fn(text, on_start)` must call `on_start()` when audio starts playing;
+    the first such call is recorded as time-to-first-audio.
+    """
+
+    def __init__(self, speak_fn: Callable[..., None]):
+        self.speak_fn = speak_fn
+        self.first_audio: Optional[float] = None
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="speech-queue", daemon=True)
+        self._thread.start()
+
+    def _mark_audio(self) -> None:
+        if self.first_audio is None:
+            self.first_audio = time.perf_counter()
+
+    def _run(self) -> None:
+        while True:
+            text = self._queue.get()
+            if text is None:
+                return
+            try:
+                self.speak_fn(text, on_start=self._mark_audio)
+            except Exception as e:
+                print(f"[streaming.py] Speech error: {e}")
+
+    def put(self, text: str) -> None:
+        self._queue.put(text)
+
+    def close(self, wait: bool = True) -> None:
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+
+class _LeadIn:
+    """
+    Queues the lead-in exactly once and ahead of every generated sentence. A lead-in
+    given as a Future is spoken as soon as it resolves; if it is still pending when the
+    first sentence is ready, that sentence waits up to LEAD_IN_WAIT for it.
+    """
+
+    def __init__(self, lead_in: Union[str, "Future[str]", None], speech: SpeechQueue):
+        self.speech = speech
+        self.queued_at: Optional[float] = None
+        self._future = lead_in if isinstance(lead_in, Future) else None
+        self._lock = threading.Lock()
+        self._done = False
+        if self._future is not None:
+            self._future.add_done_callback(lambda future: self._put(self._result(future)))
+        else:
+            self._put(lead_in)
+
+    @staticmethod
+    def _result(future: "Future[str]", timeout: Optional[float] = None) -> Optional[str]:
+        try:
+            return future.result(timeout)
+        except Exception as e:
+            print(f"[streaming.py] No lead-in: {e!r}")
+            return None
+
+    def _put(self, text: Optional[str]) -> None:
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+            text = (text or "").strip()
+            if text:
+                self.queued_at = time.perf_counter()
+                self.speech.put(text)
+
+    def settle(self) -> None:
+        """Call before queueing generated speech; after this a late lead-in is dropped."""
+        if not self._done:
+            self._put(self._result(self._future, LEAD_IN_WAIT) if self._future is not None else None)
+
+
+def stream_reply(
+    messages: List[Dict[str, str]],
+    speak_fn: Callable[..., None],
+    chat_fn: Optional[Callable[..., Any]] = None,
+    model: str = "llama3",
+    lead_in: Union[str, "Future[str]", None] = None,
+    cancelled: Optional[Callable[[], bool]] = None,
+    **chat_kwargs: Any,
+) -> Tuple[str, Dict[str, Optional[float]]]:
+    """
+    Stream a chat completion and speak it sentence by sentence.
+
+    :param lead_in: Optional text spoken before the first generated sentence, or a Future
+                    of it (spoken as soon as it resolves, while generation continues).
+    :param cancelled: Optional callable; once it returns True (barge-in) generation stops
+                      and no further sentences are spoken.
+    :return: (full reply text, timings in seconds from the request:
+              first_token, first_sentence, lead_in, first_audio, generation, total)
+    """
+    if chat_fn is None:
+        from ollama import chat as chat_fn
+
+    start = time.perf_counter()
+    speech = SpeechQueue(speak_fn)
+    lead = _LeadIn(lead_in, speech)
+
+    splitter = SentenceSplitter()
+    parts: List[str] = []
+    first_token = first_sentence = None
+    try:
+        stream = chat_fn(model=model, messages=messages, stream=True, **chat_kwargs)
+        for content in iter_chat_content(stream):
+            if cancelled is not None and cancelled():
+                splitter = SentenceSplitter()
+                break
+            if first_token is None:
+                first_token = time.perf_counter()
+            parts.append(content)
+            for sentence in splitter.feed(content):
+                if first_sentence is None:
+                    first_sentence = time.perf_counter()
+                    lead.settle()
+                speech.put(sentence)
+        rest = splitter.flush()
+        if rest:
+            if first_sentence is None:
+                first_sentence = time.perf_counter()
+                lead.settle()
+            speech.put(rest)
+        generated = time.perf_counter()
+    finally:
+        lead.settle()
+        speech.close(wait=True)
+    end = time.perf_counter()
+
+    def rel(t):
+        return None if t is None else t - start
+
+    timings = {
+        "first_token": rel(first_token),
+        "first_sentence": rel(first_sentence),
+        "lead_in": rel(lead.queued_at),
+        "first_audio": rel(speech.first_audio),
+        "generation": rel(generated),
+        "total": rel(end),
+    }
+    return "".join(parts), timings
+
+
+class CriticalPath:
+    """
+    Times the tasks a reply runs in parallel with the LLM request (sentiment, mood log,
+    prompt building), so each turn can show its critical path next to the time the
+    same tasks would take one after another.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+
+    def task(self, name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        def run(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.durations[name] = time.perf_counter() - started
+
+        return run
+
+    def format(self, llm_start: float, first_token: Optional[float]) -> str:
+        """first_token is relative to llm_start, as returned by stream_reply."""
+        if first_token is None:
+            return "no tokens"
+        actual = llm_start - self.start + first_token
+        sequential = sum(self.durations.values()) + first_token
+        parts = " + ".join(f"{name} {seconds * 1000:.0f}" for name, seconds in self.durations.items())
+        return (f"first token after {actual * 1000:.0f}ms "
+                f"(in sequence {sequential * 1000:.0f}ms = {parts} + llm {first_token * 1000:.0f})")
+
+
+def format_timings(timings: Dict[str, Optional[float]]) -> str:
+    return ", ".join(
+        f"{name}={value * 1000:.0f}ms" for name, value in timings.items() if value is not None
+    )
+
+
+# Optional direct module testing with a local fake chat stream
+if __name__ == "__main__":
+    def fake_chat(model, messages, stream=False, token_delay=0.02):
+        reply = ("Sure thing, here is a short answer. It has a few sentences! "
+                 "Does the second one start before generation ends? It should.")
+        for word in reply.split(" "):
+            time.sleep(token_delay)
+            yield {"message": {"role": "assistant", "content": word + " "}}
+
+    spoken = []
+
+    def fake_speak(text, on_start=None):
+        time.sleep(0.01)  # synthesis
+        if on_start:
+            on_start()
+        spoken.append((time.perf_counter(), text))
+        time.sleep(0.05)  # playback
+
+    text, timings = stream_reply([{"role": "user", "content": "hi"}], fake_speak, chat_fn=fake_chat)
+    print("Spoken sentences:", [s for _, s in spoken])
+    print("Timings:", format_timings(timings))
+    assert " ".join(s for _, s in spoken).split() == text.split()
+    assert timings["first_audio"] < timings["generation"], "speech should start before generation ends"
+
+    # A lead-in still being computed is spoken first, as soon as it is ready
+    from concurrent.futures import ThreadPoolExecutor
+
+    spoken.clear()
+    with ThreadPoolExecutor(1) as pool:
+        pending = pool.submit(lambda: time.sleep(0.05) or "Happy to help!")
+        text, timings = stream_reply([{"role": "user", "content": "hi"}], fake_speak, chat_fn=fake_chat,
+                                     lead_in=pending)
+    print("Timings with lead-in:", format_timings(timings))
+    assert spoken[0][1] == "Happy to help!"
+    assert timings["lead_in"] < timings["first_sentence"], "lead-in should not wait for the first sentence"
+    print("OK")
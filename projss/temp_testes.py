@@ -1,6 +1,7 @@
-from auth import VoiceAuthenticator
+from auth import VoiceAuthenticator, load_threshold
 
-auth = VoiceAuthenticator("my_voice_sample.wav", threshold=0.75)
+# 0.75 unless a threshold was calibrated with auth_eval.py --save-threshold
+auth = VoiceAuthenticator("my_voice_sample.wav", threshold=load_threshold())
 
 # Replace "temp_test.wav" with your test audio file path
 result = auth.is_my_voice("temp_test.wav")
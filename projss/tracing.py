@@ -0,0 +1,354 @@
+# tracing.py
+import bisect
+import collections
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Stage-level latency tracing for the assistant pipeline.
+#
+#   with tracing.span("asr"):
+#       text = recognize(audio)
+#
+# Each finished span is added to a per-stage histogram and counter, tagged with the
+# current turn's trace ID (set by the runtime), and kept in a short ring buffer.
+# Metrics are rendered in the Prometheus text format, either served over HTTP on
+# localhost or written to a file. Tracing is off unless LUMA_TRACE=1 or configure()
+# turns it on. When it is off, span() returns a shared no-op object.
+
+ENABLED = os.environ.get("LUMA_TRACE", "") not in ("", "0")
+PROFILE_DIR = os.environ.get("LUMA_PROFILE") or None  # cProfile dumps go here when set
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RECENT_SPANS = 512
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, one series per stage."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+
+class SpanRecord:
+    __slots__ = ("trace_id", "stage", "start", "duration", "error", "attrs")
+
+    def __init__(self, trace_id, stage, start, duration, error, attrs):
+        self.trace_id = trace_id
+        self.stage = stage
+        self.start = start
+        self.duration = duration
+        self.error = error
+        self.attrs = attrs
+
+    def __repr__(self):
+        return f"[trace {self.trace_id}] {self.stage} {self.duration * 1000:.1f}ms" + (" (error)" if self.error else "")
+
+
+_lock = threading.Lock()
+_histograms: Dict[str, Histogram] = {}
+_errors: Dict[str, int] = collections.defaultdict(int)
+_recent: Deque[SpanRecord] = collections.deque(maxlen=RECENT_SPANS)
+_local = threading.local()
+_listeners: List[Callable[["SpanRecord"], None]] = []
+_collectors: List[Callable[[], List[str]]] = []
+
+
+# ----------- TRACE IDS -------------------
+
+def set_trace(trace_id: Optional[Any]) -> None:
+    """Tag spans finished on this thread with trace_id (the runtime's turn id)."""
+    _local.trace_id = trace_id
+
+
+def current_trace() -> Optional[Any]:
+    return getattr(_local, "trace_id", None)
+
+
+def wrap(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """fn bound to the caller's trace ID, for work handed to a thread pool."""
+    trace_id = current_trace()
+
+    def run(*args: Any, **kwargs: Any) -> Any:
+        set_trace(trace_id)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            set_trace(None)
+
+    return run
+
+
+# ----------- SPANS -------------------
+
+class Span:
+    __slots__ = ("stage", "attrs", "start", "trace_id")
+
+    def __init__(self, stage: str, attrs: Dict[str, Any]):
+        self.stage = stage
+        self.attrs = attrs
+        self.trace_id = current_trace()
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _record(self.trace_id, self.stage, self.start, duration, exc_type is not None, self.attrs)
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+def span(stage: str, **attrs: Any):
+    """Time the enclosed block as one `stage` span (a no-op while tracing is disabled)."""
+    if not ENABLED:
+        return _NOOP
+    return Span(stage, attrs)
+
+
+def observe(stage: str, seconds: float, **attrs: Any) -> None:
+    """Record a duration measured elsewhere (e.g. end of speech -> first audio)."""
+    if ENABLED:
+        _record(current_trace(), stage, time.perf_counter() - seconds, seconds, False, attrs)
+
+
+def _record(trace_id, stage, start, duration, error, attrs) -> None:
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = Histogram()
+        histogram.observe(duration)
+        if error:
+            _errors[stage] += 1
+        record = SpanRecord(trace_id, stage, start, duration, error, attrs)
+        _recent.append(record)
+    for listener in _listeners:
+        listener(record)
+
+
+def add_listener(fn: Callable[[SpanRecord], None]) -> None:
+    """Call fn with every finished span (bench_e2e.py keeps the raw durations this way)."""
+    _listeners.append(fn)
+
+
+def remove_listener(fn: Callable[[SpanRecord], None]) -> None:
+    if fn in _listeners:
+        _listeners.remove(fn)
+
+
+def recent_spans(trace_id: Optional[Any] = None) -> List[SpanRecord]:
+    with _lock:
+        spans = list(_recent)
+    return spans if trace_id is None else [s for s in spans if s.trace_id == trace_id]
+
+
+def stage_summary() -> Dict[str, Dict[str, float]]:
+    """count / mean_ms per stage since start (or the last reset)."""
+    with _lock:
+        return {stage: {"count": h.count, "mean_ms": 1000.0 * h.total / h.count if h.count else 0.0}
+                for stage, h in _histograms.items()}
+
+
+def reset() -> None:
+    with _lock:
+        _histograms.clear()
+        _errors.clear()
+        _recent.clear()
+
+
+# ----------- EXPORT -------------------
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def add_collector(fn: Callable[[], List[str]]) -> None:
+    """Register fn returning extra exposition lines (# HELP / # TYPE and samples) for /metrics."""
+    _collectors.append(fn)
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP luma_stage_seconds Time spent in each pipeline stage.",
+        "# TYPE luma_stage_seconds histogram",
+    ]
+    with _lock:
+        stages = sorted(_histograms.items())
+        errors = dict(_errors)
+    for stage, h in stages:
+        stage = _label(stage)
+        cumulative = 0
+        for bound, count in zip(h.buckets, h.counts):
+            cumulative += count
+            lines.append(f'luma_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'luma_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+        lines.append(f'luma_stage_seconds_sum{{stage="{stage}"}} {h.total:.6f}')
+        lines.append(f'luma_stage_seconds_count{{stage="{stage}"}} {h.count}')
+    lines += [
+        "# HELP luma_stage_errors_total Spans that ended with an exception.",
+        "# TYPE luma_stage_errors_total counter",
+    ]
+    for stage, h in stages:
+        lines.append(f'luma_stage_errors_total{{stage="{_label(stage)}"}} {errors.get(stage, 0)}')
+    for collector in _collectors:
+        try:
+            lines += collector()
+        except Exception as e:
+            print(f"[tracing.py] Metrics collector failed: {e}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: str) -> None:
+    """Write the current metrics to path atomically (for a node-exporter textfile collector)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def start_file_exporter(path: str, interval: float = 15.0) -> threading.Thread:
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                write_metrics(path)
+            except OSError as e:
+                print(f"[tracing.py] Could not write metrics: {e}")
+
+    thread = threading.Thread(target=run, name="metrics-file", daemon=True)
+    thread.start()
+    return thread
+
+
+def serve_metrics(port: int = 9464, host: str = "127.0.0.1"):
+    """Serve /metrics on a local HTTP endpoint from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"[tracing.py] Metrics at http://{host}:{port}/metrics")
+    return server
+
+
+def configure(enabled: Optional[bool] = None, metrics_file: Optional[str] = None,
+              port: Optional[int] = None, profile_dir: Optional[str] = None) -> None:
+    """Turn tracing on/off and start exporters. Environment: LUMA_TRACE, LUMA_METRICS_FILE, LUMA_METRICS_PORT."""
+    global ENABLED, PROFILE_DIR
+    if enabled is not None:
+        ENABLED = enabled
+    if profile_dir is not None:
+        PROFILE_DIR = profile_dir
+    if not ENABLED:
+        return
+    metrics_file = metrics_file or os.environ.get("LUMA_METRICS_FILE")
+    if metrics_file:
+        start_file_exporter(metrics_file)
+    port = port or int(os.environ.get("LUMA_METRICS_PORT", "0") or 0)
+    if port:
+        serve_metrics(port)
+
+
+# ----------- PROFILING -------------------
+
+@contextmanager
+def profile(name: str):
+    """
+    cProfile the enclosed block into PROFILE_DIR/<name>-<time>.prof when LUMA_PROFILE is set.
+
+    Threads started inside the block (the runtime's capture / recognize / dispatch /
+    playback tasks, the reply pool) are profiled too and merged into the same file.
+    For sampling profilers (py-spy record --pid ...), the pipeline threads are named
+    runtime-capture / -recognize / -dispatch / -playback, and spans show up as
+    tracing.Span frames around each stage.
+    """
+    if not PROFILE_DIR:
+        yield
+        return
+    import cProfile
+    import pstats
+
+    profilers = [cProfile.Profile()]
+    per_thread = sys.version_info < (3, 12)
+    if per_thread:
+        # Before 3.12 a profiler only sees the thread that enabled it, so each new thread
+        # enables its own on its first profile event (3.12+ profiles all threads at once)
+        def enable_in_thread(*args):
+            profiler = cProfile.Profile()
+            profilers.append(profiler)
+            profiler.enable()
+
+        threading.setprofile(enable_in_thread)
+    profilers[0].enable()
+    try:
+        yield
+    finally:
+        profilers[0].disable()
+        if per_thread:
+            threading.setprofile(None)
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)  # a snapshot, for threads still running
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        stats.dump_stats(path)
+        print(f"[tracing.py] Profile written to {path} ({len(profilers)} threads)")
+
+
+# Optional direct module testing: overhead of a span, disabled and enabled
+if __name__ == "__main__":
+    n = 200000
+    for enabled in (False, True):
+        configure(enabled=enabled)
+        start = time.perf_counter()
+        for _ in range(n):
+            with span("noop"):
+                pass
+        per_span = (time.perf_counter() - start) / n
+        print(f"enabled={enabled}: {per_span * 1e9:.0f} ns per span")
+    print(render_prometheus().splitlines()[-1])
@@ -0,0 +1,239 @@
+# tts.py
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# Text-to-speech backends plus a content-addressed audio cache, so fixed phrases
+# ("Opening Chrome", greetings, ...) are synthesized once and replayed from memory.
+
+TTS_CACHE_DIR = os.path.join("memory", "tts_cache")
+TTS_CACHE_DISK_FILES = 256  # Pre-rendered phrases kept on disk; least recently used go first
+DEFAULT_BACKEND = "gtts"  # "gtts" (online, Google) or "espeak" (offline, local espeak-ng)
+
+
+class TTSBackend:
+    """Turns text into encoded audio bytes."""
+
+    name = "base"
+    audio_format = "wav"
+
+    def __init__(self, voice: Optional[str] = None):
+        self.voice = voice
+
+    def synthesize(self, text: str, lang: str = "en") -> bytes:
+        raise NotImplementedError
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS (needs network). Returns MP3 bytes without touching disk."""
+
+    name = "gtts"
+    audio_format = "mp3"
+
+    def synthesize(self, text: str, lang: str = "en") -> bytes:
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=lang).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class EspeakBackend(TTSBackend):
+    """Offline synthesis with the local espeak-ng (or espeak) binary. Returns WAV bytes."""
+
+    name = "espeak"
+    audio_format = "wav"
+
+    # Language code -> espeak voice
+    VOICES = {"en": "en-us", "ta": "ta"}
+
+    def __init__(self, voice: Optional[str] = None, rate: int = 165):
+        super().__init__(voice)
+        self.rate = rate
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def synthesize(self, text: str, lang: str = "en") -> bytes:
+        if self.binary is None:
+            raise RuntimeError("espeak-ng is not installed")
+        voice = self.voice or self.VOICES.get(lang, lang)
+        result = subprocess.run(
+            [self.binary, "--stdout", "-v", voice, "-s", str(self.rate), text],
+            capture_output=True,
+            check=True,
+        )
+        return result.stdout
+
+
+BACKENDS: Dict[str, Callable[..., TTSBackend]] = {
+    "gtts": GTTSBackend,
+    "espeak": EspeakBackend,
+}
+
+
+class AudioCache:
+    """
+    LRU cache of synthesized audio keyed by (backend, voice, lang, text).
+    Bounded by total bytes in memory, with an optional on-disk tier for entries
+    put with persist=True (the fixed phrases), bounded by max_disk_files.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, disk_dir: Optional[str] = None,
+                 max_disk_files: int = TTS_CACHE_DISK_FILES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_files = max_disk_files
+        self._entries: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text: str, lang: str, voice: str) -> str:
+        return hashlib.sha256(f"{voice}\x00{lang}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._disk_get(key)
+        if entry is not None:
+            self.disk_hits += 1
+            self._memory_put(key, entry)
+            return entry
+        self.misses += 1
+        return None
+
+    def put(self, key: str, audio: bytes, audio_format: str, persist: bool = False) -> None:
+        """Cache audio in memory; with persist=True also in the disk tier, if there is one."""
+        self._memory_put(key, (audio, audio_format))
+        if persist:
+            self._disk_put(key, audio, audio_format)
+
+    def _memory_put(self, key: str, entry: Tuple[bytes, str]) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[0])
+            self._entries[key] = entry
+            self._size += len(entry[0])
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _disk_get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        if not self.disk_dir:
+            return None
+        for audio_format in ("mp3", "wav"):
+            path = os.path.join(self.disk_dir, f"{key}.{audio_format}")
+            try:
+                with open(path, "rb") as f:
+                    audio = f.read()
+                os.utime(path)  # recently used, for _trim_disk
+                return audio, audio_format
+            except FileNotFoundError:
+                continue
+        return None
+
+    def _disk_put(self, key: str, audio: bytes, audio_format: str) -> None:
+        if not self.disk_dir:
+            return
+        path = os.path.join(self.disk_dir, f"{key}.{audio_format}")
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+            self._trim_disk()
+        except OSError as e:
+            print(f"[tts.py] Could not write cache file {path}: {e}")
+
+    def _trim_disk(self) -> None:
+        """Delete the least recently used files beyond max_disk_files."""
+        paths = [os.path.join(self.disk_dir, name) for name in os.listdir(self.disk_dir)
+                 if name.endswith((".mp3", ".wav"))]
+        if len(paths) <= self.max_disk_files:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_disk_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits,
+                    "disk_hits": self.disk_hits, "misses": self.misses}
+
+
+class TTSService:
+    """A backend with an audio cache in front of it."""
+
+    def __init__(self, backend: TTSBackend, cache: Optional[AudioCache] = None):
+        self.backend = backend
+        self.cache = cache if cache is not None else AudioCache()
+
+    def render(self, text: str, lang: str = "en", persist: bool = False) -> Tuple[bytes, str]:
+        """
+        Return (audio bytes, format) for text, synthesizing only on a cache miss.
+        Only persist=True renders are written to the disk tier; reply sentences stay in memory.
+        """
+        voice = f"{self.backend.name}:{self.backend.voice or ''}"
+        key = AudioCache.make_key(text, lang, voice)
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry
+        audio = self.backend.synthesize(text, lang)
+        self.cache.put(key, audio, self.backend.audio_format, persist)
+        return audio, self.backend.audio_format
+
+    def prerender(self, phrases: Iterable[Tuple[str, str]], background: bool = True) -> Optional[threading.Thread]:
+        """Render (text, lang) pairs into the cache (and its disk tier), by default on a daemon thread."""
+        def _run():
+            for text, lang in phrases:
+                try:
+                    self.render(text, lang, persist=True)
+                except Exception as e:
+                    print(f"[tts.py] Could not pre-render '{text}': {e}")
+
+        if not background:
+            _run()
+            return None
+        thread = threading.Thread(target=_run, name="tts-prerender", daemon=True)
+        thread.start()
+        return thread
+
+
+_service: Optional[TTSService] = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> TTSService:
+    """Return the shared TTS service for DEFAULT_BACKEND; only pre-rendered phrases go to disk."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                backend = BACKENDS[DEFAULT_BACKEND]()
+                _service = TTSService(backend, AudioCache(disk_dir=TTS_CACHE_DIR))
+    return _service
+
+
+def set_backend(name: str, **kwargs) -> TTSService:
+    """Switch the shared service to another backend (keeps a fresh cache on the same disk dir)."""
+    global _service
+    with _service_lock:
+        _service = TTSService(BACKENDS[name](**kwargs), AudioCache(disk_dir=TTS_CACHE_DIR))
+    return _service
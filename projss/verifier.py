@@ -0,0 +1,161 @@
+# verifier.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from auth import SpeakerMatch, VoiceAuthenticator
+from wakeword import resample, to_float
+
+# Streaming speaker verification: audio frames are embedded window by window
+# (one Resemblyzer partial = 1.6 s) on a worker thread while the user is still
+# talking or while recognition runs. The running mean of the window embeddings is
+# scored after every window, and the verifier decides as soon as the score is
+# clearly above or below the threshold instead of waiting for the whole clip.
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 1.6
+STEP_SECONDS = 0.8      # ~ Resemblyzer's default partial rate of 1.3 per second
+DECISION_MARGIN = 0.05  # Decide early once the score is this far from the threshold
+SILENCE_RMS = 0.001     # Windows quieter than this (-60 dBFS) are skipped
+TARGET_DBFS = -30.0     # Quiet windows are boosted to this level, as preprocess_wav does
+
+
+def normalize_volume(wav: np.ndarray, target_dbfs: float = TARGET_DBFS) -> np.ndarray:
+    rms = float(np.sqrt(np.mean(wav ** 2)))
+    gain = 10 ** (target_dbfs / 20.0) / (rms + 1e-12)
+    return wav * gain if gain > 1.0 else wav
+
+
+class VerificationDecision(SpeakerMatch):
+    """A SpeakerMatch plus how much audio and compute it took to reach."""
+
+    def __init__(self, speaker: Optional[str], score: float, accepted: bool, scores,
+                 audio_seconds: float, compute_seconds: float, windows: int, early: bool):
+        super().__init__(speaker, score, accepted, scores)
+        self.audio_seconds = audio_seconds      # audio consumed when the decision was made
+        self.compute_seconds = compute_seconds  # embedding + scoring time on the worker
+        self.windows = windows
+        self.early = early                      # decided before the end of the audio
+
+    def __repr__(self):
+        kind = "early" if self.early else "final"
+        return (f"VerificationDecision({self.speaker!r}, {self.score:.4f}, accepted={self.accepted}, "
+                f"{kind} after {self.audio_seconds:.2f}s)")
+
+
+class StreamingVerifier:
+    """
+    Verify one utterance from frames fed as they arrive.
+
+    feed() is cheap and never blocks; the decision is delivered through `future`.
+
+    :param authenticator: Supplies the enrolled embedding index and the threshold.
+    :param embed_window: Embeds one window of 16 kHz float samples (default: the
+                         authenticator's encoder, embed_utterance on the raw window).
+    :param min_windows: Windows needed before an early decision is allowed.
+    """
+
+    def __init__(self, authenticator: VoiceAuthenticator,
+                 embed_window: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                 margin: float = DECISION_MARGIN, min_windows: int = 2,
+                 window_seconds: float = WINDOW_SECONDS, step_seconds: float = STEP_SECONDS,
+                 silence_rms: float = SILENCE_RMS):
+        self.authenticator = authenticator
+        self.embed_window = embed_window or (lambda wav: authenticator.encoder.embed_utterance(wav))
+        self.margin = margin
+        self.min_windows = min_windows
+        self.window = int(window_seconds * SAMPLE_RATE)
+        self.step = int(step_seconds * SAMPLE_RATE)
+        self.silence_rms = silence_rms
+        self.future: "Future[VerificationDecision]" = Future()
+        self._frames: "queue.Queue[Optional[np.ndarray]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def feed(self, samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> None:
+        if self.future.done():
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="verifier", daemon=True)
+            self._thread.start()
+        self._frames.put(resample(to_float(samples), sample_rate))
+
+    def finish(self) -> "Future[VerificationDecision]":
+        """No more audio: decide on what was heard if no early decision was made."""
+        if self._thread is None:
+            self.feed(np.zeros(0, np.float32))
+        self._frames.put(None)
+        return self.future
+
+    def result(self, timeout: Optional[float] = None) -> VerificationDecision:
+        return self.future.result(timeout)
+
+    def _run(self) -> None:
+        try:
+            self._verify()
+        except Exception as e:
+            print(f"[verifier.py] Verification failed: {e}")
+            if not self.future.done():
+                self.future.set_result(VerificationDecision(None, 0.0, False, {}, 0.0, 0.0, 0, False))
+
+    def _verify(self) -> None:
+        index = self.authenticator.load_index()
+        threshold = self.authenticator.threshold
+        buffer = np.zeros(0, np.float32)
+        consumed = 0  # samples before buffer[0]
+        total = np.zeros(0, np.float32)
+        windows = 0
+        compute = 0.0
+        scores = {}
+
+        def decide(heard: int, final: bool) -> VerificationDecision:
+            speaker = max(scores, key=scores.get) if scores else None
+            score = scores.get(speaker, 0.0) if speaker else 0.0
+            return VerificationDecision(speaker, score, score >= threshold, dict(scores),
+                                        heard / SAMPLE_RATE, compute, windows, not final)
+
+        def score_window(wav: np.ndarray) -> None:
+            nonlocal total, windows, compute, scores
+            start = time.perf_counter()
+            embedding = np.asarray(self.embed_window(normalize_volume(wav)), dtype=np.float32)
+            embedding /= np.linalg.norm(embedding) + 1e-12
+            total = embedding if windows == 0 else total + embedding
+            windows += 1
+            scores = index.scores(total)
+            compute += time.perf_counter() - start
+
+        while True:
+            frames = self._frames.get()
+            if frames is None:
+                break
+            buffer = np.concatenate((buffer, frames))
+            while len(buffer) >= self.window:
+                wav = buffer[:self.window]
+                if float(np.sqrt(np.mean(wav ** 2))) >= self.silence_rms:
+                    score_window(wav)
+                heard = consumed + self.window
+                buffer = buffer[self.step:]
+                consumed += self.step
+                if windows >= self.min_windows and scores:
+                    best = max(scores.values())
+                    if abs(best - threshold) >= self.margin:
+                        self.future.set_result(decide(heard, final=False))
+                        return
+
+        # End of audio: embed the tail if no full window had speech
+        if windows == 0 and len(buffer) >= SAMPLE_RATE // 2 and float(np.sqrt(np.mean(buffer ** 2))) >= self.silence_rms:
+            score_window(buffer)
+        self.future.set_result(decide(consumed + len(buffer), final=True))
+
+
+def verify_async(authenticator: VoiceAuthenticator, samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                 chunk_seconds: float = 0.1, **kwargs: Any) -> "Future[VerificationDecision]":
+    """Verify a finished clip on a worker thread; returns immediately with a Future."""
+    verifier = StreamingVerifier(authenticator, **kwargs)
+    step = max(1, int(chunk_seconds * sample_rate))
+    for start in range(0, len(samples), step):
+        verifier.feed(samples[start:start + step], sample_rate)
+    return verifier.finish()